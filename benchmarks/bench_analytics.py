@@ -0,0 +1,92 @@
+"""Times the history analytics on synthetic history.
+
+    python benchmarks/bench_analytics.py --rows 100000
+
+Compares the vectorized HistoryArrays path with a per-row Python loop
+over the same timestamps.
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from analytics import HistoryArrays, chart_series  # noqa: E402
+from todo_view import MEDALS_PER_TASK  # noqa: E402
+
+
+def synthetic_history(rows, seed=1):
+    rng = random.Random(seed)
+    start = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+    span = 4 * 365 * 86400
+    tasks = [
+        {"timestamp": (start + datetime.timedelta(seconds=s)).isoformat()}
+        for s in sorted(rng.randrange(span) for _ in range(rows))
+    ]
+    rewards = [
+        {
+            "timestamp": (start + datetime.timedelta(seconds=s)).isoformat(),
+            "cost": rng.randint(1, 50),
+        }
+        for s in sorted(rng.randrange(span) for _ in range(rows // 10))
+    ]
+    return tasks, rewards
+
+
+def python_baseline(tasks):
+    """Daily counts and weekday/hour heatmap the row-at-a-time way."""
+    daily, heatmap = {}, [[0] * 24 for _ in range(7)]
+    for row in tasks:
+        parsed = datetime.datetime.fromisoformat(row["timestamp"])
+        day = parsed.date()
+        daily[day] = daily.get(day, 0) + 1
+        heatmap[parsed.weekday()][parsed.hour] += 1
+    return daily, heatmap
+
+
+def timed(timings, name, work):
+    started = time.perf_counter()
+    result = work()
+    timings[name] = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history analytics")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--points", type=int, default=200)
+    args = parser.parse_args()
+
+    tasks, rewards = synthetic_history(args.rows)
+    timings = {}
+    history = timed(
+        timings, "load arrays", lambda: HistoryArrays.from_rows(tasks, rewards)
+    )
+    days, rate = timed(
+        timings, "rolling 7-day rate", lambda: history.rolling_completion_rate(7)
+    )
+    timed(timings, "weekday/hour heatmap", history.weekday_hour_heatmap)
+    times, balance = timed(
+        timings, "medal balance", lambda: history.medal_balance(MEDALS_PER_TASK)
+    )
+    timed(
+        timings,
+        "lttb balance",
+        lambda: chart_series(times, balance, args.points),
+    )
+    timed(timings, "python baseline", lambda: python_baseline(tasks))
+
+    print(f"== analytics ({len(tasks)} tasks, {len(rewards)} rewards)")
+    for name, seconds in timings.items():
+        print(f"  {name:<24} {seconds * 1000:9.1f} ms")
+    print(f"  chart points: {len(balance)} -> {min(len(balance), args.points)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compares the repository backends on the same workload.
+
+    python benchmarks/bench_backends.py --rows 2000
+    SUPABASE_URL=... SUPABASE_ANON_KEY=... BENCH_ACCESS_TOKEN=... \
+        python benchmarks/bench_backends.py --backends http
+
+Without Supabase credentials the http backend runs against the local
+stand-in server.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from repository import (
+    HttpBackend,
+    MetricsRecorder,
+    Repository,
+    SQLiteBackend,
+)  # noqa: E402
+from stand_in_server import serve  # noqa: E402
+
+
+def run_workload(repository, rows):
+    timings = {}
+    started = time.perf_counter()
+    for i in range(rows):
+        repository.insert(
+            "tasks",
+            {
+                "task": f"Task {i}",
+                "done": False,
+                "due_date": f"2026-11-{i % 28 + 1:02d}",
+            },
+        )
+    timings["insert"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(20):
+        repository.select("tasks", {"select": "*"}, use_cache=False)
+    timings["select_all x20"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(20):
+        repository.select("tasks", {"select": "*"})
+    timings["select_all cached x20"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    repository.rpc(
+        "get_due_task_counts", {"start_date": "2026-11-01", "end_date": "2026-11-07"}
+    )
+    timings["due_counts rpc"] = time.perf_counter() - started
+    return timings
+
+
+def build(kind, server_port):
+    if kind == "sqlite":
+        return Repository(SQLiteBackend(":memory:"))
+    base_url = os.environ.get("SUPABASE_URL") or f"http://127.0.0.1:{server_port}"
+    backend = HttpBackend(base_url, os.environ.get("SUPABASE_ANON_KEY", "local"))
+    backend.set_auth(os.environ.get("BENCH_ACCESS_TOKEN", "local"))
+    return Repository(backend)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark repository backends")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--backends", default="sqlite,http")
+    args = parser.parse_args()
+
+    server = serve(port=0, background=True)
+    try:
+        for kind in args.backends.split(","):
+            repository = build(kind, server.server_port)
+            metrics = MetricsRecorder()
+            repository.add_metrics_hook(metrics)
+            print(f"== {kind} ({args.rows} rows)")
+            for name, seconds in run_workload(repository, args.rows).items():
+                print(f"  {name:<24} {seconds * 1000:9.1f} ms")
+            errors = sum(entry["errors"] for entry in metrics.snapshot().values())
+            print(f"  errors: {errors}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compares the JSON codecs on PostgREST-shaped response bodies.
+
+    python benchmarks/bench_codecs.py --rows 20000
+
+For each codec: decode the body, decode it into records, and encode a
+bulk-insert payload. Codecs whose library is not installed are skipped.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from json_codec import StdlibCodec, available_codecs  # noqa: E402
+from records import Task, TaskHistoryEntry  # noqa: E402
+
+USER_ID = "4f6c2d1e-0000-4000-8000-000000000000"
+
+
+def task_rows(rows):
+    return [
+        {
+            "id": i,
+            "task": f"Task {i}: water the plants and then write the weekly report",
+            "done": False,
+            "due_date": f"2026-11-{i % 28 + 1:02d}",
+            "username": "bench",
+            "user_id": USER_ID,
+            "updated_at": "2026-10-01T09:00:00.123456+00:00",
+        }
+        for i in range(rows)
+    ]
+
+
+def history_rows(rows):
+    start = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    return [
+        {
+            "id": i,
+            "description": f"Task {i} – done ✓",
+            "timestamp": (start + datetime.timedelta(minutes=7 * i)).isoformat(),
+            "username": "bench",
+            "user_id": USER_ID,
+        }
+        for i in range(rows)
+    ]
+
+
+def best_of(work, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        work()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON codecs")
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    payloads = {
+        "tasks": (StdlibCodec.dumps(task_rows(args.rows)), Task),
+        "task_history": (StdlibCodec.dumps(history_rows(args.rows)), TaskHistoryEntry),
+    }
+    insert_body = task_rows(min(args.rows, 500))  # one import batch
+    for table, (body, record) in payloads.items():
+        print(f"== {table}: {args.rows} rows, {len(body) / 1024:.0f} KiB")
+        for codec in available_codecs():
+            decode = best_of(lambda: codec.loads(body))
+            records = best_of(lambda: record.from_rows(codec.loads(body)))
+            encode = best_of(lambda: codec.dumps(insert_body))
+            print(
+                f"  {codec.name:<8} decode {decode * 1000:7.1f} ms"
+                f"  to records {records * 1000:7.1f} ms"
+                f"  encode 500 {encode * 1000:6.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
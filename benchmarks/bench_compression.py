@@ -0,0 +1,85 @@
+"""Measures compressed vs uncompressed history downloads via the stand-in server.
+
+    python benchmarks/bench_compression.py --rows 5000 --mbps 2
+
+Fetches task_history through HttpBackend with server compression on and
+off, and reports bytes on the wire, decoded bytes and wall time. --mbps
+adds the transfer time that payload would take on a link of that speed
+(loopback itself is not bandwidth bound).
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from repository import HttpBackend, MetricsRecorder, Repository  # noqa: E402
+from stand_in_server import serve  # noqa: E402
+from urllib3.util.request import ACCEPT_ENCODING  # noqa: E402
+
+FETCHES = 10
+
+
+def seed_history(backend, rows):
+    start = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    batch = [
+        {
+            "description": f"Task {i}: water the plants",
+            "timestamp": (start + datetime.timedelta(minutes=11 * i)).isoformat(),
+            "username": "bench",
+        }
+        for i in range(rows)
+    ]
+    backend.insert("task_history", batch)
+
+
+def run(rows, compress):
+    server = serve(port=0, background=True, compress=compress)
+    try:
+        seed_history(server.RequestHandlerClass.backend, rows)
+        backend = HttpBackend(f"http://127.0.0.1:{server.server_port}", "local")
+        backend.set_auth("local")
+        repository = Repository(backend)
+        metrics = MetricsRecorder()
+        repository.add_metrics_hook(metrics)
+        started = time.perf_counter()
+        for _ in range(FETCHES):
+            repository.select(
+                "task_history",
+                {"select": "*", "order": "timestamp.desc"},
+                use_cache=False,
+            )
+        elapsed = (time.perf_counter() - started) / FETCHES
+        entry = metrics.snapshot()[("select", "task_history")]
+        return (
+            entry["wire_bytes"] / FETCHES,
+            entry["body_bytes"] / FETCHES,
+            elapsed,
+        )
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response compression")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--mbps", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"== task_history, {args.rows} rows (Accept-Encoding: {ACCEPT_ENCODING})")
+    for label, compress in (("uncompressed", False), ("compressed", True)):
+        wire, body, elapsed = run(args.rows, compress)
+        link = wire * 8 / (args.mbps * 1_000_000)
+        print(
+            f"  {label:<13} wire {wire / 1024:8.1f} KiB  body {body / 1024:8.1f} KiB"
+            f"  local {elapsed * 1000:7.1f} ms  +{link * 1000:7.1f} ms at {args.mbps:g} Mbit/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
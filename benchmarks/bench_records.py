@@ -0,0 +1,80 @@
+"""Compares row dicts with the slotted record types in records.py.
+
+    python benchmarks/bench_records.py --rows 100000
+
+Reports memory held per row (tracemalloc) and the cost of reading the
+fields a view row uses.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from records import Task  # noqa: E402
+
+
+def synthetic_body(rows):
+    # Shaped like a PostgREST select=* response body for the tasks table
+    return json.dumps(
+        [
+            {
+                "id": i,
+                "task": f"Task {i}",
+                "done": False,
+                "due_date": f"2026-11-{i % 28 + 1:02d}",
+                "username": "bench",
+                "user_id": "4f6c2d1e-0000-4000-8000-000000000000",
+                "created_at": "2026-10-01T09:00:00.000000+00:00",
+                "updated_at": "2026-10-01T09:00:00.000000+00:00",
+            }
+            for i in range(rows)
+        ]
+    )
+
+
+def retained_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return kept, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark record types")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    body = synthetic_body(args.rows)
+    print(f"== {args.rows} task rows")
+    # Memory kept alive after decoding the same response both ways
+    dicts, dict_bytes = retained_bytes(lambda: json.loads(body))
+    records, record_bytes = retained_bytes(lambda: Task.from_rows(json.loads(body)))
+    print(f"  dict rows      {dict_bytes / args.rows:8.0f} bytes/row")
+    print(f"  Task records   {record_bytes / args.rows:8.0f} bytes/row")
+
+    started = time.perf_counter()
+    Task.from_rows(dicts)
+    print(f"  decode         {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+    started = time.perf_counter()
+    for row in dicts:
+        row.get("id"), row.get("task", "Unnamed"), row.get("due_date")
+    print(f"  dict .get      {(time.perf_counter() - started) * 1000:8.1f} ms")
+    started = time.perf_counter()
+    for task in records:
+        task.id, task.task or "Unnamed", task.due_date
+    print(f"  attributes     {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
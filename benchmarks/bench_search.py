@@ -0,0 +1,72 @@
+"""Times the in-memory search index on synthetic task history.
+
+    python benchmarks/bench_search.py --rows 100000
+
+Reports the index build time and per-query latency for exact, prefix,
+typo (trigram), multi-word and very common words.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from records import TaskHistoryEntry  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+
+VERBS = "water write call buy clean read fix walk cook plan review email pay".split()
+NOUNS = (
+    "plants report mom groceries kitchen chapter bike dog dinner trip budget "
+    "invoice dentist flights spanish garage taxes resume slides backlog"
+).split()
+QUERIES = ["dentist", "dent", "dentst", "water plants", "invoce pay", "the", "zzz"]
+
+
+def synthetic_history(rows, seed=1):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "description": f"{rng.choice(VERBS)} the {rng.choice(NOUNS)} "
+            f"{rng.choice(NOUNS)} #{rng.randrange(5000)}",
+            "timestamp": f"2026-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}"
+            f"T{rng.randrange(24):02d}:00:00+00:00",
+        }
+        for i in range(rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the search index")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    entries = TaskHistoryEntry.from_rows(synthetic_history(args.rows))
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.replace_kind("task_history", entries, "description", "timestamp")
+    print(f"== {args.rows} history entries")
+    print(
+        f"  build                    {(time.perf_counter() - started) * 1000:9.1f} ms"
+    )
+    started = time.perf_counter()
+    index.replace_kind("task_history", entries, "description", "timestamp")
+    print(
+        f"  resync (no changes)      {(time.perf_counter() - started) * 1000:9.1f} ms"
+    )
+    for query in QUERIES:
+        started = time.perf_counter()
+        for _ in range(20):
+            hits = index.search(query, args.limit)
+        elapsed = (time.perf_counter() - started) / 20
+        print(f"  {query!r:<24} {elapsed * 1000:9.2f} ms  {len(hits)} hits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compares history timestamp formatting: arrow per row vs timestamps.py.
+
+    python benchmarks/bench_timestamps.py --rows 50000
+
+Rows are spread over --days days, so how often the per-minute memo hits
+depends on how dense the history is.
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+import arrow  # noqa: E402
+from timestamps import format_timestamp  # noqa: E402
+
+
+def synthetic_timestamps(rows, days, seed=1):
+    rng = random.Random(seed)
+    start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    return [
+        (start + datetime.timedelta(seconds=rng.randrange(days * 86400))).isoformat(
+            timespec="microseconds"
+        )
+        for _ in range(rows)
+    ]
+
+
+def with_arrow(values):
+    out = []
+    for value in values:
+        try:
+            out.append(arrow.get(value).format("YYYY-MM-DD HH:mm"))
+        except (arrow.parser.ParserError, TypeError):
+            out.append("Invalid Date")
+    return out
+
+
+def with_fast_path(values):
+    return [format_timestamp(value) or "Invalid Date" for value in values]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark timestamp formatting")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    values = synthetic_timestamps(args.rows, args.days)
+    print(f"== {args.rows} timestamps over {args.days} days")
+    results = {}
+    for name, work in (("arrow", with_arrow), ("fast path", with_fast_path)):
+        started = time.perf_counter()
+        results[name] = work(values)
+        seconds = time.perf_counter() - started
+        print(f"  {name:<24} {seconds * 1000:9.1f} ms")
+    print(f"  outputs match: {results['arrow'] == results['fast path']}")
+
+
+if __name__ == "__main__":
+    main()
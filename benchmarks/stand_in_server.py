@@ -0,0 +1,148 @@
+"""Local stand-in for the Supabase REST API, backed by repository.SQLiteBackend.
+
+Serves the subset of PostgREST the app uses (/rest/v1/<table> and
+/rest/v1/rpc/<function>) so HttpBackend can be exercised and benchmarked
+without a Supabase project:
+
+    python benchmarks/stand_in_server.py --port 54321 --db bench.db
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_ANON_KEY=local flet run
+
+Like the Supabase gateway, responses over MIN_COMPRESS_BYTES are compressed
+when the client accepts it (br if a brotli package is installed, else gzip).
+Pass --no-compress to compare.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from repository import BackendError, SQLiteBackend  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024  # smaller bodies are not worth the CPU
+
+
+def _compressors():
+    compressors = {"gzip": lambda data: gzip.compress(data, compresslevel=6)}
+    if brotli:
+        compressors["br"] = lambda data: brotli.compress(data, quality=5)
+    return compressors
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    backend: SQLiteBackend = None  # set by serve()
+    compress = True
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def _encoding(self, size):
+        if not self.compress or size < MIN_COMPRESS_BYTES:
+            return None
+        accepted = [
+            part.split(";")[0].strip()
+            for part in self.headers.get("Accept-Encoding", "").split(",")
+        ]
+        compressors = _compressors()
+        for name in ("br", "gzip"):
+            if name in accepted and name in compressors:
+                return name
+        return None
+
+    def _send(self, status, body=None):
+        payload = b"" if body is None else json.dumps(body).encode()
+        encoding = self._encoding(len(payload))
+        if encoding:
+            payload = _compressors()[encoding](payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _dispatch(self, method):
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query))
+        path = parts.path
+        try:
+            if path.startswith("/rest/v1/rpc/"):
+                self._send(
+                    200,
+                    self.backend.rpc(path[len("/rest/v1/rpc/") :], self._read_json()),
+                )
+            elif path.startswith("/rest/v1/"):
+                table = path[len("/rest/v1/") :]
+                if method == "GET":
+                    self._send(200, self.backend.select(table, params))
+                elif method == "POST":
+                    self._send(201, self.backend.insert(table, self._read_json()))
+                elif method == "PATCH":
+                    self._send(
+                        200, self.backend.update(table, params, self._read_json())
+                    )
+                elif method == "DELETE":
+                    self.backend.delete(table, params)
+                    self._send(204)
+                else:
+                    self._send(405, {"message": f"{method} not supported"})
+            else:
+                self._send(404, {"message": f"Unknown path {path}"})
+        except BackendError as e:
+            self._send(e.status_code or 400, {"message": str(e)})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+def serve(port=54321, db_path=":memory:", background=False, compress=True):
+    """Starts the stand-in server. With background=True returns the server
+    (call .shutdown() when done) instead of blocking."""
+    handler = type(
+        "BoundStandInHandler",
+        (StandInHandler,),
+        {"backend": SQLiteBackend(db_path), "compress": compress},
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    print(f"Stand-in backend listening on http://127.0.0.1:{server.server_port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--db", default=":memory:")
+    parser.add_argument("--no-compress", action="store_true")
+    args = parser.parse_args()
+    serve(args.port, args.db, compress=not args.no_compress)
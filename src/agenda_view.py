@@ -0,0 +1,171 @@
+import calendar
+import datetime
+
+import flet as ft
+from todo_view import ToDoList
+from update_scheduler import get_update_scheduler
+
+WEEKDAY_LABELS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+AGENDA_LIMIT = 50  # How many upcoming tasks the agenda shows from the selected day
+
+
+def agenda_view(page: ft.Page, todo_list: ToDoList):
+    """Month grid plus agenda list, both read from todo_list.due_index."""
+    updates = get_update_scheduler(page)
+    today = datetime.date.today()
+    shown_month = [today.year, today.month]  # mutable so handlers can change it
+    selected_day = [today]
+
+    month_title = ft.Text("", style=ft.TextThemeStyle.TITLE_MEDIUM)
+    month_grid = ft.Column(spacing=4)
+    agenda_title = ft.Text("", style=ft.TextThemeStyle.HEADLINE_SMALL)
+    agenda_list = ft.ListView(expand=True, spacing=5)
+
+    if todo_list and not todo_list.due_index.loaded:
+        todo_list.get_all_tasks()  # Populates the index once
+
+    def build_day_cell(day, count):
+        is_selected = day == selected_day[0]
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text(
+                        str(day.day),
+                        weight="bold",
+                        color=ft.Colors.RED_200 if day == today else None,
+                    ),
+                    ft.Text(
+                        f"{count}" if count else "",
+                        size=11,
+                        color=ft.Colors.ORANGE_300,
+                    ),
+                ],
+                spacing=0,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            ),
+            expand=True,
+            height=50,
+            border=ft.border.all(
+                2 if is_selected else 1,
+                ft.Colors.BLUE_200 if is_selected else ft.Colors.GREY,
+            ),
+            border_radius=ft.border_radius.all(5),
+            on_click=lambda _, d=day: select_day(d),
+        )
+
+    def refresh_month():
+        year, month = shown_month
+        month_title.value = datetime.date(year, month, 1).strftime("%B %Y")
+        weeks = calendar.Calendar().monthdatescalendar(year, month)
+        counts = (
+            todo_list.due_index.counts_between(weeks[0][0], weeks[-1][-1])
+            if todo_list
+            else {}
+        )
+        month_grid.controls = [
+            ft.Row(
+                [
+                    ft.Container(ft.Text(label, size=12), expand=True)
+                    for label in WEEKDAY_LABELS
+                ]
+            )
+        ]
+        for week in weeks:
+            month_grid.controls.append(
+                ft.Row(
+                    [
+                        (
+                            build_day_cell(day, counts.get(day.isoformat(), 0))
+                            if day.month == month
+                            else ft.Container(expand=True, height=50)
+                        )
+                        for day in week
+                    ]
+                )
+            )
+
+    def refresh_agenda():
+        agenda_list.controls.clear()
+        agenda_title.value = f"Agenda from {selected_day[0].isoformat()}"
+        if not todo_list:
+            agenda_list.controls.append(ft.Text("Error: Not logged in."))
+            return
+        tasks = todo_list.due_index.upcoming(selected_day[0], limit=AGENDA_LIMIT)
+        if not tasks:
+            agenda_list.controls.append(ft.Text("Nothing scheduled."))
+            return
+        for task in tasks:
+            agenda_list.controls.append(
+                ft.Text(f"{task.due_date} - {task.task or 'Unnamed'}")
+            )
+
+    def select_day(day):
+        selected_day[0] = day
+        refresh_month()
+        refresh_agenda()
+        updates.request()
+
+    def shift_month(delta):
+        year, month = shown_month
+        month += delta
+        if month < 1:
+            year, month = year - 1, 12
+        elif month > 12:
+            year, month = year + 1, 1
+        shown_month[:] = [year, month]
+        refresh_month()
+        updates.request()
+
+    def jump_to_today(_):
+        shown_month[:] = [today.year, today.month]
+        select_day(today)
+
+    refresh_month()
+    refresh_agenda()
+
+    return ft.View(
+        "/calendar",
+        [
+            ft.AppBar(
+                title=ft.Text("Calendar"),
+                leading=ft.IconButton(
+                    icon=ft.icons.ARROW_BACK,
+                    tooltip="Back to Tasks",
+                    on_click=lambda _: page.go("/"),
+                ),
+                actions=[
+                    ft.IconButton(
+                        ft.icons.TODAY, tooltip="Today", on_click=jump_to_today
+                    ),
+                ],
+            ),
+            ft.Column(
+                [
+                    ft.Row(
+                        [
+                            ft.IconButton(
+                                ft.icons.CHEVRON_LEFT,
+                                tooltip="Previous month",
+                                on_click=lambda _: shift_month(-1),
+                            ),
+                            month_title,
+                            ft.IconButton(
+                                ft.icons.CHEVRON_RIGHT,
+                                tooltip="Next month",
+                                on_click=lambda _: shift_month(1),
+                            ),
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                    ),
+                    month_grid,
+                    ft.Divider(height=20),
+                    agenda_title,
+                    agenda_list,
+                ],
+                expand=True,
+                scroll=ft.ScrollMode.ADAPTIVE,
+            ),
+            # bottom_appbar should be added by main.py's route_change
+        ],
+        padding=10,
+    )
@@ -0,0 +1,156 @@
+import numpy as np
+
+from history_export import HISTORY_TABLES, iter_history
+
+DEFAULT_CHART_POINTS = 200  # points per series sent to a Flet chart
+_UTC_SUFFIXES = ("", "Z", "+00:00", "+0000")
+
+
+def to_datetime64(timestamps):
+    """Parses ISO-8601 strings into a datetime64[s] array (UTC).
+
+    The common shape ('YYYY-MM-DDTHH:MM:SS[.ffffff][+00:00|Z]') is parsed by
+    NumPy in one call. Only values with a non-UTC offset are corrected in
+    Python; unparseable values become NaT."""
+    values = [str(t) if t else "" for t in timestamps]
+    heads = np.array([v[:19] for v in values], dtype="U19")
+    result = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[s]")
+    if not len(values):
+        return result
+    ok = np.char.str_len(heads) >= 10
+    try:
+        result[ok] = heads[ok].astype("datetime64[s]")
+    except ValueError:
+        # A malformed value poisons the bulk cast: fall back per element
+        for i in np.flatnonzero(ok):
+            try:
+                result[i] = np.datetime64(heads[i], "s")
+            except ValueError:
+                pass
+    strings = np.array(values)
+    utc = (
+        np.char.endswith(strings, "+00:00")
+        | np.char.endswith(strings, "Z")
+        | (np.char.str_len(strings) <= 19)
+    )
+    for i in np.flatnonzero(~utc):
+        value = values[i]
+        tail = value[19:]
+        if tail.startswith("."):
+            tail = tail.lstrip(".0123456789")
+        if tail not in _UTC_SUFFIXES and len(tail) == 6 and tail[0] in "+-":
+            sign = 1 if tail[0] == "+" else -1
+            offset = np.timedelta64(int(tail[1:3]) * 60 + int(tail[4:6]), "m")
+            result[i] = result[i] - sign * offset
+    return result
+
+
+class HistoryArrays:
+    """Task and reward history as sorted columnar arrays."""
+
+    def __init__(self, task_times, reward_times, reward_costs):
+        order = np.argsort(reward_times)
+        self.task_times = np.sort(task_times[~np.isnat(task_times)])
+        valid = ~np.isnat(reward_times[order])
+        self.reward_times = reward_times[order][valid]
+        self.reward_costs = reward_costs[order][valid].astype(np.int64)
+
+    @classmethod
+    def from_rows(cls, task_rows, reward_rows):
+        task_rows = list(task_rows)
+        reward_rows = list(reward_rows)
+        return cls(
+            to_datetime64([r.get("timestamp") for r in task_rows]),
+            to_datetime64([r.get("timestamp") for r in reward_rows]),
+            np.array([int(r.get("cost") or 0) for r in reward_rows], dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, repository):
+        """Streams both history tables (keyset pages) into arrays."""
+        task_table, reward_table = HISTORY_TABLES
+        return cls.from_rows(
+            (row for _, row in iter_history(repository, tables=[task_table])),
+            (row for _, row in iter_history(repository, tables=[reward_table])),
+        )
+
+    # --- Analytics (all vectorized) ---
+
+    def daily_completions(self):
+        """(days datetime64[D], counts) covering first to last completion."""
+        if not len(self.task_times):
+            return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64)
+        days = self.task_times.astype("datetime64[D]")
+        start = days[0]
+        offsets = (days - start).astype(np.int64)
+        counts = np.bincount(offsets)
+        return start + np.arange(len(counts)), counts
+
+    def rolling_completion_rate(self, window=7):
+        """Average completions per day over a trailing `window`-day window."""
+        days, counts = self.daily_completions()
+        if not len(counts):
+            return days, counts.astype(float)
+        cumulative = np.concatenate(([0], np.cumsum(counts)))
+        index = np.arange(1, len(counts) + 1)
+        lower = np.maximum(index - window, 0)
+        sums = cumulative[index] - cumulative[lower]
+        return days, sums / np.minimum(index, window)
+
+    def weekday_hour_heatmap(self):
+        """7x24 completion counts; rows are Monday..Sunday, columns UTC hours."""
+        if not len(self.task_times):
+            return np.zeros((7, 24), dtype=np.int64)
+        seconds = self.task_times.astype(np.int64)
+        days = seconds // 86400
+        hours = (seconds % 86400) // 3600
+        weekdays = (days + 3) % 7  # 1970-01-01 was a Thursday
+        return np.bincount(weekdays * 24 + hours, minlength=168).reshape(7, 24)
+
+    def medal_balance(self, medals_per_task):
+        """(times, balance): medals earned minus spent, after every event."""
+        times = np.concatenate((self.task_times, self.reward_times))
+        deltas = np.concatenate(
+            (
+                np.full(len(self.task_times), medals_per_task, dtype=np.int64),
+                -self.reward_costs,
+            )
+        )
+        order = np.argsort(times, kind="stable")
+        return times[order], np.cumsum(deltas[order])
+
+
+def lttb(x, y, threshold=DEFAULT_CHART_POINTS):
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points plus, per bucket, the point forming the
+    largest triangle with the previous kept point and the next bucket's mean.
+    This preserves the visual shape (peaks, dips) of long series."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y[next_start:next_end].mean()
+        px, py = x[previous], y[previous]
+        areas = np.abs(
+            (px - mean_x) * (y[start:end] - py) - (px - x[start:end]) * (mean_y - py)
+        )
+        previous = start + int(np.argmax(areas))
+        keep[bucket + 1] = previous
+    return x[keep], y[keep]
+
+
+def chart_series(times, values, points=DEFAULT_CHART_POINTS):
+    """Downsamples a datetime64 series to at most `points` (epoch seconds, value)."""
+    x = np.asarray(times, dtype="datetime64[s]").astype(np.int64)
+    return lttb(x, values, points)
@@ -1,29 +1,112 @@
+import datetime
+from functools import lru_cache
+
 import flet as ft
-import arrow
+from timestamps import day_name
+
 
-def build_calendar(page: ft.Page):
-    today  = arrow.now()
+@lru_cache(maxsize=8)
+def _week_days(iso_year, iso_week):
+    """Returns (date, day_name, day_number) for the 7 days of an ISO week.
+    Cached so the labels are only built once per week."""
+    monday = datetime.date.fromisocalendar(iso_year, iso_week, 1)
     days = []
     for i in range(7):
-        date = today.shift(days=-today.weekday()+i)
-        day_name = date.format('dddd') # this is the day name. e.g. Sunday
-        day_number = date.format('DD') # this id the day's number. e.g. 15
-        is_today = date == today
+        date = monday + datetime.timedelta(days=i)
         days.append(
-            ft.Container(
-                content=ft.Column(
-                    [
-                        ft.Text(day_name, size=12, weight="bold", ),
-                        ft.Text(day_number, size=24, weight="bold", color=ft.Colors.RED_200 if is_today else ft.Colors.BLUE_200),
-                    ],
-                    alignment=ft.MainAxisAlignment.CENTER,
-                    
-                ),
-                expand=True,
-                height = 100,
-                border = ft.border.all(1, ft.Colors.GREY),
-                border_radius = ft.border_radius.all(5),
-                padding=10,
+            (
+                date,
+                day_name(date),  # this is the day name. e.g. Sunday
+                f"{date.day:02d}",  # this id the day's number. e.g. 15
+            )
+        )
+    return tuple(days)
+
+
+def _count_label(count):
+    return f"{count} due" if count else ""
+
+
+class WeekCalendar:
+    """7-day strip built once per ISO week. On later builds it only moves the
+    "today" highlight and patches the due-task counts."""
+
+    def __init__(self):
+        self.week_key = None
+        self.today = None
+        self.row = None
+        self._day_dates = []
+        self._number_texts = []
+        self._count_texts = []
+
+    def week_range(self):
+        """Returns (first_day, last_day) of the current week as datetime.date."""
+        today = datetime.date.today()
+        days = _week_days(*today.isocalendar()[:2])
+        return days[0][0], days[-1][0]
+
+    def build(self, due_counts=None):
+        """Returns the calendar row, rebuilding controls only when the week changed."""
+        today = datetime.date.today()
+        week_key = today.isocalendar()[:2]
+        if self.row is None or week_key != self.week_key:
+            self._build_week(week_key, today)
+        elif today != self.today:
+            self._set_today(today)
+        if due_counts is not None:
+            self.set_due_counts(due_counts)
+        return self.row
+
+    def set_due_counts(self, due_counts):
+        """Patches the per-day task counts. due_counts maps 'YYYY-MM-DD' -> int."""
+        for date, count_text in zip(self._day_dates, self._count_texts):
+            count_text.value = _count_label(due_counts.get(date.isoformat(), 0))
+
+    def _build_week(self, week_key, today):
+        self.week_key = week_key
+        self.today = today
+        self._day_dates = []
+        self._number_texts = []
+        self._count_texts = []
+        days = []
+        for date, day_name, day_number in _week_days(*week_key):
+            number_text = ft.Text(
+                day_number,
+                size=24,
+                weight="bold",
+                color=ft.Colors.RED_200 if date == today else ft.Colors.BLUE_200,
             )
+            count_text = ft.Text("", size=11, color=ft.Colors.ORANGE_300)
+            self._day_dates.append(date)
+            self._number_texts.append(number_text)
+            self._count_texts.append(count_text)
+            days.append(
+                ft.Container(
+                    content=ft.Column(
+                        [
+                            ft.Text(day_name, size=12, weight="bold", ),
+                            number_text,
+                            count_text,
+                        ],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                    ),
+                    expand=True,
+                    height = 100,
+                    border = ft.border.all(1, ft.Colors.GREY),
+                    border_radius = ft.border_radius.all(5),
+                    padding=10,
+                )
             )
-    return ft.Row(days, alignment=ft.MainAxisAlignment.SPACE_EVENLY, expand=True)
+        self.row = ft.Row(days, alignment=ft.MainAxisAlignment.SPACE_EVENLY, expand=True)
+
+    def _set_today(self, today):
+        self.today = today
+        for date, number_text in zip(self._day_dates, self._number_texts):
+            number_text.color = (
+                ft.Colors.RED_200 if date == today else ft.Colors.BLUE_200
+            )
+
+
+def build_calendar(page: ft.Page, due_counts=None):
+    """Builds a standalone week strip (kept for callers without a WeekCalendar)."""
+    return WeekCalendar().build(due_counts)
@@ -1,76 +1,247 @@
 import json
 import os
+import sys
+import threading
 
 CONFIG_FILE = "config.json"
-SUPABASE_URL = None
-SUPABASE_ANON_KEY = None
-CONFIG_ERROR = None
-
-# Determine the base path (works for both script execution and frozen executables/APKs)
-# Flet apps often run from a temporary directory when packaged, so finding config.json
-# relative to the script location might be needed.
-try:
-    # If running as a script
-    base_path = os.path.dirname(os.path.abspath(__file__))
-except NameError:
-    # If frozen (e.g., PyInstaller, maybe Flet build)
-    import sys
-
-    base_path = os.path.dirname(sys.executable)  # Or sys._MEIPASS for PyInstaller
-
-config_path = os.path.join(base_path, CONFIG_FILE)
-print(f"Attempting to load configuration from: {config_path}")
-
-try:
-    with open(config_path, "r") as f:
-        config_data = json.load(f)
-
-    SUPABASE_URL = config_data.get("SUPABASE_URL")
+
+# Environment variables that override config.json (handy for tests, benchmarks
+# and pointing the app at a local stand-in backend without editing files).
+ENV_CONFIG_PATH = "REWARD_YOURSELF_CONFIG"
+ENV_SUPABASE_URL = "SUPABASE_URL"
+ENV_SUPABASE_ANON_KEY = "SUPABASE_ANON_KEY"
+ENV_SUPABASE_KEY = "SUPABASE_KEY"
+ENV_SUPABASE_SERVICE_ROLE_KEY = "SUPABASE_SERVICE_ROLE_KEY"
+ENV_DATA_BACKEND = "REWARD_YOURSELF_BACKEND"  # http | supabase | sqlite
+ENV_SQLITE_PATH = "REWARD_YOURSELF_SQLITE_PATH"
+ENV_PREFETCH = "REWARD_YOURSELF_PREFETCH"  # on | off
+ENV_METERED = "REWARD_YOURSELF_METERED"  # 1 on metered/cellular connections
+ENV_PREFETCH_BUDGET_KB = "REWARD_YOURSELF_PREFETCH_BUDGET_KB"
+ENV_DELTA_SYNC = (
+    "REWARD_YOURSELF_DELTA_SYNC"  # 1 once the delta sync migration is applied
+)
+ENV_JSON_CODEC = "REWARD_YOURSELF_JSON_CODEC"  # auto | orjson | json
+
+DATA_BACKENDS = ("http", "supabase", "sqlite")
+DEFAULT_DATA_BACKEND = "http"
+DEFAULT_SQLITE_PATH = "todos.db"
+DEFAULT_PREFETCH_BUDGET_KB = 256  # per session
+JSON_CODECS = ("auto", "orjson", "json")  # see json_codec.py
+
+
+class AppConfig:
+    """Validated configuration values. Built once and shared via get_config()."""
+
+    def __init__(
+        self,
+        supabase_url=None,
+        supabase_anon_key=None,
+        supabase_service_role_key=None,
+        config_path=None,
+        error=None,
+        data_backend=DEFAULT_DATA_BACKEND,
+        sqlite_path=DEFAULT_SQLITE_PATH,
+        prefetch_enabled=True,
+        metered_connection=False,
+        prefetch_budget_kb=DEFAULT_PREFETCH_BUDGET_KB,
+        delta_sync=False,
+        json_codec="auto",
+    ):
+        self.supabase_url = supabase_url
+        self.supabase_anon_key = supabase_anon_key
+        self.supabase_service_role_key = supabase_service_role_key
+        self.config_path = config_path
+        self.error = error
+        self.data_backend = data_backend
+        self.sqlite_path = sqlite_path
+        self.prefetch_enabled = prefetch_enabled
+        self.metered_connection = metered_connection
+        self.prefetch_budget_kb = prefetch_budget_kb
+        self.delta_sync = delta_sync
+        self.json_codec = json_codec
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def _base_path():
+    """Determine the base path (works for both script execution and frozen executables/APKs).
+    Flet apps often run from a temporary directory when packaged, so finding config.json
+    relative to the script location might be needed."""
+    try:
+        # If running as a script
+        return os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        # If frozen (e.g., PyInstaller, maybe Flet build)
+        return os.path.dirname(sys.executable)  # Or sys._MEIPASS for PyInstaller
+
+
+def _flag(value, default):
+    """Reads a boolean from the environment/config ('1', 'true', 'on', ...)."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _load_config():
+    config_path = os.environ.get(ENV_CONFIG_PATH) or os.path.join(
+        _base_path(), CONFIG_FILE
+    )
+    print(f"Attempting to load configuration from: {config_path}")
+    config_data = {}
+    file_error = None
+    try:
+        with open(config_path, "r") as f:
+            config_data = json.load(f)
+    except FileNotFoundError:
+        file_error = f"Configuration file '{config_path}' not found. Ensure '{CONFIG_FILE}' exists and is included in the build."
+    except json.JSONDecodeError:
+        file_error = (
+            f"Error decoding JSON from '{config_path}'. Please check its format."
+        )
+    except Exception as e:
+        file_error = f"An unexpected error occurred loading configuration: {e}"
+
+    # Environment wins over the file
+    supabase_url = os.environ.get(ENV_SUPABASE_URL) or config_data.get("SUPABASE_URL")
     # Prioritize SUPABASE_ANON_KEY, but fall back to SUPABASE_KEY if only that exists
-    SUPABASE_ANON_KEY = config_data.get(
-        "SUPABASE_ANON_KEY", config_data.get("SUPABASE_KEY")
+    supabase_anon_key = (
+        os.environ.get(ENV_SUPABASE_ANON_KEY)
+        or os.environ.get(ENV_SUPABASE_KEY)
+        or config_data.get("SUPABASE_ANON_KEY", config_data.get("SUPABASE_KEY"))
+    )
+    service_role_key = os.environ.get(ENV_SUPABASE_SERVICE_ROLE_KEY) or config_data.get(
+        "SUPABASE_SERVICE_ROLE_KEY"
     )
 
-    if not SUPABASE_URL:
-        CONFIG_ERROR = f"SUPABASE_URL not found or empty in {config_path}"
-    if not SUPABASE_ANON_KEY:
-        CONFIG_ERROR = (
+    data_backend = (
+        os.environ.get(ENV_DATA_BACKEND)
+        or config_data.get("DATA_BACKEND")
+        or DEFAULT_DATA_BACKEND
+    ).lower()
+    sqlite_path = (
+        os.environ.get(ENV_SQLITE_PATH)
+        or config_data.get("SQLITE_PATH")
+        or DEFAULT_SQLITE_PATH
+    )
+    prefetch_enabled = _flag(
+        os.environ.get(ENV_PREFETCH, config_data.get("PREFETCH")), True
+    )
+    metered_connection = _flag(
+        os.environ.get(ENV_METERED, config_data.get("METERED_CONNECTION")), False
+    )
+    try:
+        prefetch_budget_kb = int(
+            os.environ.get(ENV_PREFETCH_BUDGET_KB)
+            or config_data.get("PREFETCH_BUDGET_KB")
+            or DEFAULT_PREFETCH_BUDGET_KB
+        )
+    except ValueError:
+        prefetch_budget_kb = DEFAULT_PREFETCH_BUDGET_KB
+    delta_sync = _flag(
+        os.environ.get(ENV_DELTA_SYNC, config_data.get("DELTA_SYNC")), False
+    )
+    json_codec = (
+        os.environ.get(ENV_JSON_CODEC) or config_data.get("JSON_CODEC") or "auto"
+    ).lower()
+    if json_codec not in JSON_CODECS:
+        print(f"Unknown JSON codec '{json_codec}', using auto.")
+        json_codec = "auto"
+
+    error = None
+    if data_backend not in DATA_BACKENDS:
+        error = f"Unknown data backend '{data_backend}'. Use one of: {', '.join(DATA_BACKENDS)}"
+    elif not supabase_url:
+        error = file_error or f"SUPABASE_URL not found or empty in {config_path}"
+    elif not supabase_anon_key:
+        error = file_error or (
             f"SUPABASE_ANON_KEY (or SUPABASE_KEY) not found or empty in {config_path}"
         )
+    # A missing file is fine when the environment supplies everything.
+
+    return AppConfig(
+        supabase_url=supabase_url.rstrip("/") if supabase_url else None,
+        supabase_anon_key=supabase_anon_key,
+        supabase_service_role_key=service_role_key,
+        config_path=config_path,
+        error=error,
+        data_backend=data_backend,
+        sqlite_path=sqlite_path,
+        prefetch_enabled=prefetch_enabled,
+        metered_connection=metered_connection,
+        prefetch_budget_kb=prefetch_budget_kb,
+        delta_sync=delta_sync,
+        json_codec=json_codec,
+    )
 
-except FileNotFoundError:
-    CONFIG_ERROR = f"Configuration file '{config_path}' not found. Ensure '{CONFIG_FILE}' exists and is included in the build."
-except json.JSONDecodeError:
-    CONFIG_ERROR = f"Error decoding JSON from '{config_path}'. Please check its format."
-except Exception as e:
-    CONFIG_ERROR = f"An unexpected error occurred loading configuration: {e}"
 
-# Print error prominently if loading failed
-if CONFIG_ERROR:
-    print(f"####################################################")
-    print(f"### Configuration Error: {CONFIG_ERROR} ###")
-    print(f"####################################################")
-    # You might want to raise an exception here if the app cannot run without config
-    # raise RuntimeError(CONFIG_ERROR)
+def get_config() -> AppConfig:
+    """Returns the shared configuration, loading and validating it on first use."""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                config = _load_config()
+                if config.error:
+                    # Print error prominently if loading failed
+                    print(f"####################################################")
+                    print(f"### Configuration Error: {config.error} ###")
+                    print(f"####################################################")
+                _config = config
+    return _config
+
+
+def reset_config():
+    """Drops the cached configuration so the next get_config() reloads it.
+    Meant for tests and benchmarks that change environment overrides."""
+    global _config
+    with _config_lock:
+        _config = None
+
+
+def get_config_error():
+    """Returns the configuration error message, or None if the config is valid."""
+    return get_config().error
 
 
 def get_supabase_url():
     """Returns the loaded Supabase URL."""
-    if CONFIG_ERROR:
+    config = get_config()
+    if config.error:
         print(
-            f"Warning: Returning potentially None URL due to config error: {CONFIG_ERROR}"
+            f"Warning: Returning potentially None URL due to config error: {config.error}"
         )
-    return SUPABASE_URL
+    return config.supabase_url
 
 
 def get_supabase_anon_key():
     """Returns the loaded Supabase Anon Key."""
-    if CONFIG_ERROR:
+    config = get_config()
+    if config.error:
         print(
-            f"Warning: Returning potentially None Anon Key due to config error: {CONFIG_ERROR}"
+            f"Warning: Returning potentially None Anon Key due to config error: {config.error}"
         )
-    return SUPABASE_ANON_KEY
+    return config.supabase_anon_key
 
 
-# You can also import the variables directly if preferred:
+def get_supabase_service_role_key():
+    """Returns the Supabase service role key, if one is configured."""
+    return get_config().supabase_service_role_key
+
+
+# Old module-level names still resolve, but lazily (no import-time I/O):
 # from config_loader import SUPABASE_URL, SUPABASE_ANON_KEY, CONFIG_ERROR
+_LAZY_ATTRIBUTES = {
+    "SUPABASE_URL": "supabase_url",
+    "SUPABASE_ANON_KEY": "supabase_anon_key",
+    "CONFIG_ERROR": "error",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(get_config(), _LAZY_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
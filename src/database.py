@@ -4,31 +4,18 @@ import json
 from supabase import create_client, Client  # Changed import
 from supabase.lib.client_options import ClientOptions
 import requests  # Import requests for potential future use if needed directly
-
-# Load configuration from config.json (Keep this part)
-try:
-    with open("config.json", "r") as config_file:
-        config = json.load(config_file)
-    SUPABASE_URL = config.get("SUPABASE_URL")
-    SUPABASE_KEY = config.get("SUPABASE_KEY")
-except FileNotFoundError:
-    print("Error: config.json not found. Please ensure it exists.")
-    # Consider exiting or raising a more specific error if config is critical
-    SUPABASE_URL = None
-    SUPABASE_KEY = None
-except json.JSONDecodeError:
-    print("Error: Could not decode config.json. Please check its format.")
-    SUPABASE_URL = None
-    SUPABASE_KEY = None
+import config_loader  # Shared, lazily loaded configuration
+from repository import Repository, SupabaseBackend
 
 
 class Database:
     SESSION_FILE = "session.json"
 
     def __init__(self, is_web_environment=False):
-        if not SUPABASE_URL:
+        config = config_loader.get_config()
+        if not config.supabase_url:
             raise ValueError("SUPABASE_URL is not set or loaded from config.json.")
-        if not SUPABASE_KEY:
+        if not config.supabase_anon_key:
             raise ValueError("SUPABASE_KEY is not set or loaded from config.json.")
 
         # Use the synchronous Client
@@ -36,14 +23,16 @@ class Database:
         self.access_token = None
         self.refresh_token = None
         self.is_web_environment = is_web_environment
+        self.repository: Repository = None
         self.create_supabase_client()  # Initialize client in constructor
 
     # Make this synchronous
     def create_supabase_client(self):
         # Use create_client (synchronous)
+        config = config_loader.get_config()
         self.supabase: Client = create_client(
-            SUPABASE_URL,
-            SUPABASE_KEY,
+            config.supabase_url,
+            config.supabase_anon_key,
             options=ClientOptions(
                 # persist_session=False might not be needed for sync client
                 # auto_refresh_token=True is generally useful
@@ -51,6 +40,8 @@ class Database:
             ),
         )
         print("Synchronous Supabase client created.")
+        # Same repository layer as ToDoList, backed by supabase-py
+        self.repository = Repository(SupabaseBackend(self.supabase))
 
     # Make this synchronous
     def set_access_token(self, access_token, refresh_token):
@@ -102,122 +93,61 @@ class Database:
             print(f"Error loading session from {self.SESSION_FILE}: {e}")
             return None
 
-    # _handle_response remains synchronous
-    def _handle_response(self, response):
-        # Sync client responses might differ slightly, adjust if needed
-        # Often, sync methods raise exceptions on errors directly.
-        # Check the structure of 'response' from sync calls.
-        # Assuming it still has a 'data' attribute on success:
-        if hasattr(response, "data"):
-            return response.data
-        # If errors are raised as exceptions, the try/except blocks handle them.
-        # If errors are returned in the response object, check for that:
-        elif hasattr(response, "error"):
-            raise Exception(f"Supabase error: {response.error}")
-        return None  # Or handle unexpected response structure
-
-    # --- Make all data methods synchronous ---
+    # --- Data methods go through the shared repository layer ---
 
     def get_tasks(self):
-        try:
-            # Remove await, use sync execute()
-            response = self.supabase.table("tasks").select("*").execute()
-            return self._handle_response(response)
-        except Exception as e:
-            print(f"Error in get_tasks: {e}")
-            return []
+        data = self.repository.select("tasks", {"select": "*"})
+        return data if data is not None else []
 
     def get_rewards(self):
-        try:
-            response = self.supabase.table("rewards").select("*").execute()
-            return self._handle_response(response)
-        except Exception as e:
-            print(f"Error in get_rewards: {e}")
-            return []
+        data = self.repository.select("rewards", {"select": "*"})
+        return data if data is not None else []
+
+    def _write(self, operation, result):
+        # Writes used to re-raise; keep that contract for callers.
+        if result is None:
+            raise Exception(f"Error in {operation}: see log above")
+        return result
 
     def add_task(self, task_data):
-        try:
-            response = self.supabase.table("tasks").insert(task_data).execute()
-            self._handle_response(response)  # Or just check for exceptions
-        except Exception as e:
-            print(f"Error in add_task: {e}")
-            raise  # Re-raise to signal failure
+        self._write("add_task", self.repository.insert("tasks", task_data))
 
     def add_reward(self, reward_data):
-        try:
-            response = self.supabase.table("rewards").insert(reward_data).execute()
-            self._handle_response(response)
-        except Exception as e:
-            print(f"Error in add_reward: {e}")
-            raise
+        self._write("add_reward", self.repository.insert("rewards", reward_data))
 
     # user_id might not be needed if RLS is based on auth.uid()
     def add_task_history(self, task_history_data):
-        try:
-            response = (
-                self.supabase.table("task_history").insert(task_history_data).execute()
-            )
-            self._handle_response(response)
-        except Exception as e:
-            print(f"Error in add_task_history: {e}")
-            raise
+        self._write(
+            "add_task_history",
+            self.repository.insert("task_history", task_history_data),
+        )
 
     # user_id might not be needed if RLS is based on auth.uid()
     def add_reward_history(self, reward_history_data):
-        try:
-            response = (
-                self.supabase.table("reward_history")
-                .insert(reward_history_data)
-                .execute()
-            )
-            self._handle_response(response)
-        except Exception as e:
-            print(f"Error in add_reward_history: {e}")
-            raise
+        self._write(
+            "add_reward_history",
+            self.repository.insert("reward_history", reward_history_data),
+        )
 
     def delete_task(self, task_id):
-        try:
-            response = self.supabase.table("tasks").delete().eq("id", task_id).execute()
-            self._handle_response(response)
-        except Exception as e:
-            print(f"Error in delete_task: {e}")
-            raise
+        self._write(
+            "delete_task", self.repository.delete("tasks", {"id": f"eq.{task_id}"})
+        )
 
     def delete_reward(self, reward_id):
-        try:
-            response = (
-                self.supabase.table("rewards").delete().eq("id", reward_id).execute()
-            )
-            self._handle_response(response)
-        except Exception as e:
-            print(f"Error in delete_reward: {e}")
-            raise
+        self._write(
+            "delete_reward",
+            self.repository.delete("rewards", {"id": f"eq.{reward_id}"}),
+        )
 
     # user_id might not be needed if RLS is based on auth.uid()
     def get_task_history(self, user_id):
-        try:
-            # If RLS is set up correctly, filtering by user_id might be redundant
-            # as the authenticated user's context should handle it.
-            # However, keeping it might be necessary depending on your RLS policies.
-            response = (
-                self.supabase.table("task_history").select("*")
-                # .eq("user_id", user_id) # Check if needed with RLS
-                .execute()
-            )
-            return self._handle_response(response)
-        except Exception as e:
-            print(f"Error fetching task history: {e}")
-            return []
+        # If RLS is set up correctly, filtering by user_id is redundant
+        # as the authenticated user's context should handle it.
+        data = self.repository.select("task_history", {"select": "*"})
+        return data if data is not None else []
 
     # user_id might not be needed if RLS is based on auth.uid()
     def get_reward_history(self, user_id):
-        try:
-            response = (
-                self.supabase.table("reward_history").select("*")
-                # .eq("user_id", user_id) # Check if needed with RLS
-                .execute()
-            )
-            return self._handle_response(response)
-        except Exception as e:
-            print(f"Error fetching reward history: {e}")
-            return []
+        data = self.repository.select("reward_history", {"select": "*"})
+        return data if data is not None else []
@@ -0,0 +1,166 @@
+import datetime
+import threading
+
+TOMBSTONE_TABLE = "deleted_rows"
+TOMBSTONE_RETENTION = datetime.timedelta(days=30)  # see prune_deleted_rows()
+# Re-read this far behind the watermark: a transaction that commits late can
+# carry an updated_at just below rows we have already seen. Merging is by id,
+# so the overlap is harmless.
+WATERMARK_OVERLAP = datetime.timedelta(seconds=5)
+MAX_DELTA_ROWS = 500  # a bigger change set is cheaper to fetch in full
+
+
+def _parse_timestamp(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+class TableSync:
+    """In-memory copy of one table kept current with delta fetches.
+
+    refresh() asks only for rows whose updated_at moved past the high-water
+    mark, plus tombstones for deleted rows, and merges them by id. A full
+    resync happens on the first refresh, after a failed delta, when the
+    change set is too large, or when the watermark is older than the
+    tombstone retention (deletes in between may have been pruned)."""
+
+    def __init__(self, repository, table, params=None, decode=None):
+        self.repository = repository
+        self.table = table
+        self.params = dict(params or {"select": "*"})
+        self.decode = decode  # e.g. records.Task.from_rows; rows kept decoded
+        self.rows = {}  # id -> row
+        self.watermark = None  # max updated_at seen
+        self.tombstone_watermark = None  # max deleted_at seen
+        self.synced_at = None
+        self.needs_full = True
+        self.lock = threading.Lock()
+        self.stats = {"full": 0, "delta": 0, "rows_fetched": 0}
+
+    def mark_gap(self):
+        """Forces a full resync on the next refresh."""
+        self.needs_full = True
+
+    def _has_gap(self, now):
+        return (
+            self.needs_full
+            or self.synced_at is None
+            or now - self.synced_at > TOMBSTONE_RETENTION
+        )
+
+    def refresh(self):
+        """Brings the local copy up to date. Returns the rows as a list, or
+        None if the backend could not be reached at all."""
+        with self.lock:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            if self._has_gap(now) or not self._apply_delta():
+                if not self._full_resync():
+                    return None
+            self.synced_at = now
+            return list(self.rows.values())
+
+    def _latest_tombstone(self):
+        rows = self.repository.select(
+            TOMBSTONE_TABLE,
+            {
+                "select": "deleted_at",
+                "table_name": f"eq.{self.table}",
+                "order": "deleted_at.desc",
+                "limit": 1,
+            },
+            use_cache=False,
+        )
+        if not isinstance(rows, list):
+            return False, None
+        return True, _parse_timestamp(rows[0].get("deleted_at")) if rows else None
+
+    def _full_resync(self):
+        # Read the tombstone mark first (server clock): anything deleted after
+        # it is picked up by the next delta, even if the snapshot still has it.
+        ok, tombstone_watermark = self._latest_tombstone()
+        data = self.repository.select(self.table, self.params, use_cache=False)
+        if not ok or not isinstance(data, list):
+            return False
+        if self.decode:
+            data = self.decode(data)
+        self.rows = {row.get("id"): row for row in data if row.get("id") is not None}
+        self.watermark = max(
+            filter(None, (_parse_timestamp(r.get("updated_at")) for r in data)),
+            default=None,
+        )
+        self.tombstone_watermark = tombstone_watermark
+        self.needs_full = False
+        self.stats["full"] += 1
+        self.stats["rows_fetched"] += len(data)
+        print(f"Delta sync: full resync of {self.table} ({len(data)} rows).")
+        return True
+
+    def _apply_delta(self):
+        params = dict(self.params)
+        params["order"] = "updated_at.asc"
+        params["limit"] = MAX_DELTA_ROWS + 1
+        if self.watermark is not None:
+            since = self.watermark - WATERMARK_OVERLAP
+            params["updated_at"] = f"gte.{since.isoformat()}"
+        changed = self.repository.select(self.table, params, use_cache=False)
+
+        tombstone_params = {
+            "select": "row_id,deleted_at",
+            "table_name": f"eq.{self.table}",
+            "order": "deleted_at.asc",
+            "limit": MAX_DELTA_ROWS + 1,
+        }
+        if self.tombstone_watermark is not None:
+            since = self.tombstone_watermark - WATERMARK_OVERLAP
+            tombstone_params["deleted_at"] = f"gte.{since.isoformat()}"
+        tombstones = self.repository.select(
+            TOMBSTONE_TABLE, tombstone_params, use_cache=False
+        )
+        if not isinstance(changed, list) or not isinstance(tombstones, list):
+            print(f"Delta sync: delta for {self.table} failed, resyncing in full.")
+            return False
+        if len(changed) > MAX_DELTA_ROWS or len(tombstones) > MAX_DELTA_ROWS:
+            print(f"Delta sync: too many changes in {self.table}, resyncing in full.")
+            return False
+        if self.decode:
+            changed = self.decode(changed)
+
+        for row in changed:
+            if row.get("id") is not None:
+                self.rows[row.get("id")] = row
+            stamp = _parse_timestamp(row.get("updated_at"))
+            if stamp and (self.watermark is None or stamp > self.watermark):
+                self.watermark = stamp
+        for tombstone in tombstones:
+            self.rows.pop(tombstone.get("row_id"), None)
+            stamp = _parse_timestamp(tombstone.get("deleted_at"))
+            if stamp and (
+                self.tombstone_watermark is None or stamp > self.tombstone_watermark
+            ):
+                self.tombstone_watermark = stamp
+        self.stats["delta"] += 1
+        self.stats["rows_fetched"] += len(changed) + len(tombstones)
+        return True
+
+    # --- Local writes, applied without waiting for the next refresh ---
+
+    def apply_local(self, rows):
+        """Merges rows as returned by an insert (dicts)."""
+        rows = [row for row in rows if isinstance(row, dict)]
+        if self.decode:
+            rows = self.decode(rows)
+        with self.lock:
+            for row in rows:
+                if row.get("id") is not None:
+                    self.rows[row.get("id")] = row
+
+    def discard_local(self, row_id):
+        with self.lock:
+            self.rows.pop(row_id, None)
@@ -0,0 +1,185 @@
+import bisect
+import datetime
+import heapq
+
+from recurrence import OCCURRENCE_WINDOW, Rule
+
+
+def _day_key(value):
+    """Normalizes a date, datetime or ISO string to 'YYYY-MM-DD'."""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+def _index_key(due_date, task_id):
+    # str(task_id) keeps ordering well defined for mixed id types.
+    return (_day_key(due_date), str(task_id), task_id)
+
+
+def _occurrence(task, day):
+    """Copy of task (records.Task or row dict) due on day."""
+    if isinstance(task, dict):
+        return dict(task, due_date=day)
+    return type(task)(**dict(task.to_dict(), due_date=day))
+
+
+# Sorts after every 'YYYY-MM-DD' key of the same day.
+_AFTER_ANY_ID = "\uffff"
+
+
+class DueDateIndex:
+    """In-memory date -> task index for scheduled tasks.
+
+    Keeps a sorted list of (due_date, task_id) keys so range and "jump to date"
+    lookups are a binary search plus the matching slice (O(log n + k)).
+    Tasks without a due_date are tracked separately. A recurring task is
+    indexed once, at its stored (next) due date; its later occurrences are
+    generated only for the range a lookup asks about.
+    """
+
+    def __init__(self):
+        self._keys = []  # sorted (due_date, str(task_id), task_id) tuples
+        self._tasks = {}  # task_id -> task (records.Task or row dict)
+        self._undated = {}  # task_id -> task (no due_date)
+        self._rules = {}  # task_id -> recurrence.Rule, for dated recurring tasks
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._tasks) + len(self._undated)
+
+    def rebuild(self, tasks):
+        """Replaces the index contents with a freshly fetched task list."""
+        self._keys = []
+        self._tasks = {}
+        self._undated = {}
+        self._rules = {}
+        dated = []
+        for task in tasks:
+            task_id = task.get("id")
+            if task_id is None:
+                continue
+            due_date = task.get("due_date")
+            if due_date:
+                self._tasks[task_id] = task
+                dated.append(_index_key(due_date, task_id))
+                self._add_rule(task_id, task)
+            else:
+                self._undated[task_id] = task
+        dated.sort()
+        self._keys = dated
+        self.loaded = True
+
+    def add(self, task):
+        """Adds (or replaces) a single task."""
+        task_id = task.get("id")
+        if task_id is None:
+            return
+        self.remove(task_id)
+        due_date = task.get("due_date")
+        if due_date:
+            self._tasks[task_id] = task
+            bisect.insort(self._keys, _index_key(due_date, task_id))
+            self._add_rule(task_id, task)
+        else:
+            self._undated[task_id] = task
+
+    def _add_rule(self, task_id, task):
+        rule = Rule.parse(task.get("recurrence"))
+        if rule:
+            self._rules[task_id] = rule
+
+    def get(self, task_id):
+        """Returns the task with this id, or None."""
+        return self._tasks.get(task_id) or self._undated.get(task_id)
+
+    def rule(self, task_id):
+        """Returns the recurrence.Rule of a dated recurring task, or None."""
+        return self._rules.get(task_id)
+
+    def remove(self, task_id):
+        """Removes a task by id. Returns the removed task or None."""
+        task = self._undated.pop(task_id, None)
+        if task is not None:
+            return task
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return None
+        self._rules.pop(task_id, None)
+        key = _index_key(task.get("due_date"), task_id)
+        pos = bisect.bisect_left(self._keys, key)
+        if pos < len(self._keys) and self._keys[pos] == key:
+            del self._keys[pos]
+        return task
+
+    def _span(self, start, end):
+        lo = bisect.bisect_left(self._keys, (_day_key(start),))
+        hi = bisect.bisect_left(self._keys, (_day_key(end) + _AFTER_ANY_ID,))
+        return self._keys[lo:hi]
+
+    def _repeats(self, start, end):
+        """Sorted (key, task) pairs for the occurrences of recurring tasks
+        from start to end, past each stored due date. Each is a copy of the
+        task carrying that occurrence's due_date."""
+        repeats = []
+        for task_id, rule in self._rules.items():
+            task = self._tasks[task_id]
+            anchor = task.get("due_date")
+            for day in rule.between(anchor, start, end):
+                day = day.isoformat()
+                if day != _day_key(anchor):
+                    repeats.append((_index_key(day, task_id), _occurrence(task, day)))
+        repeats.sort(key=lambda repeat: repeat[0])
+        return repeats
+
+    def between(self, start, end):
+        """Returns tasks due from start to end (inclusive), sorted by due date.
+        Recurring tasks appear once per occurrence."""
+        stored = [(key, self._tasks[key[2]]) for key in self._span(start, end)]
+        return [
+            task
+            for _, task in heapq.merge(
+                stored, self._repeats(start, end), key=lambda pair: pair[0]
+            )
+        ]
+
+    def on(self, day):
+        """Returns tasks due on a single day."""
+        return self.between(day, day)
+
+    def upcoming(self, start, limit=50):
+        """Returns up to `limit` tasks due on or after `start` (agenda jump)."""
+        lo = bisect.bisect_left(self._keys, (_day_key(start),))
+        stored = [(key, self._tasks[key[2]]) for key in self._keys[lo : lo + limit]]
+        if self._rules:
+            # Open ended: expand recurring tasks over a rolling window only
+            first = datetime.date.fromisoformat(_day_key(start))
+            last = first + datetime.timedelta(days=OCCURRENCE_WINDOW)
+            repeats = self._repeats(first, last)
+            stored = heapq.merge(stored, repeats, key=lambda pair: pair[0])
+        return [task for _, task in stored][:limit]
+
+    def counts_between(self, start, end):
+        """Returns {'YYYY-MM-DD': count} for tasks due in the range, with
+        every occurrence of recurring tasks."""
+        counts = self.repeat_counts_between(start, end)
+        for day, _, _ in self._span(start, end):
+            counts[day] = counts.get(day, 0) + 1
+        return counts
+
+    def repeat_counts_between(self, start, end):
+        """Returns {'YYYY-MM-DD': count} for only the occurrences of
+        recurring tasks past their stored due dates (the ones a count of
+        stored due dates misses)."""
+        counts = {}
+        for (day, _, _), _ in self._repeats(start, end):
+            counts[day] = counts.get(day, 0) + 1
+        return counts
+
+    def undated(self):
+        """Returns tasks without a due date."""
+        return list(self._undated.values())
+
+    def sorted_tasks(self):
+        """Returns all tasks: dated ones by due date first, then undated ones."""
+        return [self._tasks[key[2]] for key in self._keys] + self.undated()
@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+import os
+
+EXPORT_FORMATS = ("ndjson", "csv")
+HISTORY_TABLES = (("task_history", "task"), ("reward_history", "reward"))
+CSV_COLUMNS = ["kind", "id", "timestamp", "description", "cost"]
+DEFAULT_PAGE_SIZE = 500
+CURSOR_SUFFIX = ".cursor"
+
+
+class ExportError(Exception):
+    """A page could not be fetched. The cursor holds the resume position."""
+
+    def __init__(self, message, cursor):
+        super().__init__(message)
+        self.cursor = cursor
+
+
+def iter_history(
+    repository, cursor=None, page_size=DEFAULT_PAGE_SIZE, tables=HISTORY_TABLES
+):
+    """Yields (cursor, row) for every history row, task history first.
+
+    Keyset pagination on id: each page asks for `id > last seen id`, so a
+    page costs the same at any depth and only one page is held at a time.
+    The cursor yielded with a row resumes right after that row."""
+    cursor = dict(cursor or {})
+    for table, kind in tables:
+        if cursor.get("done_" + table):
+            continue
+        after_id = cursor.get(table)
+        while True:
+            params = {"select": "*", "order": "id.asc", "limit": page_size}
+            if after_id is not None:
+                params["id"] = f"gt.{after_id}"
+            rows = repository.select(table, params, use_cache=False)
+            if rows is None:
+                raise ExportError(
+                    f"Could not fetch {table} after id {after_id}", cursor
+                )
+            for row in rows:
+                after_id = row.get("id")
+                cursor[table] = after_id
+                yield dict(cursor), dict(row, kind=kind)
+            if len(rows) < page_size:
+                break
+        cursor["done_" + table] = True
+
+
+def _ndjson_line(row):
+    return json.dumps(row, default=str, separators=(",", ":")) + "\n"
+
+
+def _csv_line(row):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([row.get(column, "") for column in CSV_COLUMNS])
+    return buffer.getvalue()
+
+
+def stream_history(repository, fmt="ndjson", cursor=None, header=True):
+    """Yields the export as text chunks (one row each), e.g. for a streaming
+    download response. Memory use does not grow with history size."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    if fmt == "csv" and header:
+        yield ",".join(CSV_COLUMNS) + "\r\n"
+    format_row = _csv_line if fmt == "csv" else _ndjson_line
+    for _, row in iter_history(repository, cursor):
+        yield format_row(row)
+
+
+def load_cursor(path):
+    """Returns the saved resume cursor for an export to path, or None."""
+    try:
+        with open(path + CURSOR_SUFFIX, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _save_cursor(path, cursor):
+    temp_path = path + CURSOR_SUFFIX + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(cursor, f)
+    os.replace(temp_path, path + CURSOR_SUFFIX)
+
+
+def export_history(
+    repository,
+    path,
+    fmt="ndjson",
+    cursor=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    on_progress=None,
+):
+    """Writes task and reward history to path as NDJSON or CSV.
+
+    After every page the resume cursor, including the file size it covers,
+    is saved next to the file (path + '.cursor'). When cursor is given (see
+    load_cursor), the file is cut back to that size and the export carries
+    on after the last saved row, so an interruption leaves no duplicates.
+    If the file itself is gone, the cursor is ignored and the export starts
+    over.
+    Returns the number of rows written in this run."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    resuming = cursor is not None and os.path.exists(path)
+    if not resuming:
+        # Without the partial file a cursor would skip rows nobody wrote
+        cursor = None
+        if os.path.exists(path + CURSOR_SUFFIX):
+            os.remove(path + CURSOR_SUFFIX)
+    format_row = _csv_line if fmt == "csv" else _ndjson_line
+    written = 0
+    with open(path, "r+b" if resuming else "wb") as f:
+        if resuming:
+            if "offset" in cursor:
+                f.truncate(cursor["offset"])
+            f.seek(0, os.SEEK_END)
+        elif fmt == "csv":
+            f.write((",".join(CSV_COLUMNS) + "\r\n").encode("utf-8"))
+        last_cursor = cursor
+        try:
+            for row_cursor, row in iter_history(repository, cursor, page_size):
+                f.write(format_row(row).encode("utf-8"))
+                written += 1
+                last_cursor = row_cursor
+                if written % page_size == 0:
+                    _checkpoint(f, path, last_cursor)
+                    if on_progress:
+                        on_progress(written)
+        except ExportError:
+            if last_cursor is not None:
+                _checkpoint(f, path, last_cursor)
+            raise
+    if os.path.exists(path + CURSOR_SUFFIX):
+        os.remove(path + CURSOR_SUFFIX)
+    print(f"Exported {written} history rows to {path}.")
+    return written
+
+
+def _checkpoint(f, path, cursor):
+    f.flush()  # rows on disk before the cursor that covers them
+    _save_cursor(path, dict(cursor, offset=f.tell()))
@@ -1,11 +1,16 @@
 # c:\Users\nrmlc\OneDrive\Desktop\Reward_Yourself_ToDO\history_view.py
 import flet as ft
 from todo_view import ToDoList  # ToDoList is now synchronous
-import arrow
+from update_scheduler import get_update_scheduler
+from task_runner import get_task_runner
+from history_export import export_history, load_cursor
+from timestamps import format_timestamp
 
 
 # Make history_view synchronous
-def history_view(page: ft.Page, todo_list: ToDoList):
+def history_view(page: ft.Page, todo_list: ToDoList, file_picker: ft.FilePicker = None):
+    updates = get_update_scheduler(page)
+    tasks = get_task_runner(page)
     task_history_list = ft.ListView(
         expand=True, spacing=5
     )  # Use ListView for scrolling
@@ -21,7 +26,7 @@ def history_view(page: ft.Page, todo_list: ToDoList):
         if not todo_list:
             task_history_list.controls.append(ft.Text("Error: Not logged in."))
             reward_history_list.controls.append(ft.Text("Error: Not logged in."))
-            page.update()
+            updates.request()
             return
 
         print("Updating history lists...")
@@ -31,14 +36,9 @@ def history_view(page: ft.Page, todo_list: ToDoList):
         # Populate Task History
         if task_history:
             for task in task_history:
-                try:
-                    # Use try-except for robust date parsing
-                    timestamp_str = arrow.get(task.get("timestamp", "")).format(
-                        "YYYY-MM-DD HH:mm"
-                    )
-                except (arrow.parser.ParserError, TypeError):
-                    timestamp_str = "Invalid Date"
-                description = task.get("description", "No description")
+                # Memoized per minute; arrow only parses unusual shapes
+                timestamp_str = format_timestamp(task.timestamp) or "Invalid Date"
+                description = task.description or "No description"
                 task_history_list.controls.append(
                     ft.Text(f"{timestamp_str} - Task: {description}")
                 )
@@ -48,13 +48,8 @@ def history_view(page: ft.Page, todo_list: ToDoList):
         # Populate Reward History
         if reward_history:
             for reward in reward_history:
-                try:
-                    timestamp_str = arrow.get(reward.get("timestamp", "")).format(
-                        "YYYY-MM-DD HH:mm"
-                    )
-                except (arrow.parser.ParserError, TypeError):
-                    timestamp_str = "Invalid Date"
-                description = reward.get("description", "No description")
+                timestamp_str = format_timestamp(reward.timestamp) or "Invalid Date"
+                description = reward.description or "No description"
                 reward_history_list.controls.append(
                     ft.Text(f"{timestamp_str} - Reward: {description}")
                 )
@@ -62,12 +57,77 @@ def history_view(page: ft.Page, todo_list: ToDoList):
             reward_history_list.controls.append(ft.Text("No reward history yet."))
 
         print("History lists updated.")
-        page.update()
+        updates.request()
 
     # Initial population (call directly)
     update_history_lists()
 
-    return ft.View(
+    # --- Export (streams every page of history to a file) ---
+    export_status = ft.Text("", size=12, visible=False)
+
+    def show_message(message):
+        page.snack_bar = ft.SnackBar(ft.Text(message))
+        page.snack_bar.open = True
+        updates.request()
+
+    def start_export(fmt):
+        if not todo_list:
+            show_message("Error: Not logged in.")
+            return
+        if page.web or not file_picker:
+            show_message("Exporting history is only available in the desktop app.")
+            return
+        file_picker.on_result = lambda e: run_export(e.path, fmt)
+        file_picker.save_file(
+            dialog_title="Export history",
+            file_name=f"history.{fmt}",
+            allowed_extensions=[fmt],
+        )
+
+    def run_export(path, fmt):
+        if not path:
+            return  # Dialog cancelled
+        cursor = load_cursor(path)  # Left behind by an interrupted export
+        export_status.value = "Resuming export..." if cursor else "Exporting..."
+        export_status.visible = True
+
+        def report(written):
+            export_status.value = f"Exporting... {written} rows written"
+            updates.request()
+
+        def finish(written):
+            export_status.value = f"Exported {written} rows to {path}"
+            show_message("History exported!")
+
+        def fail(exc):
+            export_status.value = (
+                f"Export interrupted ({exc}). Export to the same file again to resume."
+            )
+
+        tasks.run(
+            "export_history",
+            lambda: export_history(
+                todo_list.repository, path, fmt, cursor=cursor, on_progress=report
+            ),
+            on_done=finish,
+            on_error=fail,
+            busy=[export_menu],
+        )
+
+    export_menu = ft.PopupMenuButton(
+        icon=ft.icons.DOWNLOAD,
+        tooltip="Export history",
+        items=[
+            ft.PopupMenuItem(
+                text="Export as NDJSON", on_click=lambda _: start_export("ndjson")
+            ),
+            ft.PopupMenuItem(
+                text="Export as CSV", on_click=lambda _: start_export("csv")
+            ),
+        ],
+    )
+
+    view = ft.View(
         "/history",
         [
             ft.AppBar(
@@ -77,9 +137,11 @@ def history_view(page: ft.Page, todo_list: ToDoList):
                     tooltip="Back to Tasks",
                     on_click=lambda _: page.go("/"),
                 ),
+                actions=[export_menu],
             ),
             ft.Column(  # Use a Column to structure the sections
                 [
+                    export_status,
                     ft.Text("Task History", style=ft.TextThemeStyle.HEADLINE_SMALL),
                     task_history_list,  # Add the ListView here
                     ft.Divider(height=20),
@@ -122,3 +184,6 @@ def history_view(page: ft.Page, todo_list: ToDoList):
         ],
         padding=10,
     )
+    # Used by the route cache (ft.View takes no data argument)
+    view.data = {"refresh": update_history_lists}
+    return view
@@ -0,0 +1,54 @@
+import json
+
+try:  # Optional: several times faster than the stdlib on large row lists
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class StdlibCodec:
+    """The standard library json module."""
+
+    name = "json"
+    DecodeError = json.JSONDecodeError
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(value):
+        """Encodes to compact UTF-8 bytes, ready to send as a request body."""
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode(
+            "utf-8"
+        )
+
+
+class OrjsonCodec:
+    """orjson: parses bytes directly, no str round trip."""
+
+    name = "orjson"
+    DecodeError = orjson.JSONDecodeError if orjson else ValueError
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(value):
+        return orjson.dumps(value)
+
+
+def available_codecs():
+    """Codecs usable in this environment, fastest first."""
+    return [OrjsonCodec, StdlibCodec] if orjson else [StdlibCodec]
+
+
+def get_codec(name="auto"):
+    """Returns the codec for name ('auto' picks the fastest installed one).
+    Falls back to the stdlib when the requested library is missing."""
+    if name == "orjson" and not orjson:
+        print("orjson is not installed, using the standard json module.")
+    if name == "json":
+        return StdlibCodec
+    return available_codecs()[0]
@@ -3,11 +3,23 @@ import flet as ft
 import os
 import sys
 import json
-from calendar_view import build_calendar
+from calendar_view import WeekCalendar
 from todo_view import ToDoList, MEDALS_PER_TASK
 from user_manager import UserManager  # Keep UserManager import for its own use
 from reward_view import reward_view
 from history_view import history_view
+from agenda_view import agenda_view
+from stats_view import stats_view
+from search_view import search_view
+from view_cache import RouteCache
+from prefetch import Prefetcher
+from update_scheduler import get_update_scheduler
+from task_runner import get_task_runner
+from task_import import IMPORT_EXTENSIONS, import_tasks
+from timestamps import format_date
+from recurrence import PRESETS, Rule
+from undo_window import UNDO_SECONDS, UndoWindow
+from manual_order import ListReorderer, sort_key
 import arrow
 import time
 import config_loader
@@ -56,14 +68,15 @@ def write_tokens_to_session(access_token, refresh_token):
 
 # --- Main Application Function ---
 def main(page: ft.Page):
-    if config_loader.CONFIG_ERROR:
+    config_error = config_loader.get_config_error()
+    if config_error:
         page.add(
             ft.Column(
                 [
                     ft.Text(
                         "Application Configuration Error", size=20, color=ft.colors.RED
                     ),
-                    ft.Text(config_loader.CONFIG_ERROR),
+                    ft.Text(config_error),
                     ft.Text("Please check config.json and build includes."),
                 ],
                 alignment=ft.MainAxisAlignment.CENTER,
@@ -73,6 +86,8 @@ def main(page: ft.Page):
         page.update()
         return
 
+    updates = get_update_scheduler(page)  # Coalesces page.update() calls
+    tasks = get_task_runner(page)  # Runs backend calls off the handler thread
     page.title = "Reward Yourself"
     page.horizontal_alignment = ft.MainAxisAlignment.CENTER
     page.vertical_alignment = ft.MainAxisAlignment.CENTER
@@ -84,6 +99,11 @@ def main(page: ft.Page):
     username: str = None
     selected_due_date = None
     is_web_environment = page.web
+    week_calendar = WeekCalendar()  # Built once per week, reused across views
+    route_cache = RouteCache(page)  # Built /rewards and /history views
+    prefetcher = None  # Warms /rewards and /history data while "/" is idle
+    reconciled_list = None  # ToDoList whose medal ledger was reconciled
+    refresh_task_list = None  # Set by show_main_view: redraws tasks and counts
     # --- Central UI element for medal display ---
     current_medal_count_display_main = ft.Text(
         "Medals: -", tooltip="Your current medal balance"
@@ -300,104 +320,127 @@ def main(page: ft.Page):
                 _clear_tokens()
                 return False
 
-    def perform_login(login_username, password, error_text_control):
-        """Handles the login process."""
-        nonlocal username, todo_list
+    def perform_login(login_username, password, error_text_control, busy=()):
+        """Handles the login process. The auth call runs in the background."""
         error_text_control.value = ""  # Clear previous errors
-        page.update()
+        updates.request()
 
         if not login_username or not password:
             error_text_control.value = "Please enter username and password."
-            page.update()
+            updates.request()
             return
 
-        access_token, user_id, refresh_token = user_manager.verify_user(
-            login_username, password
-        )
-        if access_token and user_id and refresh_token:
-            username = login_username  # Use the provided login username
-            supabase_client = user_manager.get_supabase_client()
-            if not supabase_client:
-                error_text_control.value = "Error initializing application services."
-                page.update()
-                return
+        def finish(tokens):
+            nonlocal username, todo_list
+            access_token, user_id, refresh_token = tokens
+            if access_token and user_id and refresh_token:
+                username = login_username  # Use the provided login username
+                supabase_client = user_manager.get_supabase_client()
+                if not supabase_client:
+                    error_text_control.value = (
+                        "Error initializing application services."
+                    )
+                    return
 
-            # Initialize ToDoList
-            # --- Remove user_manager argument ---
-            todo_list = ToDoList(username, is_web_environment, supabase_client)
-            # --- End modification ---
-            todo_list.set_access_token(access_token, refresh_token)
-            todo_list.user_id = user_id  # Set user_id here
-            _store_tokens(access_token, refresh_token)
+                # Initialize ToDoList
+                # --- Remove user_manager argument ---
+                todo_list = ToDoList(username, is_web_environment, supabase_client)
+                # --- End modification ---
+                route_cache.clear()  # Cached views belong to the previous session
+                todo_list.user_id = user_id  # Set user_id here
+                todo_list.set_access_token(access_token, refresh_token)
+                _store_tokens(access_token, refresh_token)
+
+                # Set session in the client *after* successful login
+                try:
+                    supabase_client.auth.set_session(access_token, refresh_token)
+                    print("Session set in client after login.")
+                except Exception as e:
+                    print(f"Error setting session after login: {e}")
+
+                page.go("/")
+            else:
+                error_text_control.value = "Login failed. Check username/password."
+                _clear_tokens()
 
-            # Set session in the client *after* successful login
-            try:
-                supabase_client.auth.set_session(access_token, refresh_token)
-                print("Session set in client after login.")
-            except Exception as e:
-                print(f"Error setting session after login: {e}")
+        def fail(exc):
+            error_text_control.value = "Login failed. Please try again."
 
-            page.go("/")
-        else:
-            error_text_control.value = "Login failed. Check username/password."
-            _clear_tokens()
-            page.update()
+        tasks.run(
+            "auth",
+            lambda: user_manager.verify_user(login_username, password),
+            on_done=finish,
+            on_error=fail,
+            busy=busy,
+        )
 
-    def perform_registration(reg_username, password, error_text_control):
-        """Handles the registration process."""
-        nonlocal username, todo_list
+    def perform_registration(reg_username, password, error_text_control, busy=()):
+        """Handles the registration process. The auth call runs in the background."""
         error_text_control.value = ""  # Clear previous errors
-        page.update()
+        updates.request()
 
         if not reg_username or not password:
             error_text_control.value = "Please enter username and password."
-            page.update()
+            updates.request()
             return
         if len(password) < 6:
             error_text_control.value = "Password must be at least 6 characters."
-            page.update()
+            updates.request()
             return
 
-        access_token, user_id, refresh_token = user_manager.register_user(
-            reg_username, password
-        )
-        if access_token and user_id and refresh_token:
-            username = reg_username  # Use the provided registration username
-            supabase_client = user_manager.get_supabase_client()
-            if not supabase_client:
+        def finish(tokens):
+            nonlocal username, todo_list
+            access_token, user_id, refresh_token = tokens
+            if access_token and user_id and refresh_token:
+                username = reg_username  # Use the provided registration username
+                supabase_client = user_manager.get_supabase_client()
+                if not supabase_client:
+                    error_text_control.value = (
+                        "Error initializing application services after registration."
+                    )
+                    return
+
+                # Initialize ToDoList
+                # --- Remove user_manager argument ---
+                todo_list = ToDoList(username, is_web_environment, supabase_client)
+                # --- End modification ---
+                route_cache.clear()  # Cached views belong to the previous session
+                todo_list.user_id = user_id  # Set user_id here
+                todo_list.set_access_token(access_token, refresh_token)
+                _store_tokens(access_token, refresh_token)
+
+                # Set session in the client *after* successful registration
+                try:
+                    supabase_client.auth.set_session(access_token, refresh_token)
+                    print("Session set in client after registration.")
+                except Exception as e:
+                    print(f"Error setting session after registration: {e}")
+
+                page.go("/")
+            else:
                 error_text_control.value = (
-                    "Error initializing application services after registration."
+                    "Registration failed. User might already exist or invalid input."
                 )
-                page.update()
-                return
-
-            # Initialize ToDoList
-            # --- Remove user_manager argument ---
-            todo_list = ToDoList(username, is_web_environment, supabase_client)
-            # --- End modification ---
-            todo_list.set_access_token(access_token, refresh_token)
-            todo_list.user_id = user_id  # Set user_id here
-            _store_tokens(access_token, refresh_token)
+                _clear_tokens()
 
-            # Set session in the client *after* successful registration
-            try:
-                supabase_client.auth.set_session(access_token, refresh_token)
-                print("Session set in client after registration.")
-            except Exception as e:
-                print(f"Error setting session after registration: {e}")
+        def fail(exc):
+            error_text_control.value = "Registration failed. Please try again."
 
-            page.go("/")
-        else:
-            error_text_control.value = (
-                "Registration failed. User might already exist or invalid input."
-            )
-            _clear_tokens()
-            page.update()
+        tasks.run(
+            "auth",
+            lambda: user_manager.register_user(reg_username, password),
+            on_done=finish,
+            on_error=fail,
+            busy=busy,
+        )
 
     def perform_logout():
         """Logs the user out and clears session."""
         nonlocal username, todo_list
         print("Performing logout...")
+        print(f"Page updates this session: {updates.stats()}")
+        flush_completions()  # Before the token goes away
+
         supabase_client = user_manager.get_supabase_client()
         if supabase_client:
             try:
@@ -409,6 +452,9 @@ def main(page: ft.Page):
         _clear_tokens()
         username = None
         todo_list = None
+        route_cache.clear()
+        if prefetcher:
+            prefetcher.cancel()
         current_medal_count_display_main.value = "Medals: N/A"
         page.go("/login")
 
@@ -425,9 +471,19 @@ def main(page: ft.Page):
                 username_input.value.strip(),
                 password_input.value,
                 error_text,
+                busy=[login_button, password_input],
             ),
         )
         error_text = ft.Text("", color=ft.colors.RED)
+        login_button = ft.ElevatedButton(
+            "Login",
+            on_click=lambda e: perform_login(
+                username_input.value.strip(),
+                password_input.value,
+                error_text,
+                busy=[login_button, password_input],
+            ),
+        )
         return ft.View(
             "/login",
             [
@@ -436,14 +492,7 @@ def main(page: ft.Page):
                     [
                         username_input,
                         password_input,
-                        ft.ElevatedButton(
-                            "Login",
-                            on_click=lambda e: perform_login(
-                                username_input.value.strip(),
-                                password_input.value,
-                                error_text,
-                            ),
-                        ),
+                        login_button,
                         ft.TextButton(
                             "Register", on_click=lambda _: page.go("/register")
                         ),
@@ -473,9 +522,19 @@ def main(page: ft.Page):
                 register_username.value.strip(),
                 register_password.value,
                 error_text,
+                busy=[register_button, register_password],
             ),
         )
         error_text = ft.Text("", color=ft.colors.RED)
+        register_button = ft.ElevatedButton(
+            "Register",
+            on_click=lambda e: perform_registration(
+                register_username.value.strip(),
+                register_password.value,
+                error_text,
+                busy=[register_button, register_password],
+            ),
+        )
         return ft.View(
             "/register",
             [
@@ -484,14 +543,7 @@ def main(page: ft.Page):
                     [
                         register_username,
                         register_password,
-                        ft.ElevatedButton(
-                            "Register",
-                            on_click=lambda e: perform_registration(
-                                register_username.value.strip(),
-                                register_password.value,
-                                error_text,
-                            ),
-                        ),
+                        register_button,
                         error_text,
                     ],
                     alignment=ft.MainAxisAlignment.CENTER,
@@ -506,128 +558,278 @@ def main(page: ft.Page):
 
     def show_main_view():
         """Builds and displays the main ToDo view."""
-        nonlocal selected_due_date
+        nonlocal selected_due_date, refresh_task_list
 
-        calendar_container = ft.Container(content=build_calendar(page), padding=10)
+        calendar_container = ft.Container(content=week_calendar.build(), padding=10)
         task_input = ft.TextField(
             label="New Task", expand=True, on_submit=lambda e: add_task(e)
         )
-        task_list_view = ft.ListView(expand=True, spacing=5, auto_scroll=True)
+        # Drag a row to reorder; the order is saved as one position per move
+        task_list_view = ft.ReorderableListView(
+            expand=True,
+            auto_scroll=True,
+            on_reorder=lambda e: reorder_task(e.old_index, e.new_index),
+        )
+        task_rows = {}  # task_id -> row, to hide/show it without a refetch
+        shown_tasks = []  # tasks of task_rows, in list order
         selected_date_text = ft.Text("Due Date: None")
+        repeat_dropdown = ft.Dropdown(
+            options=[ft.dropdown.Option(label) for label in PRESETS],
+            value="Does not repeat",
+            label="Repeat",
+            width=180,
+            dense=True,
+        )
 
         def handle_date_change_main(e):
             nonlocal selected_due_date
             selected_due_date = e.control.value
             selected_date_text.value = (
-                f"Due: {selected_due_date.strftime('%Y-%m-%d')}"
+                f"Due: {format_date(selected_due_date)}"
                 if selected_due_date
                 else "Due Date: None"
             )
-            page.update()
+            updates.request()
 
         def handle_date_dismissal_main(e):
             print("DatePicker dismissed.")
 
+        def update_calendar_counts():
+            """Refreshes the due-task overlay with one grouped query for the week."""
+            if not todo_list:
+                return
+            week_start, week_end = week_calendar.week_range()
+            week_calendar.set_due_counts(
+                todo_list.get_due_task_counts(week_start, week_end)
+            )
+
         def update_task_list():
             task_list_view.controls.clear()
             if not todo_list:
                 task_list_view.controls.append(ft.Text("Error: Not logged in."))
                 return
-            tasks = todo_list.get_all_tasks()
-            if tasks:
-                for task in tasks:
+            # In the user's manual order
+            ordered_tasks = todo_list.get_all_tasks()
+            task_rows.clear()
+            shown_tasks.clear()
+            if ordered_tasks:
+                for task in ordered_tasks:
                     task_id, task_name, due_date_str = (
-                        task.get("id"),
-                        task.get("task", "Unnamed"),
-                        task.get("due_date"),
+                        task.id,
+                        task.task or "Unnamed",
+                        task.due_date,
                     )
-                    if task_id is None:
-                        continue
+                    if task_id is None or task_id in pending_completions:
+                        continue  # Completed, waiting out its undo window
+                    due_date_str = format_date(due_date_str)
                     due_date_display = f" (Due: {due_date_str})" if due_date_str else ""
-                    task_list_view.controls.append(
-                        ft.Row(
-                            [
-                                ft.Text(
-                                    f"{task_name}{due_date_display}",
-                                    expand=True,
-                                    tooltip=task_name,
-                                ),
-                                ft.IconButton(
-                                    ft.icons.CHECK_CIRCLE_OUTLINE,
-                                    tooltip="Mark as Done",
-                                    on_click=lambda _, tid=task_id, tname=task_name: mark_done(
-                                        tid, tname
-                                    ),
-                                    icon_color=ft.colors.GREEN_ACCENT_700,
-                                ),
-                            ],
-                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                        )
+                    rule = Rule.parse(task.recurrence)
+                    if rule:
+                        due_date_display += f" - repeats {rule.describe()}"
+                    done_button = ft.IconButton(
+                        ft.icons.CHECK_CIRCLE_OUTLINE,
+                        tooltip="Mark as Done",
+                        icon_color=ft.colors.GREEN_ACCENT_700,
                     )
+                    done_button.on_click = (
+                        lambda _, tid=task_id, tname=task_name: mark_done(tid, tname)
+                    )
+                    row = task_rows[task_id] = ft.Row(
+                        [
+                            ft.Text(
+                                f"{task_name}{due_date_display}",
+                                expand=True,
+                                tooltip=task_name,
+                            ),
+                            done_button,
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                    )
+                    task_list_view.controls.append(row)
+                    shown_tasks.append(task)
             else:
                 task_list_view.controls.append(ft.Text("No tasks yet!"))
+            task_reorderer.rebalance()  # if rows without a position came back
+
+        def reload_tasks():
+            update_task_list()
+            updates.request()
+
+        task_reorderer = ListReorderer(
+            todo_list, "tasks", tasks, reload_tasks, on_error=lambda m: show_error(m)
+        )
+
+        def reorder_task(old_index, new_index):
+            """Moves a dragged task. Indexes count visible rows only (a task
+            waiting out its undo window is hidden)."""
+            if not todo_list or not shown_tasks:
+                return
+            visible = [task for task in shown_tasks if task_rows[task.id].visible]
+            if not task_reorderer.move(visible, old_index, new_index):
+                return
+            shown_tasks.sort(key=sort_key)
+            task_list_view.controls = [task_rows[task.id] for task in shown_tasks]
+            updates.request()
 
         def mark_done(task_id, task_name):
+            """Hides the task at once and queues its completion; it is only
+            sent when the undo window closes (batched with any others)."""
             print(f"Marking task done: ID={task_id}, Name={task_name}")
-            if todo_list:
-                success, returned_new_count = todo_list.mark_task_done(
-                    task_id, task_name
-                )
-                if success:
-                    page.snack_bar = ft.SnackBar(
-                        ft.Text(
-                            f"Task '{task_name}' completed! (+{MEDALS_PER_TASK} Medals)"
-                        )
-                    )
-                    page.snack_bar.open = True
-                    update_task_list()
-                    update_main_medal_display(new_count=returned_new_count)
-                else:
-                    page.snack_bar = ft.SnackBar(
-                        ft.Text("Error completing task or updating medals.")
-                    )
-                    page.snack_bar.open = True
-                page.update()
-            else:
+            if not todo_list:
                 print("Error: todo_list not available in mark_done.")
+                return
+            pending_completions.add(task_id, (task_id, task_name))
+            if task_id in task_rows:
+                task_rows[task_id].visible = False
+            page.snack_bar = ft.SnackBar(
+                ft.Text(f"Task '{task_name}' completed! (+{MEDALS_PER_TASK} Medals)"),
+                action="Undo",
+                on_action=lambda _: undo_done(task_id, task_name),
+                duration=UNDO_SECONDS * 1000,
+            )
+            page.snack_bar.open = True
+            updates.request()
+
+        def undo_done(task_id, task_name):
+            if pending_completions.undo(task_id):
+                if task_id in task_rows:
+                    task_rows[task_id].visible = True
+                message = f"Task '{task_name}' restored."
+            else:
+                message = f"Task '{task_name}' was already saved."
+            page.snack_bar = ft.SnackBar(ft.Text(message))
+            page.snack_bar.open = True
+            updates.request()
+
+        def show_error(message):
+            page.snack_bar = ft.SnackBar(ft.Text(message))
+            page.snack_bar.open = True
 
         def add_task(e):
             nonlocal selected_due_date
-            if todo_list:
-                task_text = task_input.value.strip()
-                if task_text:
-                    due_date_str = (
-                        selected_due_date.strftime("%Y-%m-%d")
-                        if selected_due_date
-                        else None
-                    )
-                    new_task_data = {
-                        "task": task_text,
-                        "done": False,
-                        "due_date": due_date_str,
-                    }
-                    added_task = todo_list.add_new_task(new_task_data)
-                    if added_task:
-                        task_input.value = ""
-                        selected_due_date = None
-                        selected_date_text.value = "Due Date: None"
-                        task_input.focus()
-                        update_task_list()
-                        page.snack_bar = ft.SnackBar(ft.Text("Task added!"))
-                        page.snack_bar.open = True
-                    else:
-                        page.snack_bar = ft.SnackBar(ft.Text("Error adding task."))
-                        page.snack_bar.open = True
-                    page.update()
-                else:
-                    page.snack_bar = ft.SnackBar(ft.Text("Please enter a task."))
-                    page.snack_bar.open = True
-                    task_input.focus()
-                    page.update()
-            else:
+            if not todo_list:
                 print("Error: todo_list not available in add_task.")
+                return
+            task_text = task_input.value.strip()
+            if not task_text:
+                page.snack_bar = ft.SnackBar(ft.Text("Please enter a task."))
+                page.snack_bar.open = True
+                task_input.focus()
+                updates.request()
+                return
+            due_date_str = format_date(selected_due_date)
+            new_task_data = {
+                "task": task_text,
+                "done": False,
+                "due_date": due_date_str,
+            }
+            recurrence = PRESETS.get(repeat_dropdown.value)
+            if recurrence:
+                new_task_data["recurrence"] = recurrence
+
+            def finish(added_task):
+                nonlocal selected_due_date
+                if added_task:
+                    task_input.value = ""
+                    selected_due_date = None
+                    selected_date_text.value = "Due Date: None"
+                    repeat_dropdown.value = "Does not repeat"
+                    task_input.focus()
+                    update_task_list()
+                    update_calendar_counts()
+                    page.snack_bar = ft.SnackBar(ft.Text("Task added!"))
+                    page.snack_bar.open = True
+                else:
+                    show_error("Error adding task.")
+
+            tasks.run(
+                "add_task",
+                lambda: todo_list.add_new_task(new_task_data),
+                on_done=finish,
+                on_error=lambda exc: show_error("Error adding task."),
+                busy=[task_input, add_task_button],
+            )
+
+        def refresh_after_commit():
+            update_task_list()
+            update_calendar_counts()
+
+        refresh_task_list = refresh_after_commit
+
+        add_task_button = ft.IconButton(
+            ft.icons.ADD_CIRCLE,
+            tooltip="Add Task",
+            on_click=add_task,
+            icon_color=ft.colors.GREEN,
+        )
+
+        # --- Bulk import through the shared file_picker ---
+        import_progress = ft.ProgressBar(value=0, visible=False)
+        import_status = ft.Text("", size=12, visible=False)
+        import_button = ft.IconButton(
+            ft.icons.UPLOAD_FILE,
+            tooltip="Import tasks (CSV, JSON, text)",
+            on_click=lambda _: pick_import_file(),
+        )
+
+        def pick_import_file():
+            if is_web_environment:
+                # Browsers hand us no file path; reading one needs an upload dir
+                show_error("Importing files is only available in the desktop app.")
+                updates.request()
+                return
+            file_picker.on_result = handle_import_file
+            file_picker.pick_files(
+                dialog_title="Import tasks",
+                allowed_extensions=IMPORT_EXTENSIONS,
+                allow_multiple=False,
+            )
+
+        def handle_import_file(e: ft.FilePickerResultEvent):
+            if not e.files or not todo_list:
+                return
+            picked = e.files[0]
+            if not picked.path:
+                show_error("Could not read the selected file.")
+                updates.request()
+                return
+            import_progress.value = 0
+            import_progress.visible = True
+            import_status.value = f"Importing {picked.name}..."
+            import_status.visible = True
+
+            def report(result):
+                import_progress.value = result.fraction
+                import_status.value = (
+                    f"Importing {picked.name}: {result.imported} added, "
+                    f"{result.skipped} skipped"
+                )
+                updates.request()
+
+            def finish(result):
+                import_progress.visible = False
+                import_status.value = result.summary()
+                if result.errors:
+                    import_status.value += " First problem: " + result.errors[0]
+                update_task_list()
+                update_calendar_counts()
+                page.snack_bar = ft.SnackBar(ft.Text(result.summary()))
+                page.snack_bar.open = True
+
+            def fail(exc):
+                import_progress.visible = False
+                import_status.value = f"Import failed: {exc}"
+
+            tasks.run(
+                "import_tasks",
+                lambda: import_tasks(todo_list, picked.path, on_progress=report),
+                on_done=finish,
+                on_error=fail,
+                busy=[import_button],
+            )
 
         update_task_list()
+        update_calendar_counts()
 
         return ft.View(
             "/",
@@ -636,12 +838,13 @@ def main(page: ft.Page):
                     title=ft.Text("Reward Yourself - ToDo"),
                     actions=[
                         current_medal_count_display_main,
+                        import_button,
                         ft.IconButton(
                             ft.icons.REFRESH,
                             tooltip="Refresh Medals",
                             on_click=lambda _: (
                                 update_main_medal_display(),
-                                page.update(),
+                                updates.request(),
                             ),
                         ),
                         ft.IconButton(
@@ -672,16 +875,13 @@ def main(page: ft.Page):
                                         )
                                     ),
                                 ),
-                                ft.IconButton(
-                                    ft.icons.ADD_CIRCLE,
-                                    tooltip="Add Task",
-                                    on_click=add_task,
-                                    icon_color=ft.colors.GREEN,
-                                ),
+                                add_task_button,
                             ],
                             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                         ),
-                        selected_date_text,
+                        ft.Row([selected_date_text, repeat_dropdown]),
+                        import_progress,
+                        import_status,
                         ft.Divider(height=10, color=ft.colors.TRANSPARENT),
                         ft.Text("Tasks", style=ft.TextThemeStyle.HEADLINE_SMALL),
                         task_list_view,
@@ -709,6 +909,13 @@ def main(page: ft.Page):
                         on_click=lambda _: page.go("/"),
                     ),
                     ft.Container(expand=True),
+                    ft.IconButton(
+                        ft.icons.CALENDAR_VIEW_MONTH,
+                        tooltip="Calendar",
+                        icon_color=ft.colors.WHITE,
+                        selected=(current_route == "/calendar"),
+                        on_click=lambda _: page.go("/calendar"),
+                    ),
                     ft.IconButton(
                         ft.icons.STAR_RATE_ROUNDED,
                         tooltip="Rewards",
@@ -723,11 +930,97 @@ def main(page: ft.Page):
                         selected=(current_route == "/history"),
                         on_click=lambda _: page.go("/history"),
                     ),
+                    ft.IconButton(
+                        ft.icons.SEARCH,
+                        tooltip="Search",
+                        icon_color=ft.colors.WHITE,
+                        selected=(current_route == "/search"),
+                        on_click=lambda _: page.go("/search"),
+                    ),
+                    ft.IconButton(
+                        ft.icons.INSIGHTS,
+                        tooltip="Stats",
+                        icon_color=ft.colors.WHITE,
+                        selected=(current_route == "/stats"),
+                        on_click=lambda _: page.go("/stats"),
+                    ),
                 ],
                 alignment=ft.MainAxisAlignment.SPACE_AROUND,
             ),
         )
 
+    # --- Cached routes (shown instantly, refreshed in the background) ---
+    def build_rewards_route():
+        view = reward_view(
+            page, todo_list, update_main_medal_display, on_mutation=route_cache.notify
+        )
+        view.bottom_appbar = build_bottom_app_bar("/rewards")
+        return view
+
+    def build_history_route():
+        view = history_view(page, todo_list, file_picker)
+        view.bottom_appbar = build_bottom_app_bar("/history")
+        return view
+
+    def schedule_prefetch():
+        """Starts idle-time prefetch of the next likely routes for this session."""
+        nonlocal prefetcher
+        if not todo_list:
+            return
+        if prefetcher is None or prefetcher.repository is not todo_list.repository:
+            if prefetcher:
+                prefetcher.cancel()  # Belongs to a previous session
+            prefetcher = Prefetcher(todo_list.repository)
+        prefetcher.schedule()
+
+    def commit_completions(completions):
+        """Sends the completions whose undo window closed, as one batch."""
+        session = todo_list
+        if not session:
+            return
+
+        def finish(result):
+            success, returned_new_count = result
+            if success:
+                route_cache.notify("task_completed")
+                update_main_medal_display(new_count=returned_new_count)
+            else:
+                page.snack_bar = ft.SnackBar(
+                    ft.Text("Error completing task or updating medals.")
+                )
+                page.snack_bar.open = True
+            if refresh_task_list and session is todo_list:
+                refresh_task_list()  # Failed ones reappear, recurring ones move
+
+        tasks.run(
+            f"complete_tasks:{completions[0][0]}",
+            lambda: session.complete_tasks(completions),
+            on_done=finish,
+            on_error=lambda exc: finish((False, None)),
+        )
+
+    pending_completions = UndoWindow(commit_completions)
+
+    def flush_completions(e=None):
+        """Commits completions still inside their undo window right away,
+        e.g. when the page closes (the window's timer would die with it)."""
+        completions = pending_completions.take()
+        if completions and todo_list:
+            todo_list.complete_tasks(completions)
+
+    def schedule_medal_reconcile():
+        """Reconciles the medal ledger once per session, in the background."""
+        nonlocal reconciled_list
+        if not todo_list or reconciled_list is todo_list:
+            return
+        reconciled_list = todo_list
+
+        def finish(result):
+            if result:
+                update_main_medal_display(new_count=result["balance"])
+
+        tasks.run("reconcile_medals", todo_list.reconcile_medals, on_done=finish)
+
     # --- Modified route_change ---
     def route_change(route):
         print(f"Route change requested: {page.route}")
@@ -755,11 +1048,19 @@ def main(page: ft.Page):
                 current_route = "/"
 
             if current_route == "/rewards":
-                view = reward_view(page, todo_list, update_main_medal_display)
+                target_view = route_cache.get(current_route, build_rewards_route)
+            elif current_route == "/history":
+                target_view = route_cache.get(current_route, build_history_route)
+            elif current_route == "/calendar":
+                view = agenda_view(page, todo_list)
                 view.bottom_appbar = build_bottom_app_bar(current_route)
                 target_view = view
-            elif current_route == "/history":
-                view = history_view(page, todo_list)
+            elif current_route == "/stats":
+                view = stats_view(page, todo_list)
+                view.bottom_appbar = build_bottom_app_bar(current_route)
+                target_view = view
+            elif current_route == "/search":
+                view = search_view(page, todo_list)
                 view.bottom_appbar = build_bottom_app_bar(current_route)
                 target_view = view
             else:
@@ -773,7 +1074,11 @@ def main(page: ft.Page):
             print("Error: No target view determined, falling back to login.")
             page.views.append(show_login_view())
 
-        page.update()
+        updates.request()
+        updates.flush()  # Render the new route now, folding in pending updates
+        if is_logged_in and current_route == "/":
+            schedule_prefetch()  # Main view is on screen; warm its neighbours
+            schedule_medal_reconcile()
 
     # --- End modification ---
 
@@ -788,6 +1093,8 @@ def main(page: ft.Page):
     # --- App Initialization ---
     page.on_route_change = route_change
     page.on_view_pop = view_pop
+    page.on_disconnect = flush_completions
+    page.on_close = flush_completions
     print("App initializing...")
     page.go(page.route)
 
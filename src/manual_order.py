@@ -0,0 +1,186 @@
+from repository import BackendError
+
+POSITION_STEP = 1024.0  # gap between neighbours after a rebalance
+MIN_GAP = 1e-6  # neighbours closer than this make the list due a rebalance
+ORDERED_TABLES = ("tasks", "rewards")
+
+
+def sort_key(item):
+    """Manual order: by position, then id. Rows without a position (written
+    before the manual order migration) go last."""
+    position = item.get("position")
+    return (position is None, position or 0.0, item.get("id") or 0)
+
+
+def ordered(items):
+    return sorted(items, key=sort_key)
+
+
+def position_between(before, after):
+    """Fractional index between two neighbouring positions; None stands for
+    the start or the end of the list."""
+    if before is None and after is None:
+        return POSITION_STEP
+    if before is None:
+        return after - POSITION_STEP
+    if after is None:
+        return before + POSITION_STEP
+    return (before + after) / 2
+
+
+def move(items, old_index, new_index):
+    """Moves items[old_index] to new_index (counted after its removal), in
+    place. items must be in manual order. Only the moved item gets a new
+    position, halfway between its new neighbours.
+
+    Returns (item, new position, crowded); crowded means the neighbours are
+    now closer than MIN_GAP and the list should be rebalanced. The position
+    is None when a neighbour has no position yet (rebalance first); items
+    is then left as it was."""
+    rest = items[:old_index] + items[old_index + 1 :]
+    item = items[old_index]
+    new_index = max(0, min(new_index, len(rest)))
+    before = rest[new_index - 1] if new_index > 0 else None
+    after = rest[new_index] if new_index < len(rest) else None
+    bounds = [n.get("position") if n is not None else None for n in (before, after)]
+    if any(n is not None and p is None for n, p in zip((before, after), bounds)):
+        return item, None, True
+    position = position_between(*bounds)
+    crowded = any(p is not None and abs(position - p) < MIN_GAP for p in bounds)
+    items[:] = rest[:new_index] + [item] + rest[new_index:]
+    return item, position, crowded
+
+
+def rebalanced(items):
+    """New positions, POSITION_STEP apart, that keep the manual order.
+    Returns (item, position) for the items whose position changes."""
+    return [
+        (item, position)
+        for position, item in (
+            ((rank + 1) * POSITION_STEP, item)
+            for rank, item in enumerate(ordered(items))
+        )
+        if item.get("position") != position
+    ]
+
+
+# --- Drag and drop ---
+
+
+class ListReorderer:
+    """Applies drag-and-drop moves to one list (tasks or rewards).
+
+    A move sets the item's position locally at once, so the list redraws
+    and further drags see it, then writes that single row in the
+    background. If the item was moved again before its write finished, the
+    newer position is written next. Rebalancing waits until no write is in
+    flight, and reloads the list afterwards so local positions match."""
+
+    def __init__(self, todo_list, table, runner, on_reload, on_error=None):
+        self.todo_list = todo_list
+        self.table = table
+        self.runner = runner  # task_runner.TaskRunner of the page
+        self.on_reload = on_reload  # refetches and redraws the list
+        self.on_error = on_error  # function(message)
+        self.saving = set()  # ids with a write in flight
+
+    def move(self, items, old_index, new_index):
+        """Moves items[old_index] (items as shown) to new_index. Returns
+        False when the move could not be applied and the list was reloaded."""
+        if self.runner.is_pending(f"rebalance:{self.table}"):
+            self.on_reload()  # positions are about to change under us
+            return False
+        item, position, crowded = move(items, old_index, new_index)
+        if crowded:
+            self.todo_list.crowded_tables.add(self.table)
+        if position is None:
+            self.rebalance()
+            self.on_reload()
+            return False
+        item.position = position
+        self.save(item)
+        return True
+
+    def save(self, item):
+        position = item.position
+
+        def finish(updated):
+            self.saving.discard(item.id)
+            if not updated:
+                self.fail("Could not save the new order.")
+            elif item.position != position:
+                self.save(item)  # moved again while this write was in flight
+            else:
+                self.rebalance()
+
+        def fail(exc):
+            self.saving.discard(item.id)
+            self.fail(f"Could not save the new order: {exc}")
+
+        if item.id in self.saving:
+            return  # finish() writes the latest position
+        self.saving.add(item.id)
+        self.runner.run(
+            f"save_position:{self.table}:{item.id}",
+            lambda: self.todo_list.save_position(self.table, item.id, position),
+            on_done=finish,
+            on_error=fail,
+        )
+
+    def rebalance(self):
+        """Rebalances in the background if the list is due one and no
+        position write is in flight."""
+        if self.table not in self.todo_list.crowded_tables or self.saving:
+            return
+        self.runner.run(
+            f"rebalance:{self.table}",
+            lambda: self.todo_list.rebalance_positions(self.table),
+            on_done=lambda moved: self.on_reload(),
+            on_error=lambda exc: print(f"Error rebalancing {self.table}: {exc}"),
+        )
+
+    def fail(self, message):
+        print(message)
+        if self.on_error:
+            self.on_error(message)
+        self.on_reload()  # back to the order the server has
+
+
+# --- SQLite backend: local equivalents of the trigger and RPC ---
+
+
+def register_sqlite_positions(backend):
+    """Gives rows inserted without a position the end of their list and
+    serves rebalance_positions, like the manual order migration does."""
+
+    def last_position(table):
+        rows = backend.select(
+            table, {"select": "position", "order": "position.desc", "limit": "1"}
+        )
+        return rows[0].get("position") if rows else None
+
+    def append_position(table):
+        def hook(row):
+            if row.get("position") is not None:
+                return
+            position = position_between(last_position(table), None)
+            # The hook gets the row the insert echoes, like a BEFORE trigger
+            row["position"] = position
+            backend.update(table, {"id": f"eq.{row['id']}"}, {"position": position})
+
+        return hook
+
+    def rebalance_positions(backend, payload):
+        table = (payload or {}).get("table_name")
+        if table not in ORDERED_TABLES:
+            raise BackendError(
+                f"rebalance_positions: unsupported table {table}", status_code=400
+            )
+        changes = rebalanced(backend.select(table, {"select": "id,position"}))
+        for row, position in changes:
+            backend.update(table, {"id": f"eq.{row['id']}"}, {"position": position})
+        return len(changes)
+
+    for table in ORDERED_TABLES:
+        backend.add_insert_hook(table, append_position(table))
+    backend.register_rpc("rebalance_positions", rebalance_positions)
@@ -0,0 +1,266 @@
+import datetime
+
+SNAPSHOT_EVERY = 100  # ledger entries between balance snapshots
+# History table -> reason of the ledger entries its rows create
+SOURCES = {"task_history": "task_completed", "reward_history": "reward_claimed"}
+
+
+def balance_history(entries, opening=0):
+    """Running balance after each ledger entry (dicts with 'delta'), oldest
+    first, starting from `opening`. Returns a list of (entry, balance)."""
+    balance = opening
+    history = []
+    for entry in entries:
+        balance += int(entry.get("delta") or 0)
+        history.append((entry, balance))
+    return history
+
+
+# --- SQLite backend: local equivalents of the triggers and RPCs ---
+
+
+def register_sqlite_ledger(backend, medals_per_task):
+    """Keeps 'medal_ledger'/'medal_snapshots' documents on history inserts
+    and serves the increment_user_medal_count, reconcile_medal_ledger and
+    get_medal_history RPCs, like the medal ledger migration does, plus
+    complete_tasks and claim_reward from the atomic completion migration."""
+
+    def now():
+        return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    def latest_snapshot(at_most=None):
+        params = {"select": "*", "order": "ledger_id.desc", "limit": "1"}
+        if at_most is not None:
+            params["ledger_id"] = f"lte.{at_most}"
+        rows = backend.select("medal_snapshots", params)
+        return rows[0] if rows else {"ledger_id": 0, "balance": 0}
+
+    def entries(after, up_to=None):
+        params = {"select": "*", "id": f"gt.{after}", "order": "id.asc"}
+        rows = backend.select("medal_ledger", params)
+        return [r for r in rows if up_to is None or r["id"] <= up_to]
+
+    def ledger_balance(up_to=None):
+        snapshot = latest_snapshot(up_to)
+        tail = entries(snapshot["ledger_id"], up_to)
+        return snapshot["balance"] + sum(entry["delta"] for entry in tail)
+
+    def cached_balance():
+        profiles = backend.select("user_profiles", {"select": "*"})
+        return profiles[0].get("medal_count", 0) if profiles else None
+
+    def set_cached_balance(count):
+        profiles = backend.select("user_profiles", {"select": "*"})
+        if profiles:
+            backend.update(
+                "user_profiles",
+                {"id": f"eq.{profiles[0]['id']}"},
+                {"medal_count": count},
+            )
+        else:
+            backend.insert("user_profiles", {"id": "local", "medal_count": count})
+
+    def snapshot():
+        last = latest_snapshot()
+        tail = entries(last["ledger_id"])
+        if len(tail) >= SNAPSHOT_EVERY:
+            backend.insert(
+                "medal_snapshots",
+                {
+                    "ledger_id": tail[-1]["id"],
+                    "balance": last["balance"] + sum(e["delta"] for e in tail),
+                    "taken_at": now(),
+                },
+            )
+
+    def recorded(source_table, source_id, reason):
+        return bool(
+            backend.select(
+                "medal_ledger",
+                {
+                    "select": "id",
+                    "source_table": f"eq.{source_table}",
+                    "source_id": f"eq.{source_id}",
+                    "reason": f"eq.{reason}",
+                },
+            )
+        )
+
+    def append(delta, reason, source_table=None, source_id=None, apply=True):
+        if source_table and recorded(source_table, source_id, reason):
+            return None  # already recorded
+        (entry,) = backend.insert(
+            "medal_ledger",
+            {
+                "delta": delta,
+                "reason": reason,
+                "source_table": source_table,
+                "source_id": source_id,
+                "created_at": now(),
+            },
+        )
+        if apply:
+            set_cached_balance((cached_balance() or 0) + delta)
+            snapshot()
+        return entry
+
+    def on_task_history(row):
+        append(medals_per_task, "task_completed", "task_history", row.get("id"))
+
+    def on_reward_history(row):
+        cost = int(row.get("cost") or 0)
+        append(-cost, "reward_claimed", "reward_history", row.get("id"))
+
+    def increment_user_medal_count(backend, payload):
+        # The history hooks move the balance; this only reports it
+        return {"success": True, "new_medal_count": cached_balance() or 0}
+
+    def reconcile_medal_ledger(backend, payload):
+        added = reversed_ = 0
+        history_ids = {}
+        for table, reason in SOURCES.items():
+            rows = backend.select(table, {"select": "id,cost"})
+            history_ids[table] = {row["id"] for row in rows}
+            for row in rows:
+                delta = (
+                    medals_per_task
+                    if table == "task_history"
+                    else -int(row.get("cost") or 0)
+                )
+                if append(delta, reason, table, row["id"], apply=False):
+                    added += 1
+        for entry in entries(0):
+            table = entry.get("source_table")
+            if (
+                entry["reason"] in SOURCES.values()
+                and entry["source_id"] not in history_ids.get(table, ())
+                and append(
+                    -entry["delta"], "reversal", table, entry["source_id"], False
+                )
+            ):
+                reversed_ += 1
+        cached, ledger, drift = cached_balance(), ledger_balance(), 0
+        opened = backend.select(
+            "medal_ledger", {"select": "id", "reason": "eq.opening_balance"}
+        )
+        if not opened:
+            append((cached or 0) - ledger, "opening_balance", apply=False)
+            ledger = cached or 0
+        elif cached != ledger:
+            drift = (cached or 0) - ledger
+            set_cached_balance(ledger)
+        snapshot()
+        return {
+            "added": added,
+            "reversed": reversed_,
+            "drift": drift,
+            "balance": ledger,
+        }
+
+    def get_medal_history(backend, payload):
+        since = (
+            payload.get("since")
+            or (
+                datetime.datetime.now(datetime.timezone.utc)
+                - datetime.timedelta(days=30)
+            ).isoformat()
+        )
+        before = backend.select(
+            "medal_ledger",
+            {
+                "select": "id",
+                "created_at": f"lt.{since}",
+                "order": "id.desc",
+                "limit": "1",
+            },
+        )
+        cut = before[0]["id"] if before else 0
+        return [
+            {
+                "entry_id": entry["id"],
+                "created_at": entry["created_at"],
+                "delta": entry["delta"],
+                "reason": entry["reason"],
+                "balance": balance,
+            }
+            for entry, balance in balance_history(entries(cut), ledger_balance(cut))
+        ]
+
+    def complete_tasks(backend, payload):
+        history, completed, rescheduled = [], [], []
+        for item in payload.get("completions") or []:
+            found = backend.select("tasks", {"id": f"eq.{item.get('task_id')}"})
+            if not found:
+                continue  # completed by an earlier attempt
+            task = found[0]
+            if (
+                item.get("next_due_date")
+                and str(task.get("due_date"))[:10] != str(item.get("due_date"))[:10]
+            ):
+                continue  # already moved past this occurrence
+            history += backend.insert(
+                "task_history",
+                {
+                    "description": item.get("description") or task.get("task"),
+                    "timestamp": now(),
+                    "username": task.get("username"),
+                    "user_id": task.get("user_id"),
+                },
+            )
+            if item.get("next_due_date"):
+                rescheduled += backend.update(
+                    "tasks",
+                    {"id": f"eq.{task['id']}"},
+                    {
+                        "due_date": item["next_due_date"],
+                        "recurrence": item.get("next_recurrence"),
+                    },
+                )
+            else:
+                backend.delete("tasks", {"id": f"eq.{task['id']}"})
+                completed.append(task["id"])
+        return {
+            "success": True,
+            "new_medal_count": cached_balance() or 0,
+            "history": history,
+            "completed": completed,
+            "tasks": rescheduled,
+        }
+
+    def claim_reward(backend, payload):
+        found = backend.select(
+            "rewards", {"id": f"eq.{payload.get('target_reward_id')}"}
+        )
+        if not found:
+            return {"success": False, "error": "Reward not found."}
+        reward, balance = found[0], cached_balance() or 0
+        cost = int(reward.get("medal_cost") or 0)
+        if balance < cost:
+            return {
+                "success": False,
+                "error": f"Not enough medals ({balance}) for a reward costing {cost}.",
+            }
+        (entry,) = backend.insert(
+            "reward_history",
+            {
+                "description": reward.get("reward"),
+                "timestamp": now(),
+                "cost": cost,
+                "username": reward.get("username"),
+                "user_id": reward.get("user_id"),
+            },
+        )
+        backend.delete("rewards", {"id": f"eq.{reward['id']}"})
+        return {
+            "success": True,
+            "new_medal_count": cached_balance() or 0,
+            "history": entry,
+        }
+
+    backend.add_insert_hook("task_history", on_task_history)
+    backend.add_insert_hook("reward_history", on_reward_history)
+    backend.register_rpc("increment_user_medal_count", increment_user_medal_count)
+    backend.register_rpc("reconcile_medal_ledger", reconcile_medal_ledger)
+    backend.register_rpc("get_medal_history", get_medal_history)
+    backend.register_rpc("complete_tasks", complete_tasks)
+    backend.register_rpc("claim_reward", claim_reward)
@@ -0,0 +1,86 @@
+import threading
+
+import config_loader
+from records import Reward, RewardHistoryEntry, TaskHistoryEntry
+from todo_view import HISTORY_QUERY, REWARDS_QUERY
+
+IDLE_DELAY = 1.5  # seconds with no backend traffic before prefetching starts
+IDLE_POLL = 0.25
+MAX_IDLE_WAIT = 30  # give up if the connection never goes quiet
+PREFETCH_TTL = 120  # warmed rows stay fresh longer than normal reads
+
+# Data each route fetches when it is opened, as (table, select params, decoder)
+ROUTE_QUERIES = {
+    "/rewards": [("rewards", REWARDS_QUERY, Reward.from_rows)],
+    "/history": [
+        ("task_history", HISTORY_QUERY, TaskHistoryEntry.from_rows),
+        ("reward_history", HISTORY_QUERY, RewardHistoryEntry.from_rows),
+    ],
+}
+NEIGHBOUR_ROUTES = ("/rewards", "/history")  # next hops from "/"
+
+
+class Prefetcher:
+    """Warms the repository read cache for neighbouring routes at low priority.
+
+    Runs one query at a time on a background thread, only once the repository
+    has been idle for IDLE_DELAY seconds, and stops when cancelled or once the
+    per-session byte budget is spent. Disabled on metered connections."""
+
+    def __init__(self, repository, config=None, idle_delay=IDLE_DELAY):
+        config = config or config_loader.get_config()
+        self.repository = repository
+        self.idle_delay = idle_delay
+        self.budget_bytes = config.prefetch_budget_kb * 1024
+        self.spent_bytes = 0
+        self.disabled_reason = None
+        if not config.prefetch_enabled:
+            self.disabled_reason = "disabled in config"
+        elif config.metered_connection:
+            self.disabled_reason = "metered connection"
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def schedule(self, routes=NEIGHBOUR_ROUTES):
+        """Starts prefetching in the background unless already running or disabled."""
+        if self.disabled_reason:
+            print(f"Prefetch skipped: {self.disabled_reason}.")
+            return False
+        if self._thread and self._thread.is_alive():
+            return False
+        self._cancel.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(tuple(routes),), daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def cancel(self):
+        """Stops after the query in progress (if any)."""
+        self._cancel.set()
+
+    def _wait_for_idle(self):
+        waited = 0.0
+        while self.repository.idle_for() < self.idle_delay:
+            if self._cancel.wait(IDLE_POLL):
+                return False
+            waited += IDLE_POLL
+            if waited >= MAX_IDLE_WAIT:
+                print("Prefetch gave up: connection never went idle.")
+                return False
+        return not self._cancel.is_set()
+
+    def _run(self, routes):
+        for route in routes:
+            for table, params, decode in ROUTE_QUERIES.get(route, ()):
+                if self.spent_bytes >= self.budget_bytes:
+                    print(f"Prefetch budget spent ({self.spent_bytes} bytes).")
+                    return
+                if not self._wait_for_idle():
+                    return
+                size = self.repository.prefetch(
+                    table, params, ttl=PREFETCH_TTL, decode=decode
+                )
+                self.spent_bytes += size
+                if size:
+                    print(f"Prefetched {table} for {route} ({size} bytes).")
@@ -0,0 +1,94 @@
+import sys
+
+
+def _shared(value):
+    # Dates repeat across rows; intern them so equal values share one string
+    return sys.intern(value) if value.__class__ is str else value
+
+
+class Record:
+    """Base for the row types below.
+
+    Rows are held in fixed __slots__ instead of a per-row dict: a decoded
+    row costs a fraction of the JSON dict's memory, and attribute access is
+    faster than dict.get. Only the columns the app uses are kept. get()
+    lets code that also handles raw dict rows (DueDateIndex, TableSync)
+    take either."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Decodes a list of PostgREST row dicts (unknown columns are dropped)."""
+        fields = cls.__slots__
+        return [cls(*map(row.get, fields)) for row in rows]
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Task(Record):
+    __slots__ = (
+        "id",
+        "task",
+        "done",
+        "due_date",
+        "updated_at",
+        "recurrence",
+        "position",
+    )
+
+    def __init__(
+        self,
+        id,
+        task,
+        done=False,
+        due_date=None,
+        updated_at=None,
+        recurrence=None,
+        position=None,
+    ):
+        self.id = id
+        self.task = task
+        self.done = done
+        self.due_date = _shared(due_date)
+        self.updated_at = updated_at
+        self.recurrence = _shared(recurrence)  # recurrence.Rule text, or None
+        self.position = position  # manual order, see manual_order.py
+
+
+class Reward(Record):
+    __slots__ = ("id", "reward", "medal_cost", "updated_at", "position")
+
+    def __init__(self, id, reward, medal_cost=0, updated_at=None, position=None):
+        self.id = id
+        self.reward = reward
+        self.medal_cost = medal_cost or 0
+        self.updated_at = updated_at
+        self.position = position
+
+
+class TaskHistoryEntry(Record):
+    __slots__ = ("id", "description", "timestamp")
+
+    def __init__(self, id, description, timestamp=None):
+        self.id = id
+        self.description = description
+        self.timestamp = timestamp
+
+
+class RewardHistoryEntry(Record):
+    __slots__ = ("id", "description", "timestamp", "cost")
+
+    def __init__(self, id, description, timestamp=None, cost=0):
+        self.id = id
+        self.description = description
+        self.timestamp = timestamp
+        self.cost = cost or 0
@@ -0,0 +1,209 @@
+import calendar
+import datetime
+import itertools
+
+# Recurrence rules are stored on the task as a subset of RFC 5545 RRULE text:
+#   FREQ=DAILY|WEEKLY|MONTHLY[;INTERVAL=n][;BYDAY=MO,WE,FR][;COUNT=n][;UNTIL=YYYYMMDD]
+# The task row holds only its next occurrence (due_date). Later occurrences
+# are computed on demand for the dates a view shows, and completing one moves
+# due_date forward, so a habit is always one row however long it runs.
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+WEEKDAY_CODES = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+OCCURRENCE_WINDOW = 60  # days ahead that open-ended views expand a rule over
+
+# Choices offered when adding a task (label -> rule text)
+PRESETS = {
+    "Does not repeat": None,
+    "Daily": "FREQ=DAILY",
+    "Weekdays": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+    "Weekly": "FREQ=WEEKLY",
+    "Monthly": "FREQ=MONTHLY",
+}
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _add_months(day, months, day_of_month):
+    """day_of_month in the month `months` after day's, or None if too short."""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    if day_of_month > calendar.monthrange(year, month + 1)[1]:
+        return None
+    return datetime.date(year, month + 1, day_of_month)
+
+
+class Rule:
+    """A parsed recurrence rule. Occurrences are counted from an anchor: the
+    task's current due date, which is itself the first occurrence."""
+
+    __slots__ = ("freq", "interval", "weekdays", "count", "until")
+
+    def __init__(self, freq, interval=1, weekdays=(), count=None, until=None):
+        self.freq = freq
+        self.interval = interval
+        self.weekdays = tuple(sorted(set(weekdays)))  # 0 = Monday
+        self.count = count  # occurrences left, the anchor included
+        self.until = until
+
+    @classmethod
+    def parse(cls, text):
+        """Parses rule text. Returns None when empty or not in the subset."""
+        if not text:
+            return None
+        parts = {}
+        for part in str(text).upper().split(";"):
+            key, _, value = part.strip().partition("=")
+            if key:
+                parts[key] = value
+        try:
+            freq = parts.pop("FREQ")
+            interval = int(parts.pop("INTERVAL", 1))
+            weekdays = [
+                WEEKDAY_CODES.index(code)
+                for code in parts.pop("BYDAY", "").split(",")
+                if code
+            ]
+            count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+            until = parts.pop("UNTIL", None)
+            until = (
+                datetime.datetime.strptime(until[:8], "%Y%m%d").date()
+                if until
+                else None
+            )
+        except (KeyError, ValueError):
+            return None
+        if (
+            parts
+            or freq not in FREQUENCIES
+            or interval < 1
+            or (weekdays and freq != "WEEKLY")
+            or (count is not None and count < 1)
+        ):
+            return None
+        return cls(freq, interval, weekdays, count, until)
+
+    def to_text(self):
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.weekdays:
+            parts.append("BYDAY=" + ",".join(WEEKDAY_CODES[d] for d in self.weekdays))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until:
+            parts.append(f"UNTIL={self.until:%Y%m%d}")
+        return ";".join(parts)
+
+    def describe(self):
+        """Short label for the task list ('daily', 'every 2 weeks on Mo, Th')."""
+        unit = {"DAILY": "day", "WEEKLY": "week", "MONTHLY": "month"}[self.freq]
+        if self.interval == 1:
+            label = {"DAILY": "daily", "WEEKLY": "weekly", "MONTHLY": "monthly"}[
+                self.freq
+            ]
+        else:
+            label = f"every {self.interval} {unit}s"
+        if self.weekdays:
+            label += " on " + ", ".join(WEEKDAY_CODES[d].title() for d in self.weekdays)
+        if self.until:
+            label += f" until {self.until.isoformat()}"
+        return label
+
+    def _iterate(self, anchor, start):
+        """Occurrences >= start, in order and without an end. Jumps straight
+        to start, so the cost does not grow with the age of the series."""
+        if self.freq == "DAILY":
+            skip = max(0, -(-(start - anchor).days // self.interval))
+            day = anchor + datetime.timedelta(days=skip * self.interval)
+            step = datetime.timedelta(days=self.interval)
+            while True:
+                yield day
+                day += step
+        elif self.freq == "WEEKLY":
+            weekdays = self.weekdays or (anchor.weekday(),)
+            week = anchor - datetime.timedelta(days=anchor.weekday())
+            skip = max(0, (start - week).days // 7 // self.interval)
+            week += datetime.timedelta(weeks=skip * self.interval)
+            while True:
+                for weekday in weekdays:
+                    day = week + datetime.timedelta(days=weekday)
+                    if day >= start and day >= anchor:
+                        yield day
+                week += datetime.timedelta(weeks=self.interval)
+        else:
+            months = (start.year - anchor.year) * 12 + start.month - anchor.month
+            step = max(0, months // self.interval)
+            while True:
+                day = _add_months(anchor, step * self.interval, anchor.day)
+                if day is not None and day >= start:
+                    yield day
+                step += 1
+
+    def first_on_or_after(self, day):
+        """First date on or after `day` the rule itself generates (e.g. the
+        Monday after a weekend for a weekday rule), or None if that is past
+        UNTIL. A new series must be anchored there: the anchor counts as
+        the first occurrence."""
+        day = _as_date(day)
+        if day is None:
+            return None
+        first = next(self._iterate(day, day))
+        if self.until and first > self.until:
+            return None
+        return first
+
+    def between(self, anchor, start, end):
+        """Occurrences of the series anchored at `anchor` from start to end
+        (inclusive), as dates."""
+        anchor, start, end = _as_date(anchor), _as_date(start), _as_date(end)
+        if anchor is None or start is None or end is None:
+            return []
+        if self.until and self.until < end:
+            end = self.until
+        occurrences = []
+        series = self._iterate(anchor, max(start, anchor))
+        if self.count is not None:
+            # COUNT limits the whole series, so count from the anchor
+            series = itertools.islice(self._iterate(anchor, anchor), self.count)
+        for day in series:
+            if day > end:
+                break
+            if day >= start:
+                occurrences.append(day)
+        return occurrences
+
+    def next_after(self, anchor, day):
+        """(date, rule) of the first occurrence after `day`, with the rule to
+        store alongside it (COUNT reduced by the occurrences passed), or
+        (None, None) once the series has ended."""
+        anchor, day = _as_date(anchor), _as_date(day)
+        if anchor is None or day is None:
+            return None, None
+        passed = 0
+        for occurrence in self._iterate(anchor, anchor if self.count else day):
+            if self.until and occurrence > self.until:
+                break
+            if self.count is not None and passed >= self.count:
+                break
+            if occurrence > day:
+                rule = self
+                if self.count is not None:
+                    rule = Rule(
+                        self.freq,
+                        self.interval,
+                        self.weekdays,
+                        self.count - passed,
+                        self.until,
+                    )
+                return occurrence, rule
+            passed += 1
+        return None, None
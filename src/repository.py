@@ -0,0 +1,986 @@
+import datetime
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.exceptions import HTTPError, RequestException, Timeout
+from urllib3.exceptions import HTTPError as TransportError
+from urllib3.util.request import ACCEPT_ENCODING
+
+from json_codec import get_codec
+from search_index import tokenize, trigrams
+from resilience import (
+    DEFAULT_TIMEOUT,
+    UNSENT,
+    CircuitOpenError,
+    classify,
+    get_resilience,
+)
+
+# PostgREST-style query parameters are the lingua franca of every backend:
+#   {"select": "*", "order": "timestamp.desc", "id": "eq.5", "limit": "20"}
+# Anything that is not one of these reserved keys is a column filter.
+RESERVED_PARAMS = ("select", "order", "limit", "offset")
+
+DEFAULT_CACHE_TTL = 15  # seconds a cached select stays fresh
+CACHE_MAX_ENTRIES = 64  # distinct selects kept; least recently used go first
+STALE_RETENTION = 600  # seconds an expired entry is kept as outage fallback
+STREAM_CHUNK = 64 * 1024  # decompressed bytes per read of a response body
+
+# RPCs that only read, so retrying them can never double-apply anything
+IDEMPOTENT_RPCS = {
+    "get_due_task_counts",
+    "get_user_stats",
+    "search_history",
+    "get_medal_history",
+}
+
+
+class BackendError(Exception):
+    """Raised by backends. `retryable` marks transient (network/5xx) failures,
+    `unsent` marks failures where the request never reached the server."""
+
+    def __init__(self, message, status_code=None, retryable=False, unsent=False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.unsent = unsent
+
+
+def parse_filter(value):
+    """Splits a PostgREST filter value like 'eq.5' or 'not.is.null' into
+    (negated, operator, operand)."""
+    negated = False
+    if value.startswith("not."):
+        negated = True
+        value = value[4:]
+    operator, _, operand = value.partition(".")
+    return negated, operator, operand
+
+
+def parse_order(value):
+    """Turns 'timestamp.desc,id.asc' into [('timestamp', True), ('id', False)]."""
+    columns = []
+    for part in value.split(","):
+        pieces = part.strip().split(".")
+        columns.append((pieces[0], "desc" in pieces[1:]))
+    return columns
+
+
+# --- Backends ---
+
+
+class HttpBackend:
+    """Talks to PostgREST directly with a pooled requests.Session."""
+
+    name = "http"
+
+    def __init__(self, base_url, api_key, timeout=DEFAULT_TIMEOUT, codec=None):
+        self.api_url = f"{base_url}/rest/v1" if base_url else None
+        self.rpc_url = f"{base_url}/rest/v1/rpc" if base_url else None
+        self.api_key = api_key
+        self.timeout = timeout
+        self.codec = codec or get_codec()  # see json_codec.py
+        self.access_token = None
+        self.session = requests.Session()
+        # Every encoding urllib3 can decode here: gzip, deflate, plus br when
+        # a brotli package is installed
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self._transfer = threading.local()
+
+    def set_auth(self, access_token):
+        self.access_token = access_token
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {access_token}",
+                "apikey": self.api_key,
+                "Content-Type": "application/json",
+                "Prefer": "return=representation",
+            }
+        )
+
+    def request(
+        self, method, path, base_url=None, params=None, json_body=None, headers=None
+    ):
+        """Sends one request and decodes the PostgREST response."""
+        current_base_url = base_url or self.api_url
+        if not current_base_url:
+            raise BackendError(
+                f"Base URL ({'RPC' if base_url else 'Data'}) not configured."
+            )
+        if not self.access_token:
+            raise BackendError("Access token not set for API call.")
+
+        url = f"{current_base_url}/{path}"
+        print(f"Making {method} request to: {url}")
+        body = None
+        if json_body is not None:
+            body = self.codec.dumps(json_body)
+            headers = {"Content-Type": "application/json", **(headers or {})}
+        try:
+            response = self.session.request(
+                method,
+                url,
+                params=params,
+                data=body,
+                headers=headers,
+                timeout=self.timeout,
+                stream=True,
+            )
+            print(f"Response Status: {response.status_code}")
+            response.raise_for_status()
+            content = self._read_body(response, method, url)
+        except HTTPError as e:
+            status = e.response.status_code
+            if status == 401:
+                print("Authorization Error (401): Token might be expired or invalid.")
+            raise BackendError(
+                f"HTTP Error during {method} {url}: {status} - {e.response.text}",
+                status_code=status,
+                retryable=status >= 500 or status == 429,
+            )
+        except Timeout as e:
+            raise BackendError(
+                f"Timeout Error during {method} {url}",
+                retryable=True,
+                unsent=classify(e) == UNSENT,
+            )
+        except RequestException as e:
+            raise BackendError(
+                f"Network Error during {method} {url}: {e}",
+                retryable=True,
+                unsent=classify(e) == UNSENT,
+            )
+
+        if response.status_code == 204:  # No Content (e.g., DELETE)
+            return True
+        if not content:
+            if method == "GET":
+                return []
+            if method == "POST" and response.status_code == 201:
+                print(f"Warning: POST to {path} returned 201 Created but empty body.")
+                return {}  # Success but no data returned
+            if base_url == self.rpc_url:
+                print(f"Warning: RPC {path} returned 200 OK but empty body.")
+                return None
+            return True
+        try:
+            return self.codec.loads(content)
+        except self.codec.DecodeError as e:
+            raise BackendError(
+                f"JSON Decode Error during {method} {url}: {e} - Response: {content[:200]!r}"
+            )
+
+    def _read_body(self, response, method, url):
+        """Reads the body, decompressing chunk by chunk as it arrives, and
+        records (bytes on the wire, decoded bytes) for take_transfer().
+
+        Reading straight from urllib3 skips requests' exception wrapping, so
+        a timeout or dropped connection mid-body, or a body cut short of its
+        Content-Length, is turned into a retryable BackendError here."""
+        chunks = []
+        try:
+            for chunk in response.raw.stream(STREAM_CHUNK, decode_content=True):
+                chunks.append(chunk)
+        except TransportError as e:
+            raise BackendError(
+                f"Network Error reading {method} {url}: {e}", retryable=True
+            )
+        finally:
+            response.close()
+        content = b"".join(chunks)
+        wire_bytes = response.raw.tell()
+        self._transfer.value = (wire_bytes, len(content))
+        expected = response.headers.get("Content-Length")
+        if expected and expected.isdigit() and wire_bytes < int(expected):
+            raise BackendError(
+                f"Network Error reading {method} {url}: body truncated at "
+                f"{wire_bytes} of {expected} bytes",
+                retryable=True,
+            )
+        return content
+
+    def take_transfer(self):
+        """(wire_bytes, body_bytes) of this thread's last response, or None."""
+        transfer = getattr(self._transfer, "value", None)
+        self._transfer.value = None
+        return transfer
+
+    def select(self, table, params):
+        return self.request("GET", table, params=params)
+
+    def insert(self, table, rows):
+        return self.request("POST", table, json_body=rows)
+
+    def update(self, table, filters, values):
+        return self.request("PATCH", table, params=filters, json_body=values)
+
+    def delete(self, table, filters):
+        return self.request("DELETE", table, params=filters)
+
+    def rpc(self, function, payload):
+        return self.request(
+            "POST", function, base_url=self.rpc_url, json_body=payload or {}
+        )
+
+
+class SupabaseBackend:
+    """Uses a supabase-py Client (the path database.Database used to hand-roll)."""
+
+    name = "supabase"
+
+    def __init__(self, client):
+        self.client = client
+
+    def set_auth(self, access_token):
+        # supabase-py carries the session itself (auth.set_session).
+        pass
+
+    def _apply(self, query, params):
+        for key, value in (params or {}).items():
+            if key in RESERVED_PARAMS:
+                continue
+            negated, operator, operand = parse_filter(str(value))
+            if negated:
+                query = query.not_.filter(key, operator, operand)
+            else:
+                query = query.filter(key, operator, operand)
+        return query
+
+    def _execute(self, query):
+        try:
+            response = query.execute()
+        except Exception as e:
+            # postgrest APIError carries a code; transport errors do not.
+            retryable = not hasattr(e, "code")
+            raise BackendError(f"Supabase error: {e}", retryable=retryable)
+        if response is None:
+            raise BackendError("Supabase query execution resulted in None object.")
+        return response.data
+
+    def select(self, table, params):
+        params = params or {}
+        query = self._apply(
+            self.client.table(table).select(params.get("select", "*")), params
+        )
+        for column, descending in (
+            parse_order(params["order"]) if "order" in params else []
+        ):
+            query = query.order(column, desc=descending)
+        if "limit" in params or "offset" in params:
+            offset = int(params.get("offset", 0))
+            limit = int(params.get("limit", 1000))
+            query = query.range(offset, offset + limit - 1)
+        data = self._execute(query)
+        return data if data is not None else []
+
+    def insert(self, table, rows):
+        return self._execute(self.client.table(table).insert(rows))
+
+    def update(self, table, filters, values):
+        return self._execute(
+            self._apply(self.client.table(table).update(values), filters)
+        )
+
+    def delete(self, table, filters):
+        self._execute(self._apply(self.client.table(table).delete(), filters))
+        return True
+
+    def rpc(self, function, payload):
+        return self._execute(self.client.rpc(function, payload or {}))
+
+
+class SQLiteBackend:
+    """Local single-user stand-in. Rows are stored as JSON documents per table,
+    so any column the app writes can be filtered and ordered on."""
+
+    name = "sqlite"
+
+    _OPERATORS = {
+        "eq": "=",
+        "neq": "!=",
+        "gt": ">",
+        "gte": ">=",
+        "lt": "<",
+        "lte": "<=",
+        "like": "LIKE",
+        "ilike": "LIKE",
+    }
+    # Emulates the delta sync migration: updated_at stamps and tombstones
+    SYNCED_TABLES = ("tasks", "rewards")
+    # Emulates the search_history migration: a trigram index on description
+    SEARCHABLE_TABLES = ("task_history", "reward_history")
+    SEARCH_THRESHOLD = 0.6  # share of query trigrams a match needs, like <%
+    SEARCH_MAX_PAGE = 100
+
+    def __init__(self, path="todos.db"):
+        self.path = path
+        self.codec = get_codec()  # documents are read back with the fast codec
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.rpc_functions = {}
+        self.insert_hooks = {}  # table -> [function(row)], like AFTER INSERT triggers
+        self._tables = set()
+        self._fts = True  # cleared if this sqlite build lacks FTS5 trigrams
+        self.register_rpc("increment_user_medal_count", self._increment_medals)
+        self.register_rpc("get_due_task_counts", self._due_task_counts)
+        self.register_rpc("search_history", self._search_history)
+
+    def set_auth(self, access_token):
+        pass
+
+    def register_rpc(self, name, function):
+        """Registers a Python implementation for an RPC: function(backend, payload)."""
+        self.rpc_functions[name] = function
+
+    def add_insert_hook(self, table, function):
+        """Registers function(row), called for each row inserted into table."""
+        self.insert_hooks.setdefault(table, []).append(function)
+
+    def _ensure_table(self, table):
+        if table in self._tables:
+            return
+        if not table.isidentifier():
+            raise BackendError(f"Invalid table name: {table}")
+        self.connection.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" (pk INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL)'
+        )
+        if table in self.SEARCHABLE_TABLES:
+            self._ensure_search_table(table)
+        self._tables.add(table)
+
+    def _ensure_search_table(self, table):
+        """Creates the FTS5 trigram index of table's descriptions (rowid = pk)
+        and fills it from rows written before it existed."""
+        if not self._fts:
+            return
+        exists = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (f"{table}_search",)
+        ).fetchone()
+        if exists:
+            return
+        try:
+            self.connection.execute(
+                f'CREATE VIRTUAL TABLE "{table}_search" '
+                "USING fts5(description, tokenize = 'trigram')"
+            )
+        except sqlite3.OperationalError as e:
+            print(f"SQLite trigram search unavailable, scanning instead: {e}")
+            self._fts = False
+            return
+        self.connection.execute(
+            f'INSERT INTO "{table}_search" (rowid, description) '
+            f"SELECT pk, coalesce(json_extract(data, '$.description'), '') "
+            f'FROM "{table}"'
+        )
+        self.connection.commit()
+
+    def _index_description(self, table, pk, row):
+        if self._fts and table in self.SEARCHABLE_TABLES:
+            self.connection.execute(
+                f'INSERT OR REPLACE INTO "{table}_search" (rowid, description) '
+                "VALUES (?, ?)",
+                (pk, str(row.get("description") or "")),
+            )
+
+    @staticmethod
+    def _coerce(operand):
+        # PostgREST sends every operand as text; compare numbers as numbers.
+        for cast in (int, float):
+            try:
+                return cast(operand)
+            except ValueError:
+                pass
+        if operand in ("true", "false"):
+            return operand == "true"
+        return operand
+
+    def _where(self, params):
+        clauses, args = [], []
+        for key, value in (params or {}).items():
+            if key in RESERVED_PARAMS:
+                continue
+            column = f"json_extract(data, '$.{key}')"
+            negated, operator, operand = parse_filter(str(value))
+            if operator == "is":
+                clause = f"{column} IS {'NULL' if operand == 'null' else ('1' if operand == 'true' else '0')}"
+            elif operator == "in":
+                items = [
+                    self._coerce(v.strip().strip('"'))
+                    for v in operand.strip("()").split(",")
+                    if v.strip()
+                ]
+                clause = f"{column} IN ({','.join('?' * len(items))})" if items else "0"
+                args.extend(items)
+            elif operator in self._OPERATORS:
+                if operator in ("like", "ilike"):
+                    operand = operand.replace("*", "%")
+                    column = f"lower({column})" if operator == "ilike" else column
+                    operand = operand.lower() if operator == "ilike" else operand
+                clause = f"{column} {self._OPERATORS[operator]} ?"
+                args.append(
+                    self._coerce(operand)
+                    if operator not in ("like", "ilike")
+                    else operand
+                )
+            else:
+                raise BackendError(
+                    f"SQLite backend does not support filter '{key}={value}'"
+                )
+            clauses.append(f"NOT ({clause})" if negated else clause)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    @staticmethod
+    def _project(row, select):
+        if not select or select == "*":
+            return row
+        columns = [c.strip() for c in select.split(",")]
+        return {c: row.get(c) for c in columns}
+
+    def select(self, table, params):
+        params = params or {}
+        with self.lock:
+            self._ensure_table(table)
+            where, args = self._where(params)
+            sql = f'SELECT data FROM "{table}"{where}'
+            if "order" in params:
+                sql += " ORDER BY " + ", ".join(
+                    f"json_extract(data, '$.{column}') {'DESC' if descending else 'ASC'}"
+                    for column, descending in parse_order(params["order"])
+                )
+            else:
+                sql += " ORDER BY pk"
+            if "limit" in params or "offset" in params:
+                sql += " LIMIT ? OFFSET ?"
+                args += [int(params.get("limit", -1)), int(params.get("offset", 0))]
+            rows = self.connection.execute(sql, args).fetchall()
+        loads = self.codec.loads
+        return [self._project(loads(data), params.get("select")) for (data,) in rows]
+
+    def insert(self, table, rows):
+        created = []
+        with self.lock:
+            self._ensure_table(table)
+            for row in rows if isinstance(rows, list) else [rows]:
+                row = dict(row)
+                if table in self.SYNCED_TABLES:
+                    row["updated_at"] = self._now()
+                cursor = self.connection.execute(
+                    f'INSERT INTO "{table}" (data) VALUES (?)', (json.dumps(row),)
+                )
+                if row.get("id") is None:
+                    row["id"] = cursor.lastrowid
+                    self.connection.execute(
+                        f'UPDATE "{table}" SET data = ? WHERE pk = ?',
+                        (json.dumps(row), cursor.lastrowid),
+                    )
+                self._index_description(table, cursor.lastrowid, row)
+                created.append(row)
+            self.connection.commit()
+        for hook in self.insert_hooks.get(table, ()):
+            for row in created:
+                hook(row)
+        return created
+
+    def update(self, table, filters, values):
+        updated = []
+        with self.lock:
+            self._ensure_table(table)
+            where, args = self._where(filters)
+            for pk, data in self.connection.execute(
+                f'SELECT pk, data FROM "{table}"{where}', args
+            ).fetchall():
+                row = json.loads(data)
+                row.update(values)
+                if table in self.SYNCED_TABLES:
+                    row["updated_at"] = self._now()
+                self.connection.execute(
+                    f'UPDATE "{table}" SET data = ? WHERE pk = ?', (json.dumps(row), pk)
+                )
+                self._index_description(table, pk, row)
+                updated.append(row)
+            self.connection.commit()
+        return updated
+
+    def delete(self, table, filters):
+        with self.lock:
+            self._ensure_table(table)
+            where, args = self._where(filters)
+            if table in self.SYNCED_TABLES:
+                self._record_tombstones(table, where, args)
+            if self._fts and table in self.SEARCHABLE_TABLES:
+                self.connection.execute(
+                    f'DELETE FROM "{table}_search" WHERE rowid IN '
+                    f'(SELECT pk FROM "{table}"{where})',
+                    args,
+                )
+            self.connection.execute(f'DELETE FROM "{table}"{where}', args)
+            self.connection.commit()
+        return True
+
+    @staticmethod
+    def _now():
+        return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    def _record_tombstones(self, table, where, args):
+        self._ensure_table("deleted_rows")
+        deleted_at = self._now()
+        for (data,) in self.connection.execute(
+            f'SELECT data FROM "{table}"{where}', args
+        ).fetchall():
+            tombstone = {
+                "table_name": table,
+                "row_id": json.loads(data).get("id"),
+                "deleted_at": deleted_at,
+            }
+            self.connection.execute(
+                'INSERT INTO "deleted_rows" (data) VALUES (?)', (json.dumps(tombstone),)
+            )
+
+    def rpc(self, function, payload):
+        implementation = self.rpc_functions.get(function)
+        if implementation is None:
+            raise BackendError(
+                f"RPC '{function}' is not available in the SQLite backend",
+                status_code=404,
+            )
+        return implementation(self, payload or {})
+
+    # --- Local equivalents of the Supabase SQL functions ---
+
+    @staticmethod
+    def _increment_medals(backend, payload):
+        profiles = backend.select("user_profiles", {"select": "*"})
+        count = (profiles[0].get("medal_count", 0) if profiles else 0) + int(
+            payload.get("amount_param", 0)
+        )
+        if profiles:
+            backend.update(
+                "user_profiles",
+                {"id": f"eq.{profiles[0]['id']}"},
+                {"medal_count": count},
+            )
+        else:
+            backend.insert("user_profiles", {"id": "local", "medal_count": count})
+        return {"success": True, "new_medal_count": count}
+
+    @staticmethod
+    def _due_task_counts(backend, payload):
+        tasks = backend.select(
+            "tasks",
+            {
+                "select": "due_date",
+                "due_date": f"gte.{payload['start_date']}",
+                "order": "due_date.asc",
+            },
+        )
+        counts = {}
+        for task in tasks:
+            day = str(task.get("due_date") or "")[:10]
+            if day and day <= payload["end_date"]:
+                counts[day] = counts.get(day, 0) + 1
+        return [{"due_date": day, "task_count": n} for day, n in sorted(counts.items())]
+
+    def _search_candidates(self, table, words):
+        """(pk, id, description) of the rows of table that may match the
+        query words: those sharing a trigram with them, looked up in the
+        FTS5 index. The flag tells whether the lookup was fuzzy."""
+        grams = {word[i : i + 3] for word in words for i in range(len(word) - 2)}
+        fuzzy = bool(grams) and self._fts
+        columns = (
+            "t.pk, json_extract(t.data, '$.id'), json_extract(t.data, '$.description')"
+        )
+        with self.lock:
+            self._ensure_table(table)
+            if fuzzy:
+                match = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+                sql = (
+                    f'SELECT {columns} FROM "{table}_search" s '
+                    f'JOIN "{table}" t ON t.pk = s.rowid WHERE "{table}_search" MATCH ?'
+                )
+                args = [match]
+            else:
+                # Words too short for trigrams (or no FTS5): substring scan
+                sql = f'SELECT {columns} FROM "{table}" t WHERE ' + " AND ".join(
+                    ["json_extract(t.data, '$.description') LIKE ?"] * len(words)
+                )
+                args = [f"%{word}%" for word in words]
+            return self.connection.execute(sql, args).fetchall(), fuzzy
+
+    @staticmethod
+    def _search_history(backend, payload):
+        """Ranked, keyset-paginated search over both history tables, ordered
+        by (rank desc, kind, id desc) like the SQL function. The rank is the
+        share of the query's (pg_trgm style) trigrams found in the text."""
+        words = tokenize(payload.get("query"))
+        if not words:
+            return []
+        wanted = set().union(*map(trigrams, words))
+        page_size = min(
+            max(int(payload.get("page_size") or 20), 1), backend.SEARCH_MAX_PAGE
+        )
+        after = None
+        if payload.get("after_rank") is not None:
+            after = (
+                -float(payload["after_rank"]),
+                str(payload.get("after_kind") or ""),
+                -int(payload.get("after_id") or 0),
+            )
+        ranks = {}  # description -> rank; recurring tasks repeat descriptions
+        matches = []
+        for kind in backend.SEARCHABLE_TABLES:
+            candidates, fuzzy = backend._search_candidates(kind, words)
+            for pk, row_id, description in candidates:
+                rank = ranks.get(description)
+                if rank is None:
+                    found = set().union(*map(trigrams, tokenize(description)))
+                    rank = ranks[description] = len(wanted & found) / len(wanted)
+                if fuzzy and rank < backend.SEARCH_THRESHOLD:
+                    continue
+                key = (-rank, kind, -int(row_id or 0))
+                if after is None or key > after:
+                    matches.append((key, pk))
+        page = []
+        for (negated_rank, kind, _), pk in heapq.nsmallest(page_size, matches):
+            with backend.lock:
+                (data,) = backend.connection.execute(
+                    f'SELECT data FROM "{kind}" WHERE pk = ?', (pk,)
+                ).fetchone()
+            row = backend.codec.loads(data)
+            page.append(
+                {
+                    "kind": kind,
+                    "id": row.get("id"),
+                    "description": row.get("description"),
+                    "timestamp": row.get("timestamp"),
+                    "cost": row.get("cost"),
+                    "rank": -negated_rank,
+                }
+            )
+        return page
+
+
+# --- Cross-cutting concerns ---
+
+
+class MetricsRecorder:
+    """Metrics hook that aggregates calls per (operation, target)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def __call__(self, event):
+        key = (event["op"], event["target"])
+        with self.lock:
+            entry = self.stats.setdefault(
+                key,
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "cache_hits": 0,
+                    "stale": 0,
+                    "seconds": 0.0,
+                    "wire_bytes": 0,
+                    "body_bytes": 0,
+                },
+            )
+            entry["calls"] += 1
+            entry["seconds"] += event["seconds"]
+            if not event["ok"]:
+                entry["errors"] += 1
+            if event["cache_hit"]:
+                entry["cache_hits"] += 1
+            if event.get("stale"):
+                entry["stale"] += 1
+            entry["wire_bytes"] += event.get("wire_bytes") or 0
+            entry["body_bytes"] += event.get("body_bytes") or 0
+
+    def snapshot(self):
+        with self.lock:
+            return {key: dict(value) for key, value in self.stats.items()}
+
+
+class Repository:
+    """Single data-access layer for tasks, rewards, history and RPCs.
+
+    Every call goes through one backend and picks up the same read cache,
+    retry/circuit-breaker policy and metrics hooks. Like the old
+    _make_request, failures are logged and returned as None. While the
+    backend is failing, selects fall back to the last cached rows.
+    """
+
+    def __init__(self, backend, cache_ttl=DEFAULT_CACHE_TTL, resilience=None):
+        self.backend = backend
+        self.cache_ttl = cache_ttl
+        self.resilience = resilience or get_resilience()
+        self.metrics_hooks = []
+        self.access_token = None
+        self.identity = None  # whose rows the cache holds, see set_auth
+        # (table, params, decode) -> (expires_at, rows), least recently used
+        # first; kept for STALE_RETENTION after expiry as outage fallback
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # transfer and whether any attempt may have reached the server, for
+        # this thread's last call
+        self._last_call = threading.local()
+        self.in_flight = 0  # backend calls currently running
+        self.last_activity = time.monotonic()  # when the last call finished
+
+    def add_metrics_hook(self, hook):
+        """Registers hook(event) called after every operation. The event dict has
+        op, target, backend, ok, cache_hit, stale, seconds and error keys, plus
+        wire_bytes/body_bytes (compressed vs decoded size) for HTTP calls."""
+        self.metrics_hooks.append(hook)
+
+    def set_auth(self, access_token, identity=None):
+        """Points the backend at access_token. Cached reads are dropped only
+        when the identity (user id, or the token itself when unknown)
+        changes: re-validating or refreshing the same session keeps them.
+        Returns True if the identity changed."""
+        if access_token != self.access_token:
+            self.backend.set_auth(access_token)
+            self.access_token = access_token
+        identity = identity or access_token
+        if identity == self.identity:
+            return False
+        self.identity = identity
+        self.invalidate()  # A new identity must not see the previous user's rows
+        return True
+
+    def invalidate(self, table=None):
+        """Drops cached reads for one table, or all of them."""
+        with self._cache_lock:
+            if table is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == table]:
+                    del self._cache[key]
+
+    def _invalidate_if_sent(self, table):
+        """Drops cached reads of table after a write, unless no attempt of it
+        reached the server (unsent or circuit open): a write whose response
+        was lost may still have been applied."""
+        if self._last_call.sent:
+            self.invalidate(table)
+
+    def metrics(self):
+        """Resilience state (breakers, retries) for this repository's backend."""
+        snapshot = self.resilience.snapshot()
+        return {
+            "breaker": snapshot["breakers"].get(self.backend.name),
+            "retries": snapshot["retries"],
+        }
+
+    def _emit(self, op, target, started, ok, cache_hit=False, stale=False, error=None):
+        take_transfer = getattr(self.backend, "take_transfer", None)
+        transfer = take_transfer() if take_transfer and not cache_hit else None
+        if not self.metrics_hooks:
+            return transfer
+        event = {
+            "op": op,
+            "target": target,
+            "backend": self.backend.name,
+            "ok": ok,
+            "cache_hit": cache_hit,
+            "stale": stale,
+            "seconds": time.perf_counter() - started,
+            "error": error,
+            "wire_bytes": transfer[0] if transfer else None,
+            "body_bytes": transfer[1] if transfer else None,
+        }
+        for hook in self.metrics_hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                print(f"Metrics hook error: {e}")
+        return transfer
+
+    def idle_for(self):
+        """Seconds since the last backend call finished, or 0 while one runs."""
+        if self.in_flight:
+            return 0.0
+        return time.monotonic() - self.last_activity
+
+    def _call(self, op, target, function, *args, idempotent=False):
+        started = time.perf_counter()
+        self._last_call.transfer = None
+        self._last_call.sent = False
+
+        def attempt():
+            try:
+                result = function(*args)
+            except Exception as e:
+                if classify(e) != UNSENT:
+                    self._last_call.sent = True  # may have been processed
+                raise
+            self._last_call.sent = True
+            return result
+
+        with self._cache_lock:
+            self.in_flight += 1
+        try:
+            result = self.resilience.call(
+                self.backend.name, f"{op}:{target}", attempt, idempotent=idempotent
+            )
+            self._last_call.transfer = self._emit(op, target, started, True)
+            return result
+        except (BackendError, CircuitOpenError) as e:
+            print(f"Error in {op} {target}: {e}")
+            self._last_call.transfer = self._emit(
+                op, target, started, False, error=str(e)
+            )
+        except Exception as e:
+            print(f"Unexpected error in {op} {target}: {e}")
+            self._last_call.transfer = self._emit(
+                op, target, started, False, error=str(e)
+            )
+        finally:
+            with self._cache_lock:
+                self.in_flight -= 1
+                self.last_activity = time.monotonic()
+        return None
+
+    def _store(self, key, expires_at, rows):
+        """Caches rows under key, evicting long-expired and least recently
+        used entries so the cache stays bounded. Caller holds _cache_lock."""
+        self._cache[key] = (expires_at, rows)
+        self._cache.move_to_end(key)
+        cutoff = time.monotonic() - STALE_RETENTION
+        for old_key in [
+            k for k, (expires, _) in self._cache.items() if expires < cutoff
+        ]:
+            del self._cache[old_key]
+        while len(self._cache) > CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    def is_cached(self, table, params=None, decode=None):
+        """True if a fresh cached result exists for this select."""
+        params = params or {"select": "*"}
+        key = (table, tuple(sorted(params.items())), decode)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        return bool(cached) and cached[0] > time.monotonic()
+
+    def prefetch(self, table, params=None, ttl=None, decode=None):
+        """Warms the read cache for a select, keeping it fresh for `ttl` seconds.
+        Returns the bytes transferred (0 if already cached or the fetch
+        failed): what went over the wire for backends that report it, else an
+        estimate from the decoded rows."""
+        params = params or {"select": "*"}
+        if self.is_cached(table, params, decode):
+            return 0
+        data = self._call(
+            "prefetch", table, self.backend.select, table, params, idempotent=True
+        )
+        if not isinstance(data, list):
+            return 0
+        transfer = self._last_call.transfer
+        size = transfer[0] if transfer else len(get_codec().dumps(data))
+        key = (table, tuple(sorted(params.items())), decode)
+        rows = decode(data) if decode else list(data)
+        with self._cache_lock:
+            self._store(key, time.monotonic() + (ttl or self.cache_ttl), rows)
+        return size
+
+    def select(self, table, params=None, use_cache=True, decode=None):
+        """Returns a list of rows, or None on failure.
+
+        decode(rows), e.g. records.Task.from_rows, is applied once per fetch;
+        the cache then holds the decoded rows (keyed per decoder).
+        use_cache=False reads bypass the cache entirely: they are neither
+        served from it (not even stale rows during an outage) nor stored."""
+        params = params or {"select": "*"}
+        key = (table, tuple(sorted(params.items())), decode)
+        cached = None
+        if use_cache:
+            with self._cache_lock:
+                cached = self._cache.get(key)
+                if cached:
+                    self._cache.move_to_end(key)
+        if cached and self.cache_ttl > 0 and cached[0] > time.monotonic():
+            self._emit("select", table, time.perf_counter(), True, cache_hit=True)
+            return list(cached[1])
+        data = self._call(
+            "select", table, self.backend.select, table, params, idempotent=True
+        )
+        if isinstance(data, list):
+            if decode:
+                data = decode(data)
+            if use_cache:
+                with self._cache_lock:
+                    self._store(key, time.monotonic() + self.cache_ttl, list(data))
+        elif data is None and cached is not None:
+            # Backend down or failing: last known rows beat an empty screen
+            print(f"Backend unavailable, serving cached {table} rows.")
+            self._emit(
+                "select", table, time.perf_counter(), True, cache_hit=True, stale=True
+            )
+            return list(cached[1])
+        return data
+
+    def insert(self, table, rows):
+        """Inserts one row (dict) or many (list). Returns the created rows or None."""
+        result = self._call("insert", table, self.backend.insert, table, rows)
+        self._invalidate_if_sent(table)
+        return result
+
+    def update(self, table, filters, values):
+        """Patches rows matching filters. Returns the updated rows or None."""
+        result = self._call(
+            "update",
+            table,
+            self.backend.update,
+            table,
+            filters,
+            values,
+            idempotent=True,
+        )
+        self._invalidate_if_sent(table)
+        return result
+
+    def delete(self, table, filters):
+        """Deletes rows matching filters. Returns True or None."""
+        result = self._call(
+            "delete", table, self.backend.delete, table, filters, idempotent=True
+        )
+        self._invalidate_if_sent(table)
+        return result
+
+    def rpc(self, function, payload=None, invalidates=(), idempotent=None):
+        """Calls a database function. `invalidates` lists tables it writes to.
+        Only read-only RPCs (IDEMPOTENT_RPCS) are retried after a transient error."""
+        if idempotent is None:
+            idempotent = function in IDEMPOTENT_RPCS
+        result = self._call(
+            "rpc", function, self.backend.rpc, function, payload, idempotent=idempotent
+        )
+        for table in invalidates:
+            self._invalidate_if_sent(table)
+        return result
+
+
+def create_repository(kind=None, supabase_client=None, config=None):
+    """Builds a Repository for the configured backend ('http', 'supabase', 'sqlite')."""
+    import config_loader
+
+    config = config or config_loader.get_config()
+    kind = kind or config.data_backend
+    if kind == "supabase":
+        if supabase_client is None:
+            print("Warning: supabase backend requested without a client, using http.")
+        else:
+            return Repository(SupabaseBackend(supabase_client))
+    elif kind == "sqlite":
+        return Repository(SQLiteBackend(config.sqlite_path))
+    return Repository(
+        HttpBackend(
+            config.supabase_url,
+            config.supabase_anon_key,
+            codec=get_codec(config.json_codec),
+        )
+    )
@@ -0,0 +1,201 @@
+import random
+import threading
+import time
+
+from requests.exceptions import ConnectionError, ConnectTimeout, HTTPError, Timeout
+from urllib3.exceptions import NewConnectionError
+
+# Split timeouts: fail fast when the host is unreachable, but give a slow
+# response time to arrive once the connection is up.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# Failure classes used by the retry logic
+UNSENT = "unsent"  # request never reached the server: safe to retry anything
+TRANSIENT = "transient"  # may have been processed: retry only idempotent calls
+FATAL = "fatal"  # 4xx, bad data, ...: never retry, does not trip the breaker
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+    def __init__(self, endpoint, retry_in):
+        super().__init__(
+            f"Circuit for '{endpoint}' is open; failing fast (retry in {retry_in:.1f}s)"
+        )
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def classify(exc):
+    """Maps an exception from requests or a repository backend to a failure class."""
+    if getattr(exc, "unsent", False):
+        return UNSENT
+    if hasattr(exc, "retryable"):  # repository.BackendError
+        return TRANSIENT if exc.retryable else FATAL
+    if isinstance(exc, ConnectTimeout):
+        return UNSENT
+    if isinstance(exc, ConnectionError) and not isinstance(exc, Timeout):
+        reason = getattr(exc.args[0], "reason", None) if exc.args else None
+        return UNSENT if isinstance(reason, NewConnectionError) else TRANSIENT
+    if isinstance(exc, Timeout):
+        return TRANSIENT
+    if isinstance(exc, HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return TRANSIENT if status >= 500 or status == 429 else FATAL
+    return FATAL
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts=3, base_delay=0.2, max_delay=2.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """Sleep before retry number `attempt` (1-based)."""
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures; after
+    `reset_timeout` seconds one trial call is let through (half-open)."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.short_circuited = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Returns 0 if the call may proceed, else seconds until the next trial."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return 0
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN  # let exactly one trial through
+                return 0
+            self.short_circuited += 1
+            return max(remaining, 0.0) or self.reset_timeout
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            if (
+                self.state == self.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited,
+            }
+
+
+class Resilience:
+    """Retries and circuit breaking around backend calls.
+
+    Breakers are kept per service ("http", "auth", ...) so an outage fails
+    fast everywhere. Retry counts are tracked per endpoint.
+    """
+
+    def __init__(self, policy=None, failure_threshold=5, reset_timeout=30.0):
+        self.policy = policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+        self.retries = {}  # endpoint -> retry count
+        self.lock = threading.Lock()
+        self.sleep = time.sleep  # swapped out by benchmarks
+
+    def breaker(self, service):
+        with self.lock:
+            if service not in self.breakers:
+                self.breakers[service] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout
+                )
+            return self.breakers[service]
+
+    def call(self, service, endpoint, function, idempotent=False):
+        """Runs function() with retries. Non-idempotent calls are only retried
+        when the request provably never left the client."""
+        breaker = self.breaker(service)
+        attempt = 0
+        while True:
+            attempt += 1
+            retry_in = breaker.allow()
+            if retry_in:
+                raise CircuitOpenError(service, retry_in)
+            try:
+                result = function()
+            except Exception as exc:
+                failure = classify(exc)
+                if failure == FATAL:
+                    breaker.record_success()  # the service answered
+                    raise
+                breaker.record_failure()
+                can_retry = failure == UNSENT or idempotent
+                if not can_retry or attempt >= self.policy.max_attempts:
+                    raise
+                delay = self.policy.delay(attempt)
+                print(
+                    f"Retrying {endpoint} (attempt {attempt + 1}) in {delay:.2f}s after: {exc}"
+                )
+                with self.lock:
+                    self.retries[endpoint] = self.retries.get(endpoint, 0) + 1
+                self.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    def is_open(self, service):
+        return self.breaker(service).state == CircuitBreaker.OPEN
+
+    def snapshot(self):
+        """Breaker state and retry counters, for metrics/diagnostics."""
+        with self.lock:
+            breakers = dict(self.breakers)
+            retries = dict(self.retries)
+        return {
+            "breakers": {name: b.snapshot() for name, b in breakers.items()},
+            "retries": retries,
+        }
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_resilience():
+    """Process-wide Resilience instance so all sessions share breaker state."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Resilience()
+        return _default
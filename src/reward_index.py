@@ -0,0 +1,84 @@
+import bisect
+
+# Sorts after every str(reward_id) of the same cost.
+_AFTER_ANY_ID = "\uffff"
+
+
+def _index_key(reward):
+    reward_id = reward.get("id")
+    return (int(reward.get("medal_cost") or 0), str(reward_id), reward_id)
+
+
+class RewardCostIndex:
+    """In-memory rewards index ordered by medal cost.
+
+    A balance cuts the sorted (cost, reward_id) keys in two with one binary
+    search: everything left of the cut is affordable. When the balance
+    moves, only the rewards between the old and the new cut change sides,
+    so the reward list can update just those instead of being rebuilt.
+    """
+
+    def __init__(self):
+        self._keys = []  # sorted (medal_cost, str(reward_id), reward_id) tuples
+        self._rewards = {}  # reward_id -> reward (records.Reward or row dict)
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._rewards)
+
+    def rebuild(self, rewards):
+        """Replaces the index contents with a freshly fetched reward list."""
+        self._rewards = {r.get("id"): r for r in rewards if r.get("id") is not None}
+        self._keys = sorted(_index_key(r) for r in self._rewards.values())
+        self.loaded = True
+
+    def add(self, reward):
+        """Adds (or replaces) a single reward."""
+        if reward.get("id") is None:
+            return
+        self.remove(reward.get("id"))
+        self._rewards[reward.get("id")] = reward
+        bisect.insort(self._keys, _index_key(reward))
+
+    def remove(self, reward_id):
+        """Removes a reward by id. Returns the removed reward or None."""
+        reward = self._rewards.pop(reward_id, None)
+        if reward is None:
+            return None
+        key = _index_key(reward)
+        pos = bisect.bisect_left(self._keys, key)
+        if pos < len(self._keys) and self._keys[pos] == key:
+            del self._keys[pos]
+        return reward
+
+    def _cut(self, balance):
+        return bisect.bisect_right(self._keys, (balance, _AFTER_ANY_ID))
+
+    def sorted_rewards(self):
+        """Returns all rewards, cheapest first."""
+        return [self._rewards[key[2]] for key in self._keys]
+
+    def affordable(self, balance):
+        """Returns the rewards costing at most balance, cheapest first."""
+        return [self._rewards[key[2]] for key in self._keys[: self._cut(balance)]]
+
+    def unaffordable(self, balance):
+        """Returns the rewards costing more than balance, cheapest first."""
+        return [self._rewards[key[2]] for key in self._keys[self._cut(balance) :]]
+
+    def next_cost(self, balance):
+        """Cost of the cheapest reward balance does not cover, or None."""
+        cut = self._cut(balance)
+        return self._keys[cut][0] if cut < len(self._keys) else None
+
+    def costing(self, cost):
+        """Returns the rewards that cost exactly cost."""
+        lo = bisect.bisect_left(self._keys, (cost,))
+        hi = bisect.bisect_right(self._keys, (cost, _AFTER_ANY_ID))
+        return [self._rewards[key[2]] for key in self._keys[lo:hi]]
+
+    def changed_sides(self, old_balance, new_balance):
+        """Returns the rewards that became affordable or unaffordable when the
+        balance moved from old_balance to new_balance."""
+        lo, hi = sorted((self._cut(old_balance), self._cut(new_balance)))
+        return [self._rewards[key[2]] for key in self._keys[lo:hi]]
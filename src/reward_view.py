@@ -1,17 +1,29 @@
 # c:\Users\nrmlc\OneDrive\Desktop\Reward_Yourself_ToDO\reward_view.py
 import flet as ft
 from todo_view import ToDoList
+from update_scheduler import get_update_scheduler
+from task_runner import get_task_runner
+from manual_order import ListReorderer
 import os
 
 
 # --- Update function signature ---
 def reward_view(
-    page: ft.Page, todo_list: ToDoList, trigger_main_medal_update: callable
+    page: ft.Page,
+    todo_list: ToDoList,
+    trigger_main_medal_update: callable,
+    on_mutation: callable = None,
 ):
     # --- End modification ---
 
-    reward_list_view = ft.ListView(
-        expand=True, spacing=10, padding=20, auto_scroll=True
+    updates = get_update_scheduler(page)
+    tasks = get_task_runner(page)
+    # Drag a row to reorder; the order is saved as one position per move
+    reward_list_view = ft.ReorderableListView(
+        expand=True,
+        padding=20,
+        auto_scroll=True,
+        on_reorder=lambda e: reorder_reward(e.old_index, e.new_index),
     )
     reward_input = ft.TextField(label="New Reward", expand=True)
     medal_cost_input = ft.TextField(
@@ -23,29 +35,62 @@ def reward_view(
         ),
     )
 
+    claim_buttons = {}  # reward_id -> (claim button, medal cost)
+    shown_rewards = []  # rewards as listed, in manual order
+    shown_balance = [None]  # balance the buttons currently reflect
+
+    def set_claim_state(button, cost, balance):
+        """Enables Claim when the cached balance covers cost. Otherwise the
+        next goal (the cheapest rewards out of reach) shows how many medals
+        are missing and costlier ones just their price, so a balance change
+        only touches rewards near it. An unknown balance leaves it enabled
+        (the claim itself still checks the server)."""
+        if balance is None or cost <= balance:
+            button.text = "Claim"
+            button.disabled = False
+            return
+        if cost == todo_list.reward_index.next_cost(balance):
+            button.text = f"{cost - balance} medals to go"
+        else:
+            button.text = f"Needs {cost} medals"
+        button.disabled = True
+
     # --- Modify refresh_reward_list ---
     def refresh_reward_list():
         """Refreshes the list of rewards."""
         reward_list_view.controls.clear()
+        claim_buttons.clear()
+        shown_rewards.clear()
         if not todo_list:
             reward_list_view.controls.append(ft.Text("Error: Not logged in."))
             # page.update() # Let caller handle update
             return
 
         print("Refreshing reward list...")
-        # No need to fetch medals just for button state anymore
-
+        # In the user's manual order, enabled against the cached balance (no
+        # round trip)
         rewards = todo_list.get_all_rewards()
+        balance = shown_balance[0] = todo_list.medal_count
 
         if rewards:
             for reward in rewards:
                 reward_id, reward_name, cost = (
-                    reward.get("id"),
-                    reward.get("reward", "Unnamed"),
-                    reward.get("medal_cost", 0),
+                    reward.id,
+                    reward.reward or "Unnamed",
+                    reward.medal_cost,
                 )
                 if reward_id is None:
                     continue
+                claim_button = ft.ElevatedButton(
+                    "Claim",
+                    tooltip=f"Claim for {cost} medals",
+                )
+                set_claim_state(claim_button, cost, balance)
+                claim_buttons[reward_id] = (claim_button, cost)
+                claim_button.on_click = lambda _, rid=reward_id, rname=reward_name, rcost=cost, b=claim_button: claim_reward(
+                    rid, rname, rcost, button=b
+                )
+                shown_rewards.append(reward)
                 reward_list_view.controls.append(
                     ft.Row(
                         [
@@ -54,73 +99,129 @@ def reward_view(
                                 expand=True,
                                 tooltip=reward_name,
                             ),
-                            ft.ElevatedButton(
-                                "Claim",
-                                tooltip=f"Claim for {cost} medals",
-                                on_click=lambda _, rid=reward_id, rname=reward_name, rcost=cost: claim_reward(
-                                    rid, rname, rcost
-                                ),
-                                # --- Remove disabled logic ---
-                                # disabled=(cost > effective_medals), # ALWAYS ENABLED NOW
-                                # --- End Remove ---
-                            ),
+                            claim_button,
                         ],
                         alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                     )
                 )
         else:
             reward_list_view.controls.append(ft.Text("No rewards available."))
+        reward_reorderer.rebalance()  # if rows without a position came back
         # Don't call page.update() here, let the caller handle it
         # page.update()
 
+    def apply_balance(balance):
+        """Medal listener; runs on worker threads, so the buttons are only
+        changed with the next frame (latest balance wins)."""
+        updates.defer("reward_balance", lambda: render_balance(balance))
+
+    def render_balance(balance):
+        """Updates claim buttons in place for a new balance: the rewards
+        costing between the old and the new balance, which changed sides,
+        and the old and new next goal. The list itself is not rebuilt."""
+        previous, shown_balance[0] = shown_balance[0], balance
+        index = todo_list.reward_index
+        if previous is None or balance is None:
+            changed = index.sorted_rewards()
+        else:
+            changed = index.changed_sides(previous, balance)
+            for goal in {index.next_cost(previous), index.next_cost(balance)}:
+                if goal is not None:
+                    changed += index.costing(goal)
+        for reward in changed:
+            entry = claim_buttons.get(reward.id)
+            if entry:
+                set_claim_state(entry[0], entry[1], balance)
+
+    if todo_list:
+        todo_list.add_medal_listener("reward_view", apply_balance)
+
+    def reload_rewards():
+        refresh_reward_list()
+        updates.request()
+
+    reward_reorderer = ListReorderer(
+        todo_list, "rewards", tasks, reload_rewards, on_error=lambda m: show_message(m)
+    )
+
+    def reorder_reward(old_index, new_index):
+        """Moves a dragged reward to its new place in the list."""
+        if not todo_list or not shown_rewards:
+            return
+        rows = reward_list_view.controls
+        if reward_reorderer.move(shown_rewards, old_index, new_index):
+            rows.insert(new_index, rows.pop(old_index))
+            updates.request()
+
     # --- End modification ---
 
     def add_reward(e):
         """Handles adding a new reward."""
-        if todo_list:
-            reward_text = reward_input.value.strip()
-            cost_text = medal_cost_input.value.strip()
-            if reward_text and cost_text.isdigit():
-                cost = int(cost_text)
-                new_reward_data = {"reward": reward_text, "medal_cost": cost}
-                added_reward = todo_list.add_new_reward(new_reward_data)
-                if added_reward:
-                    reward_input.value = ""
-                    medal_cost_input.value = ""
-                    reward_input.focus()
-                    refresh_reward_list()  # Refresh list
-                    page.snack_bar = ft.SnackBar(ft.Text("Reward added!"))
-                    page.snack_bar.open = True
-                else:
-                    page.snack_bar = ft.SnackBar(ft.Text("Error adding reward."))
-                    page.snack_bar.open = True
-                page.update()  # Update page after add action
+        if not todo_list:
+            print("Error: todo_list not available in add_reward.")
+            return
+        reward_text = reward_input.value.strip()
+        cost_text = medal_cost_input.value.strip()
+        if not (reward_text and cost_text.isdigit()):
+            page.snack_bar = ft.SnackBar(
+                ft.Text("Please enter a valid reward and numeric medal cost.")
+            )
+            page.snack_bar.open = True
+            if not reward_text:
+                reward_input.focus()
             else:
-                page.snack_bar = ft.SnackBar(
-                    ft.Text("Please enter a valid reward and numeric medal cost.")
-                )
+                medal_cost_input.focus()
+            updates.request()  # Update page for validation error
+            return
+        cost = int(cost_text)
+        new_reward_data = {"reward": reward_text, "medal_cost": cost}
+
+        def finish(added_reward):
+            if added_reward:
+                if on_mutation:
+                    on_mutation("reward_added")
+                reward_input.value = ""
+                medal_cost_input.value = ""
+                reward_input.focus()
+                refresh_reward_list()  # Refresh list
+                page.snack_bar = ft.SnackBar(ft.Text("Reward added!"))
                 page.snack_bar.open = True
-                if not reward_text:
-                    reward_input.focus()
-                else:
-                    medal_cost_input.focus()
-                page.update()  # Update page for validation error
-        else:
-            print("Error: todo_list not available in add_reward.")
+            else:
+                show_message("Error adding reward.")
+
+        tasks.run(
+            "add_reward",
+            lambda: todo_list.add_new_reward(new_reward_data),
+            on_done=finish,
+            on_error=lambda exc: show_message("Error adding reward."),
+            busy=[add_reward_button, reward_input, medal_cost_input],
+        )
+
+    def show_message(message):
+        page.snack_bar = ft.SnackBar(ft.Text(message))
+        page.snack_bar.open = True
 
     # --- Modify claim_reward ---
-    def claim_reward(reward_id, reward_name, reward_cost):
+    def claim_reward(reward_id, reward_name, reward_cost, button=None):
         """Event handler for the claim button."""
         print(
             f"Attempting to claim reward via UI: {reward_name} (ID: {reward_id}), Cost: {reward_cost}"
         )
-        if todo_list:
-            # Backend handles the actual medal check now
-            success, result_data = todo_list.claim_reward(
-                reward_id, reward_name, reward_cost
-            )
+        if not todo_list:
+            print("Error: todo_list object not available when trying to claim reward.")
+            show_message("Error: Not logged in.")
+            updates.request()
+            return
+
+        def settle_button():
+            # The button reflects the balance again, not just "not busy"
+            if button is not None:
+                set_claim_state(button, reward_cost, shown_balance[0])
 
-            message = ""
+        def finish(result):
+            # Backend handles the actual medal check now
+            success, result_data = result
+            settle_button()
             if success:
                 new_count = (
                     result_data  # This is the new medal count (or None if RPC failed)
@@ -129,6 +230,8 @@ def reward_view(
                 if new_count is None:
                     message = f"Reward '{reward_name}' claimed! (Medal update may have failed, refreshing count...)"
                 print(f"Claim successful: {message}")
+                if on_mutation:
+                    on_mutation("reward_claimed")  # History view is now stale
                 refresh_reward_list()  # Refresh list only on success
             else:
                 error_message = result_data  # This is the error message
@@ -136,19 +239,26 @@ def reward_view(
                 print(message)
                 # Don't refresh list on failure
 
-            page.snack_bar = ft.SnackBar(ft.Text(message))
-            page.snack_bar.open = True
+            show_message(message)
 
             # --- Trigger update of the main medal display ---
             trigger_main_medal_update()  # Call the function passed from main.py
             # --- End modification ---
 
-            page.update()  # Show snackbar and update list/display changes
-        else:
-            print("Error: todo_list object not available when trying to claim reward.")
-            page.snack_bar = ft.SnackBar(ft.Text("Error: Not logged in."))
-            page.snack_bar.open = True
-            page.update()
+        # One claim at a time: concurrent claims race on the medal balance
+        if tasks.is_pending("claim_reward"):
+            return
+        if button is not None:
+            button.disabled = True
+        tasks.run(
+            "claim_reward",
+            lambda: todo_list.claim_reward(reward_id, reward_name, reward_cost),
+            on_done=finish,
+            on_error=lambda exc: (
+                settle_button(),
+                show_message(f"Claim failed: {exc}"),
+            ),
+        )
 
     # --- End modification ---
 
@@ -158,7 +268,12 @@ def reward_view(
     refresh_reward_list()
     # --- End modification ---
 
-    return ft.View(
+    def refresh_and_update():
+        """Re-fetches rewards for a cached view (run by the route cache)."""
+        refresh_reward_list()
+        updates.request()
+
+    view = ft.View(
         "/rewards",
         [
             ft.AppBar(
@@ -191,3 +306,6 @@ def reward_view(
         ],
         padding=10,
     )
+    # Used by the route cache (ft.View takes no data argument)
+    view.data = {"refresh": refresh_and_update}
+    return view
@@ -0,0 +1,207 @@
+import bisect
+import heapq
+import re
+import threading
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+MAX_PREFIX_EXPANSIONS = 200  # vocabulary words one query word may expand to
+FUZZY_MIN_LENGTH = 3  # shorter query words only match exactly or by prefix
+FUZZY_THRESHOLD = 0.3  # trigram similarity, same default as pg_trgm
+EXACT, PREFIX, FUZZY = 1.0, 0.8, 0.6  # score weights per kind of word match
+
+
+def tokenize(text):
+    """Lower-cased words of text ('Buy 2 eggs!' -> ['buy', '2', 'eggs'])."""
+    return _WORD.findall(str(text or "").lower())
+
+
+def trigrams(word):
+    padded = f"  {word} "  # padded like pg_trgm, so short words still match
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchHit:
+    __slots__ = ("kind", "id", "item", "score")
+
+    def __init__(self, kind, id, item, score):
+        self.kind = kind
+        self.id = id
+        self.item = item
+        self.score = score
+
+
+class SearchIndex:
+    """Inverted index over tasks, rewards and history, kept in memory.
+
+    Documents are keyed by (kind, id). Words map to postings: the keys of
+    the documents that contain them, oldest first. A second, much smaller
+    index maps trigrams to vocabulary words for fuzzy matching, so typos
+    cost work in the vocabulary size and never a scan of the documents.
+    Every query word must match (exact, prefix or fuzzy). Equal scores go
+    to the newest document. Postings are walked newest first and the walk
+    stops once no remaining document can make the top `limit`, so common
+    words cost about the same as rare ones."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._docs = {}  # (kind, id) -> (text, item, seq, words)
+        self._postings = {}  # word -> {(kind, id): None}, in insertion order
+        self._vocabulary = []  # sorted words, for prefix lookups
+        self._word_trigrams = {}  # trigram -> set of words
+        self._seq = 0
+        self.loaded_kinds = set()
+
+    def __len__(self):
+        return len(self._docs)
+
+    # --- Maintenance (incremental) ---
+
+    def add(self, kind, doc_id, text, item=None):
+        """Indexes (or re-indexes) one document as the newest one."""
+        if doc_id is None:
+            return
+        with self.lock:
+            self._add(kind, doc_id, text, item)
+
+    def _add(self, kind, doc_id, text, item):
+        key = (kind, doc_id)
+        if key in self._docs:
+            self._remove(key)
+        words = frozenset(tokenize(text))
+        self._seq += 1
+        self._docs[key] = (text, item, self._seq, words)
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                bisect.insort(self._vocabulary, word)
+                for trigram in trigrams(word):
+                    self._word_trigrams.setdefault(trigram, set()).add(word)
+            postings[key] = None
+
+    def remove(self, kind, doc_id):
+        with self.lock:
+            self._remove((kind, doc_id))
+
+    def _remove(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for word in doc[3]:
+            postings = self._postings.get(word)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                # Last use of the word: drop it from the vocabulary indexes
+                del self._postings[word]
+                pos = bisect.bisect_left(self._vocabulary, word)
+                if pos < len(self._vocabulary) and self._vocabulary[pos] == word:
+                    del self._vocabulary[pos]
+                for trigram in trigrams(word):
+                    words = self._word_trigrams.get(trigram)
+                    if words is not None:
+                        words.discard(word)
+                        if not words:
+                            del self._word_trigrams[trigram]
+
+    def replace_kind(self, kind, items, field, order_field=None):
+        """Makes the documents of `kind` match items (a freshly fetched or
+        delta-synced list). Only added, changed or removed items are
+        (re)tokenized; new ones are indexed oldest first by order_field."""
+        with self.lock:
+            stale = {key for key in self._docs if key[0] == kind}
+            fresh = []
+            for item in items:
+                doc_id = item.get("id")
+                if doc_id is None:
+                    continue
+                key = (kind, doc_id)
+                text = item.get(field) or ""
+                stale.discard(key)
+                doc = self._docs.get(key)
+                if doc is not None and doc[0] == text:
+                    self._docs[key] = (text, item, doc[2], doc[3])
+                else:
+                    fresh.append((item, doc_id, text))
+            if order_field:
+                fresh.sort(key=lambda entry: str(entry[0].get(order_field) or ""))
+            for item, doc_id, text in fresh:
+                self._add(kind, doc_id, text, item)
+            for key in stale:
+                self._remove(key)
+            self.loaded_kinds.add(kind)
+
+    # --- Queries ---
+
+    def _expand(self, word):
+        """Vocabulary words matching one query word, with their weights."""
+        matches = {}
+        lo = bisect.bisect_left(self._vocabulary, word)
+        for candidate in self._vocabulary[lo : lo + MAX_PREFIX_EXPANSIONS]:
+            if not candidate.startswith(word):
+                break
+            matches[candidate] = EXACT if candidate == word else PREFIX
+        if len(word) >= FUZZY_MIN_LENGTH:
+            wanted = trigrams(word)
+            shared = {}
+            for trigram in wanted:
+                for candidate in self._word_trigrams.get(trigram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            for candidate, count in shared.items():
+                if candidate in matches:
+                    continue
+                similarity = count / (len(wanted) + len(trigrams(candidate)) - count)
+                if similarity >= FUZZY_THRESHOLD:
+                    matches[candidate] = FUZZY * similarity
+        return matches
+
+    def search(self, query, limit=50, kinds=None):
+        """Returns up to `limit` SearchHits, best first."""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words or limit <= 0:
+            return []
+        with self.lock:
+            expansions = [self._expand(word) for word in words]
+            if not all(expansions):
+                return []
+            # Drive the walk from the query word with the fewest documents;
+            # the others only filter and add to the score
+            sizes = [
+                sum(len(self._postings[w]) for w in matches) for matches in expansions
+            ]
+            driver = min(range(len(words)), key=sizes.__getitem__)
+            others = [m for i, m in enumerate(expansions) if i != driver]
+            others_best = sum(max(m.values()) for m in others)
+            docs = self._docs
+            top = []  # min-heap of (score, seq, key)
+            seen = set()
+            for word, weight in sorted(
+                expansions[driver].items(), key=lambda kv: kv[1], reverse=True
+            ):
+                bound = weight + others_best  # best score this word can lead to
+                if len(top) == limit and bound < top[0][0]:
+                    break  # later words weigh no more than this one
+                for key in reversed(self._postings[word]):
+                    text, item, seq, doc_words = docs[key]
+                    if len(top) == limit and (bound, seq) <= top[0][:2]:
+                        break  # older from here on, and no better scored
+                    if key in seen or (kinds and key[0] not in kinds):
+                        continue
+                    seen.add(key)
+                    score = weight
+                    for matches in others:
+                        best = max((matches.get(w, 0) for w in doc_words), default=0)
+                        if not best:
+                            break
+                        score += best
+                    else:
+                        entry = (score, seq, key)
+                        if len(top) < limit:
+                            heapq.heappush(top, entry)
+                        elif entry[:2] > top[0][:2]:
+                            heapq.heapreplace(top, entry)
+            top.sort(reverse=True)
+            return [
+                SearchHit(key[0], key[1], docs[key][1], score) for score, _, key in top
+            ]
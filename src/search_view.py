@@ -0,0 +1,177 @@
+import threading
+
+import flet as ft
+from task_runner import get_task_runner
+from timestamps import format_timestamp
+from todo_view import ToDoList
+from update_scheduler import get_update_scheduler
+
+SEARCH_DEBOUNCE = 0.25  # seconds of no typing before a query runs
+RESULT_LIMIT = 50
+HISTORY_PAGE = 20  # server-side history results fetched per click
+
+# kind -> (icon, label, route the result opens)
+RESULT_KINDS = {
+    "task": (ft.icons.CHECK_BOX_OUTLINE_BLANK, "Task", "/"),
+    "reward": (ft.icons.STAR_RATE_ROUNDED, "Reward", "/rewards"),
+    "task_history": (ft.icons.HISTORY, "Completed task", "/history"),
+    "reward_history": (ft.icons.REDEEM, "Claimed reward", "/history"),
+}
+
+
+class Debouncer:
+    """Calls function(*args) once calls have stopped for `delay` seconds."""
+
+    def __init__(self, delay, function):
+        self.delay = delay
+        self.function = function
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def __call__(self, *args):
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.delay, self.function, args)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def cancel(self):
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+
+
+def _describe(hit):
+    item = hit.item
+    if hit.kind == "task":
+        due = f" (Due: {item.due_date})" if item.due_date else ""
+        return f"{item.task}{due}"
+    if hit.kind == "reward":
+        return f"{item.reward} - {item.medal_cost} medals"
+    when = format_timestamp(item.timestamp) or "Invalid Date"
+    return f"{when} - {item.description}"
+
+
+def search_view(page: ft.Page, todo_list: ToDoList):
+    """Search-as-you-type over tasks, rewards and history (in-memory index)."""
+    if not todo_list:
+        return ft.View("/search", [ft.Text("Error: Not logged in.")])
+    updates = get_update_scheduler(page)
+    tasks = get_task_runner(page)
+
+    results = ft.ListView(expand=True, spacing=2)
+    status = ft.Text("", size=12)
+    spinner = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=False)
+    latest_query = [""]
+    history_cursor = [None]  # keyset cursor of the next server-side page
+
+    def result_tile(hit):
+        return ft.ListTile(
+            leading=ft.Icon(RESULT_KINDS[hit.kind][0]),
+            title=ft.Text(_describe(hit)),
+            subtitle=ft.Text(RESULT_KINDS[hit.kind][1], size=11),
+            dense=True,
+            on_click=lambda _, route=RESULT_KINDS[hit.kind][2]: page.go(route),
+        )
+
+    def show_results(query, hits):
+        if query != latest_query[0]:
+            return  # a newer query is on its way
+        results.controls = [result_tile(hit) for hit in hits]
+        history_cursor[0] = None
+        history_button.text = "Search full history"
+        history_button.visible = bool(query.strip())
+        if not query.strip():
+            status.value = f"{len(todo_list.search_index)} items indexed."
+        else:
+            status.value = f"{len(hits)} results" if hits else "No matches."
+        updates.request()
+
+    def show_history_page(query, response):
+        if query != latest_query[0]:
+            return
+        if response is None:
+            status.value = "Full history search unavailable."
+        else:
+            hits, history_cursor[0] = response
+            if history_button.text == "Search full history":
+                results.controls = [
+                    ft.Text("Full history", size=12, weight=ft.FontWeight.BOLD)
+                ]
+            results.controls.extend(result_tile(hit) for hit in hits)
+            history_button.text = "More history results"
+            history_button.visible = history_cursor[0] is not None
+            status.value = f"{len(results.controls) - 1} history results"
+        updates.request()
+
+    def search_full_history(_):
+        # The device index may not hold all of a large history; the server
+        # searches everything, one ranked page at a time
+        query, cursor = latest_query[0], history_cursor[0]
+        tasks.run(
+            "search_history",
+            lambda: todo_list.search_history(query, cursor, HISTORY_PAGE),
+            on_done=lambda response: show_history_page(query, response),
+            on_error=lambda exc: setattr(status, "value", f"Search failed: {exc}"),
+            spinner=spinner,
+        )
+
+    history_button = ft.TextButton(
+        "Search full history",
+        icon=ft.icons.MANAGE_SEARCH,
+        visible=False,
+        on_click=search_full_history,
+    )
+
+    def run_search(query):
+        if not query.strip():
+            show_results(query, [])
+            return
+        show_results(query, todo_list.search_index.search(query, RESULT_LIMIT))
+
+    debounced_search = Debouncer(SEARCH_DEBOUNCE, run_search)
+
+    def on_change(e):
+        latest_query[0] = e.control.value or ""
+        debounced_search(latest_query[0])
+
+    search_field = ft.TextField(
+        hint_text="Search tasks, rewards and history",
+        prefix_icon=ft.icons.SEARCH,
+        autofocus=True,
+        on_change=on_change,
+        on_submit=lambda e: run_search(e.control.value or ""),
+        expand=True,
+    )
+
+    # Fetch whatever the index has not seen yet; typing works meanwhile on
+    # what is already indexed
+    tasks.run(
+        "load_search_index",
+        todo_list.load_search_index,
+        on_done=lambda _: run_search(latest_query[0]),
+        on_error=lambda exc: setattr(status, "value", f"Search unavailable: {exc}"),
+        spinner=spinner,
+    )
+
+    return ft.View(
+        "/search",
+        [
+            ft.AppBar(
+                title=ft.Text("Search"),
+                leading=ft.IconButton(
+                    icon=ft.icons.ARROW_BACK,
+                    tooltip="Back to Tasks",
+                    on_click=lambda _: (debounced_search.cancel(), page.go("/")),
+                ),
+            ),
+            ft.Row([search_field, spinner]),
+            status,
+            results,
+            history_button,
+            # bottom_appbar should be added by main.py's route_change
+        ],
+        padding=10,
+    )
@@ -0,0 +1,183 @@
+import datetime
+import threading
+
+DASHBOARD_DAYS = 30  # per-day counts the dashboard asks for
+
+
+def _day_of(timestamp):
+    """UTC calendar day ('YYYY-MM-DD') of an ISO timestamp, or None."""
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc)
+    return parsed.date().isoformat()
+
+
+class UserStats:
+    """Running totals for one user, updated in O(1) per completion or claim.
+
+    Mirrors the user_stats/user_daily_completions tables that the history
+    triggers maintain server-side (supabase/migrations/*_user_stats.sql)."""
+
+    def __init__(self):
+        self.tasks_completed = 0
+        self.medals_earned = 0
+        self.medals_spent = 0
+        self.rewards_claimed = 0
+        self.current_streak = 0
+        self.longest_streak = 0
+        self.last_completion_date = None  # 'YYYY-MM-DD'
+        self.backfilled = False
+        self.daily = {}  # 'YYYY-MM-DD' -> completions
+        self.lock = threading.Lock()
+
+    def record_completion(self, day, medals):
+        with self.lock:
+            self.tasks_completed += 1
+            self.medals_earned += medals
+            self.daily[day] = self.daily.get(day, 0) + 1
+            last = self.last_completion_date
+            if last is None:
+                self.current_streak = 1
+            elif day > last:
+                next_day = (
+                    datetime.date.fromisoformat(last) + datetime.timedelta(days=1)
+                ).isoformat()
+                self.current_streak = self.current_streak + 1 if day == next_day else 1
+            # Same day or an out-of-order (older) completion: streak unchanged
+            self.longest_streak = max(self.longest_streak, self.current_streak)
+            if last is None or day > last:
+                self.last_completion_date = day
+
+    def record_claim(self, cost):
+        with self.lock:
+            self.rewards_claimed += 1
+            self.medals_spent += cost
+
+    def streak_as_of(self, today):
+        """The current streak, or 0 if it was broken before `today` (a date)."""
+        if not self.last_completion_date:
+            return 0
+        last = datetime.date.fromisoformat(self.last_completion_date)
+        return self.current_streak if (today - last).days <= 1 else 0
+
+    def completions_on(self, day):
+        return self.daily.get(day, 0)
+
+    def to_dict(self):
+        return {
+            "tasks_completed": self.tasks_completed,
+            "medals_earned": self.medals_earned,
+            "medals_spent": self.medals_spent,
+            "rewards_claimed": self.rewards_claimed,
+            "current_streak": self.current_streak,
+            "longest_streak": self.longest_streak,
+            "last_completion_date": self.last_completion_date,
+            "backfilled": self.backfilled,
+            "daily": dict(self.daily),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for key in (
+            "tasks_completed",
+            "medals_earned",
+            "medals_spent",
+            "rewards_claimed",
+            "current_streak",
+            "longest_streak",
+        ):
+            setattr(stats, key, int(data.get(key) or 0))
+        last = data.get("last_completion_date")
+        stats.last_completion_date = str(last)[:10] if last else None
+        stats.backfilled = bool(data.get("backfilled"))
+        stats.daily = {
+            str(day)[:10]: int(count)
+            for day, count in (data.get("daily") or {}).items()
+        }
+        return stats
+
+    @classmethod
+    def backfill(cls, task_rows, reward_rows, medals_per_task):
+        """Builds stats from history rows (any iterables, e.g. streamed pages)."""
+        stats = cls()
+        for row in task_rows:
+            day = _day_of(row.get("timestamp"))
+            stats.tasks_completed += 1
+            stats.medals_earned += medals_per_task
+            if day:
+                stats.daily[day] = stats.daily.get(day, 0) + 1
+        for row in reward_rows:
+            stats.rewards_claimed += 1
+            stats.medals_spent += int(row.get("cost") or 0)
+        run, previous = 0, None
+        for day in sorted(stats.daily):
+            current = datetime.date.fromisoformat(day)
+            run = run + 1 if previous and (current - previous).days == 1 else 1
+            stats.longest_streak = max(stats.longest_streak, run)
+            previous = current
+        stats.current_streak = run
+        stats.last_completion_date = previous.isoformat() if previous else None
+        stats.backfilled = True
+        return stats
+
+
+# --- SQLite backend: local equivalents of the triggers and RPCs ---
+
+
+def register_sqlite_stats(backend, medals_per_task):
+    """Maintains a 'user_stats' document on history inserts and serves the
+    get_user_stats/backfill_user_stats RPCs, like the SQL migration does."""
+
+    def load():
+        rows = backend.select("user_stats", {"select": "*"})
+        return (UserStats.from_dict(rows[0]) if rows else UserStats()), bool(rows)
+
+    def save(stats, exists):
+        data = stats.to_dict()
+        if exists:
+            backend.update("user_stats", {}, data)
+        else:
+            backend.insert("user_stats", data)
+
+    def on_task_history(row):
+        stats, exists = load()
+        day = _day_of(row.get("timestamp")) or datetime.date.today().isoformat()
+        stats.record_completion(day, medals_per_task)
+        save(stats, exists)
+
+    def on_reward_history(row):
+        stats, exists = load()
+        stats.record_claim(int(row.get("cost") or 0))
+        save(stats, exists)
+
+    def get_user_stats(backend, payload):
+        rows = backend.select("user_stats", {"select": "*"})
+        if not rows:
+            return None
+        days = int(payload.get("days", DASHBOARD_DAYS))
+        since = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+        data = dict(rows[0])
+        data["daily"] = {
+            day: n for day, n in (data.get("daily") or {}).items() if day > since
+        }
+        return data
+
+    def backfill_user_stats(backend, payload):
+        stats = UserStats.backfill(
+            backend.select("task_history", {"select": "timestamp"}),
+            backend.select("reward_history", {"select": "cost"}),
+            medals_per_task,
+        )
+        save(stats, load()[1])
+        return True
+
+    backend.add_insert_hook("task_history", on_task_history)
+    backend.add_insert_hook("reward_history", on_reward_history)
+    backend.register_rpc("get_user_stats", get_user_stats)
+    backend.register_rpc("backfill_user_stats", backfill_user_stats)
@@ -0,0 +1,213 @@
+import datetime
+
+import flet as ft
+from analytics import HistoryArrays, chart_series
+from task_runner import get_task_runner
+from todo_view import MEDALS_PER_TASK, ToDoList
+
+CHART_DAYS = 14  # bars in the recent-activity row
+BAR_MAX_HEIGHT = 80
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def stats_view(page: ft.Page, todo_list: ToDoList):
+    """Streaks and totals, read from the incrementally maintained UserStats."""
+    if not todo_list:
+        return ft.View("/stats", [ft.Text("Error: Not logged in.")])
+
+    stats = todo_list.get_stats()  # O(1) after the first load
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+
+    def stat_card(label, value, icon, color):
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Icon(icon, color=color),
+                    ft.Text(str(value), size=24, weight="bold"),
+                    ft.Text(label, size=12),
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=2,
+            ),
+            padding=10,
+            expand=True,
+            border=ft.border.all(1, ft.colors.GREY),
+            border_radius=ft.border_radius.all(8),
+        )
+
+    days = [today - datetime.timedelta(days=n) for n in range(CHART_DAYS - 1, -1, -1)]
+    counts = [stats.completions_on(day.isoformat()) for day in days]
+    peak = max(counts) or 1
+    activity = ft.Row(
+        [
+            ft.Column(
+                [
+                    ft.Container(
+                        height=max(2, BAR_MAX_HEIGHT * count / peak),
+                        width=14,
+                        bgcolor=ft.colors.GREEN_400 if count else ft.colors.GREY_700,
+                        tooltip=f"{day.isoformat()}: {count} completed",
+                    ),
+                    ft.Text(day.strftime("%d"), size=10),
+                ],
+                alignment=ft.MainAxisAlignment.END,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=2,
+            )
+            for day, count in zip(days, counts)
+        ],
+        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+        vertical_alignment=ft.CrossAxisAlignment.END,
+        height=BAR_MAX_HEIGHT + 20,
+    )
+
+    # --- Progress charts: whole history, loaded in the background ---
+    progress = ft.Column([ft.ProgressRing(width=24, height=24)], spacing=10)
+
+    def line_chart(times, values, color):
+        x, y = chart_series(times, values)  # LTTB-downsampled
+        return ft.LineChart(
+            data_series=[
+                ft.LineChartData(
+                    data_points=[
+                        ft.LineChartDataPoint(float(px), float(py))
+                        for px, py in zip(x, y)
+                    ],
+                    color=color,
+                    stroke_width=2,
+                    curved=False,
+                )
+            ],
+            height=160,
+            expand=True,
+            tooltip_bgcolor=ft.colors.BLUE_GREY_900,
+        )
+
+    def heatmap(grid):
+        peak = grid.max() or 1
+        return ft.Column(
+            [
+                ft.Row(
+                    [ft.Text(WEEKDAYS[weekday], size=10, width=28)]
+                    + [
+                        ft.Container(
+                            width=10,
+                            height=10,
+                            bgcolor=ft.colors.with_opacity(
+                                0.1 + 0.9 * count / peak, ft.colors.GREEN_400
+                            ),
+                            tooltip=f"{WEEKDAYS[weekday]} {hour:02d}:00 UTC: {count}",
+                        )
+                        for hour, count in enumerate(grid[weekday])
+                    ],
+                    spacing=2,
+                )
+                for weekday in range(7)
+            ],
+            spacing=2,
+        )
+
+    def show_progress(history):
+        if not len(history.task_times):
+            progress.controls = [ft.Text("Complete some tasks to see your progress.")]
+            return
+        days, rate = history.rolling_completion_rate(window=7)
+        times, balance = history.medal_balance(MEDALS_PER_TASK)
+        progress.controls = [
+            ft.Text("Medal balance over time", style=ft.TextThemeStyle.TITLE_SMALL),
+            line_chart(times, balance, ft.colors.AMBER_400),
+            ft.Text(
+                "Tasks per day (7-day average)", style=ft.TextThemeStyle.TITLE_SMALL
+            ),
+            line_chart(days, rate, ft.colors.GREEN_400),
+            ft.Text("When you complete tasks", style=ft.TextThemeStyle.TITLE_SMALL),
+            heatmap(history.weekday_hour_heatmap()),
+        ]
+
+    def show_progress_error(exc):
+        progress.controls = [ft.Text(f"Could not load progress: {exc}")]
+
+    get_task_runner(page).run(
+        "load_progress",
+        lambda: HistoryArrays.load(todo_list.repository),
+        on_done=show_progress,
+        on_error=show_progress_error,
+    )
+
+    return ft.View(
+        "/stats",
+        [
+            ft.AppBar(
+                title=ft.Text("Stats"),
+                leading=ft.IconButton(
+                    icon=ft.icons.ARROW_BACK,
+                    tooltip="Back to Tasks",
+                    on_click=lambda _: page.go("/"),
+                ),
+            ),
+            ft.Column(
+                [
+                    ft.Row(
+                        [
+                            stat_card(
+                                "Current streak (days)",
+                                stats.streak_as_of(today),
+                                ft.icons.LOCAL_FIRE_DEPARTMENT,
+                                ft.colors.ORANGE_400,
+                            ),
+                            stat_card(
+                                "Longest streak",
+                                stats.longest_streak,
+                                ft.icons.EMOJI_EVENTS,
+                                ft.colors.AMBER_400,
+                            ),
+                        ]
+                    ),
+                    ft.Row(
+                        [
+                            stat_card(
+                                "Tasks completed",
+                                stats.tasks_completed,
+                                ft.icons.CHECK_CIRCLE,
+                                ft.colors.GREEN_400,
+                            ),
+                            stat_card(
+                                "Rewards claimed",
+                                stats.rewards_claimed,
+                                ft.icons.STAR_RATE_ROUNDED,
+                                ft.colors.YELLOW_400,
+                            ),
+                        ]
+                    ),
+                    ft.Row(
+                        [
+                            stat_card(
+                                "Medals earned",
+                                stats.medals_earned,
+                                ft.icons.ADD_CIRCLE,
+                                ft.colors.BLUE_300,
+                            ),
+                            stat_card(
+                                "Medals spent",
+                                stats.medals_spent,
+                                ft.icons.REMOVE_CIRCLE,
+                                ft.colors.RED_300,
+                            ),
+                        ]
+                    ),
+                    ft.Divider(height=20),
+                    ft.Text(
+                        f"Last {CHART_DAYS} days", style=ft.TextThemeStyle.TITLE_MEDIUM
+                    ),
+                    activity,
+                    ft.Divider(height=20),
+                    ft.Text("Progress", style=ft.TextThemeStyle.TITLE_MEDIUM),
+                    progress,
+                ],
+                expand=True,
+                scroll=ft.ScrollMode.ADAPTIVE,
+            ),
+            # bottom_appbar should be added by main.py's route_change
+        ],
+        padding=10,
+    )
@@ -0,0 +1,236 @@
+import csv
+import datetime
+import io
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+IMPORT_EXTENSIONS = ["csv", "json", "jsonl", "ndjson", "txt"]
+DEFAULT_BATCH_SIZE = 500  # rows per PostgREST bulk insert
+DEFAULT_MAX_IN_FLIGHT = 4  # concurrent insert requests
+MAX_TASK_LENGTH = 500
+MAX_REPORTED_ERRORS = 20
+_JSON_CHUNK = 64 * 1024
+
+
+class ImportResult:
+    """Counters for one import run; passed to the progress callback as it goes."""
+
+    def __init__(self, total_bytes=0):
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0  # valid rows lost to failed batch inserts
+        self.errors = []  # first few "line N: reason" messages
+        self.bytes_read = 0
+        self.total_bytes = total_bytes
+        self.cancelled = False
+
+    @property
+    def fraction(self):
+        return self.bytes_read / self.total_bytes if self.total_bytes else 0.0
+
+    def add_error(self, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def summary(self):
+        text = f"Imported {self.imported} tasks"
+        if self.skipped:
+            text += f", skipped {self.skipped} invalid rows"
+        if self.failed:
+            text += f", {self.failed} failed to save"
+        if self.cancelled:
+            text += " (cancelled)"
+        return text + "."
+
+
+# --- Parsing (lazy: one row in memory at a time) ---
+
+
+def _iter_csv(text):
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [c.strip().lower() for c in header]
+    if "task" not in columns:
+        # No header row: first column is the task, optional second is the due date
+        yield 1, {"task": header[0] if header else "", "due_date": _at(header, 1)}
+        columns = None
+    for line_no, row in enumerate(reader, start=2):
+        if not row:
+            continue
+        if columns is None:
+            yield line_no, {"task": row[0], "due_date": _at(row, 1)}
+        else:
+            yield line_no, dict(zip(columns, row))
+
+
+def _at(row, index):
+    return row[index] if len(row) > index else None
+
+
+def _iter_json_lines(text):
+    for line_no, line in enumerate(text, start=1):
+        line = line.strip()
+        if line:
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, ValueError(f"invalid JSON ({e.msg})")
+
+
+def _iter_json_array(text):
+    """Yields the items of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer, index, item_no = "", 0, 0
+    started = eof = False
+    while True:
+        # Skip whitespace and separators, reading more input as needed
+        while True:
+            while index < len(buffer) and buffer[index] in " \t\r\n,":
+                index += 1
+            if index < len(buffer) or eof:
+                break
+            chunk = text.read(_JSON_CHUNK)
+            buffer, index, eof = buffer[index:] + chunk, 0, not chunk
+        if index >= len(buffer):
+            return
+        if not started:
+            if buffer[index] != "[":
+                raise ValueError("JSON import expects an array of tasks")
+            started, index = True, index + 1
+            continue
+        if buffer[index] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, index)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError(f"invalid JSON near item {item_no + 1}")
+            chunk = text.read(_JSON_CHUNK)
+            buffer, index, eof = buffer[index:] + chunk, 0, not chunk
+            continue
+        item_no += 1
+        yield item_no, item
+        index = end
+        if index > _JSON_CHUNK:  # drop consumed input to keep memory flat
+            buffer, index = buffer[index:], 0
+
+
+def _iter_text(text):
+    for line_no, line in enumerate(text, start=1):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line_no, {"task": line}
+
+
+def iter_import_rows(text, extension):
+    """Yields (position, raw_row) pairs from an open text stream."""
+    extension = extension.lower().lstrip(".")
+    if extension == "csv":
+        return _iter_csv(text)
+    if extension in ("jsonl", "ndjson"):
+        return _iter_json_lines(text)
+    if extension == "json":
+        return _iter_json_array(text)
+    return _iter_text(text)
+
+
+def validate_row(raw):
+    """Returns (task_data, None) for a valid row or (None, reason)."""
+    if isinstance(raw, Exception):
+        return None, str(raw)
+    if isinstance(raw, str):
+        raw = {"task": raw}
+    if not isinstance(raw, dict):
+        return None, "expected an object with a 'task' field"
+    task = str(raw.get("task") or "").strip()
+    if not task:
+        return None, "missing task text"
+    if len(task) > MAX_TASK_LENGTH:
+        return None, f"task longer than {MAX_TASK_LENGTH} characters"
+    due_date = str(raw.get("due_date") or "").strip() or None
+    if due_date:
+        try:
+            due_date = datetime.date.fromisoformat(due_date[:10]).isoformat()
+        except ValueError:
+            return None, f"invalid due_date '{due_date}' (use YYYY-MM-DD)"
+    return {"task": task, "done": False, "due_date": due_date}, None
+
+
+# --- Import pipeline ---
+
+
+def import_tasks(
+    todo_list,
+    path,
+    batch_size=DEFAULT_BATCH_SIZE,
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    on_progress=None,
+    cancel_event=None,
+):
+    """Streams tasks from a CSV/JSON/NDJSON/text file into the tasks table.
+
+    Rows are parsed lazily and validated, then sent in bulk inserts of
+    batch_size with at most max_in_flight requests running at once. So
+    memory stays bounded by batch_size * max_in_flight rows, whatever the
+    file size. on_progress(result) is called after every batch."""
+    result = ImportResult(total_bytes=os.path.getsize(path))
+    extension = os.path.splitext(path)[1]
+    lock = threading.Lock()
+
+    def send(batch):
+        created = todo_list.add_tasks_bulk(batch)
+        with lock:
+            if created is None:
+                result.failed += len(batch)
+            else:
+                result.imported += len(batch)
+
+    def report():
+        if on_progress:
+            try:
+                on_progress(result)
+            except Exception as e:
+                print(f"Import progress callback failed: {e}")
+
+    with open(path, "rb") as raw, ThreadPoolExecutor(max_in_flight) as executor:
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        in_flight = set()
+        batch = []
+
+        def submit(rows):
+            nonlocal in_flight
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                report()
+            in_flight.add(executor.submit(send, rows))
+
+        try:
+            for position, raw_row in iter_import_rows(text, extension):
+                if cancel_event is not None and cancel_event.is_set():
+                    result.cancelled = True
+                    break
+                task_data, error = validate_row(raw_row)
+                if error:
+                    with lock:
+                        result.add_error(f"row {position}: {error}")
+                    continue
+                batch.append(task_data)
+                if len(batch) >= batch_size:
+                    result.bytes_read = raw.tell()
+                    submit(batch)
+                    batch = []
+        except ValueError as e:  # malformed JSON array, bad encoding, ...
+            with lock:
+                result.add_error(str(e))
+        if batch and not result.cancelled:
+            submit(batch)
+        wait(in_flight)
+        result.bytes_read = result.total_bytes
+    report()
+    print(f"Task import finished: {result.summary()}")
+    return result
@@ -0,0 +1,87 @@
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from update_scheduler import get_update_scheduler
+
+MAX_WORKERS = 8  # backend calls in flight across all sessions
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="backend")
+
+
+class TaskRunner:
+    """Runs blocking backend calls off the Flet event-handler thread.
+
+    run() returns immediately: the work goes to a bounded, shared executor
+    while the given controls are disabled (and an optional spinner shown).
+    A second run() with the same key is ignored until the first finishes,
+    so double clicks cannot fire duplicate requests. Completion callbacks
+    run one at a time per session, then the page is updated."""
+
+    def __init__(self, page, executor=None):
+        self.updates = get_update_scheduler(page)
+        self.executor = executor or _executor
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.ui_lock = threading.RLock()  # serializes completions per session
+
+    def is_pending(self, key):
+        with self.lock:
+            return key in self.pending
+
+    def run(self, key, work, on_done=None, on_error=None, busy=(), spinner=None):
+        """Submits work(). on_done(result) or on_error(exc) is called afterwards.
+        Returns False without doing anything if `key` is already running."""
+        with self.lock:
+            if key in self.pending:
+                print(f"Ignoring '{key}': already in progress.")
+                return False
+            self.pending.add(key)
+        self._set_pending(busy, spinner, True)
+        self.updates.request()
+        self.updates.flush()  # Show the pending state before the work starts
+        future = self.executor.submit(work)
+        future.add_done_callback(
+            lambda f: self._complete(key, f, on_done, on_error, busy, spinner)
+        )
+        return True
+
+    def _complete(self, key, future, on_done, on_error, busy, spinner):
+        with self.ui_lock:
+            try:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Background task '{key}' failed: {e}")
+                    if on_error:
+                        on_error(e)
+                else:
+                    if on_done:
+                        on_done(result)
+            except Exception as e:
+                print(f"Error finishing background task '{key}': {e}")
+            finally:
+                with self.lock:
+                    self.pending.discard(key)
+                self._set_pending(busy, spinner, False)
+                self.updates.request()
+
+    @staticmethod
+    def _set_pending(busy, spinner, pending):
+        for control in busy:
+            control.disabled = pending
+        if spinner is not None:
+            spinner.visible = pending
+
+
+_runners = weakref.WeakKeyDictionary()
+_runners_lock = threading.Lock()
+
+
+def get_task_runner(page):
+    """Returns the page's task runner, creating it on first use."""
+    with _runners_lock:
+        runner = _runners.get(page)
+        if runner is None:
+            runner = _runners[page] = TaskRunner(page)
+        return runner
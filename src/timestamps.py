@@ -0,0 +1,88 @@
+import datetime
+
+import arrow
+
+DISPLAY_FORMAT = "YYYY-MM-DD HH:mm"  # arrow tokens, kept for the fallback path
+DAY_NAMES = (
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+_MEMO_SIZE = 4096
+_minute_memo = {}  # 'YYYY-MM-DDTHH:MM' -> 'YYYY-MM-DD HH:MM'
+
+
+def parse_timestamp(value):
+    """Returns an aware datetime for an ISO-8601 timestamp, or None.
+
+    The shapes PostgREST and SQLite produce go through datetime.fromisoformat
+    (C code); anything else falls back to arrow's generic parser."""
+    if isinstance(value, datetime.datetime):
+        return value
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(str(value))
+    except ValueError:
+        try:
+            return arrow.get(value).datetime
+        except (arrow.parser.ParserError, TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def format_timestamp(value):
+    """'YYYY-MM-DD HH:MM' in the timestamp's own offset (like arrow's
+    format), or None when it cannot be parsed.
+
+    History rows only differ below the minute in the common case, so the
+    formatted string is memoized per minute: most rows cost a slice and a
+    dict lookup."""
+    if isinstance(value, str) and len(value) >= 16 and value[10] in "T ":
+        minute = value[:16]
+        cached = _minute_memo.get(minute)
+        if cached is not None:
+            return cached
+        try:
+            datetime.datetime.fromisoformat(minute)  # validates the bucket
+        except ValueError:
+            return _format_slow(value)
+        if len(_minute_memo) >= _MEMO_SIZE:
+            _minute_memo.clear()
+        formatted = _minute_memo[minute] = f"{minute[:10]} {minute[11:]}"
+        return formatted
+    return _format_slow(value)
+
+
+def _format_slow(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.strftime("%Y-%m-%d %H:%M")
+    try:
+        return arrow.get(value).format(DISPLAY_FORMAT)
+    except (arrow.parser.ParserError, TypeError, ValueError):
+        return None
+
+
+def format_date(value):
+    """'YYYY-MM-DD' for a date, datetime or ISO string; None if unparseable."""
+    if not value:
+        return None
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.strftime("%Y-%m-%d")
+    value = str(value)
+    try:
+        return datetime.date.fromisoformat(value[:10]).isoformat()
+    except ValueError:
+        parsed = parse_timestamp(value)
+        return parsed.strftime("%Y-%m-%d") if parsed else None
+
+
+def day_name(date):
+    """English weekday name, independent of the process locale."""
+    return DAY_NAMES[date.weekday()]
@@ -1,37 +1,40 @@
 # c:\Users\nrmlc\OneDrive\Desktop\Reward_Yourself_ToDO\todo_view.py
 import datetime
-'''import os
-import sys'''
-import requests
-from requests.exceptions import RequestException, HTTPError, Timeout
-import json
+
+"""import os
+import sys"""
+from requests.exceptions import RequestException
 import config_loader
+from delta_sync import TableSync
+from due_date_index import DueDateIndex
+from records import Reward, RewardHistoryEntry, Task, TaskHistoryEntry
+from reward_index import RewardCostIndex
+from recurrence import Rule
+from search_index import SearchHit, SearchIndex
+from history_export import HISTORY_TABLES, iter_history
+from stats import DASHBOARD_DAYS, UserStats, register_sqlite_stats
+from medal_ledger import register_sqlite_ledger
+from manual_order import ordered, register_sqlite_positions
+from repository import Repository, create_repository
 from supabase import Client
 
-# Import Supabase/PostgREST exceptions if needed for specific checks
-from postgrest import APIError as PostgrestAPIError
+# Import Supabase auth exceptions if needed for specific checks
 from gotrue.errors import AuthApiError
 import traceback
 
-# Get config values from the loader
-SUPABASE_URL = config_loader.get_supabase_url()
-SUPABASE_KEY = config_loader.get_supabase_anon_key()  # This is the Anon Key
-
-# Check if loading failed
-if config_loader.CONFIG_ERROR:
-    print(
-        f"ToDoList - Warning: Configuration error detected: {config_loader.CONFIG_ERROR}"
-    )
-    # Handle error appropriately - maybe raise an exception or disable functionality
-
 # --- Constants ---
 MEDALS_PER_TASK = 1  # Define how many medals a task is worth
-
-# Keep the print statement for debugging if needed
-print(
-    f"ToDoList - Using API Key (Anon): {'*' * (len(SUPABASE_KEY) - 5) + SUPABASE_KEY[-5:] if SUPABASE_KEY else 'Not Set'}"
-)
-print(f"ToDoList - Using API URL: {SUPABASE_URL}")
+# Select params shared with prefetch.py so warmed cache entries match exactly
+TASKS_QUERY = {"select": "*", "order": "position.asc,id.asc"}
+REWARDS_QUERY = {"select": "*", "order": "position.asc,id.asc"}
+HISTORY_QUERY = {"select": "*", "order": "timestamp.desc"}
+# Searchable kinds: kind -> (text field, field ranking new documents)
+SEARCH_FIELDS = {
+    "task": ("task", None),
+    "reward": ("reward", None),
+    "task_history": ("description", "timestamp"),
+    "reward_history": ("description", "timestamp"),
+}
 
 
 class ToDoList:
@@ -42,20 +45,61 @@ class ToDoList:
         is_web_environment,
         supabase_client: Client,
         # user_manager: UserManager, # Removed user_manager parameter
+        repository: Repository = None,
     ):
         self.username = username
         self.is_web_environment = is_web_environment
-        self.api_url = f"{SUPABASE_URL}/rest/v1" if SUPABASE_URL else None
+        supabase_url = config_loader.get_config().supabase_url
+        self.api_url = f"{supabase_url}/rest/v1" if supabase_url else None
         self.rpc_url = (
-            f"{SUPABASE_URL}/rest/v1/rpc" if SUPABASE_URL else None
+            f"{supabase_url}/rest/v1/rpc" if supabase_url else None
         )  # Add RPC URL
         self.access_token = None
         self.user_id = None  # Will be set later
         self.refresh_token = None
-        self.session = requests.Session()
         self.supabase_client = supabase_client
+        # All table reads/writes and RPCs go through the shared data-access layer
+        self.repository = repository or create_repository(
+            supabase_client=supabase_client
+        )
+        self.due_index = DueDateIndex()  # Kept in sync on fetch/add/complete
+        self.reward_index = RewardCostIndex()  # Kept in sync on fetch/add/claim
+        self.medal_count = None  # Last balance seen from the server
+        self.medal_listeners = {}  # name -> function(new_count)
+        self.search_index = SearchIndex()  # Same, plus rewards and history
+        self.stats = None  # UserStats, loaded on first get_stats()
+        self.crowded_tables = set()  # lists whose positions need a rebalance
+        if (
+            self.repository.backend.name == "sqlite"
+            and "get_user_stats" not in self.repository.backend.rpc_functions
+        ):
+            register_sqlite_stats(self.repository.backend, MEDALS_PER_TASK)
+        if (
+            self.repository.backend.name == "sqlite"
+            and "reconcile_medal_ledger" not in self.repository.backend.rpc_functions
+        ):
+            register_sqlite_ledger(self.repository.backend, MEDALS_PER_TASK)
+        if (
+            self.repository.backend.name == "sqlite"
+            and "rebalance_positions" not in self.repository.backend.rpc_functions
+        ):
+            register_sqlite_positions(self.repository.backend)
+        # Delta sync mode: refetch only rows changed since the last refresh
+        self.syncs = {}
+        if config_loader.get_config().delta_sync:
+            self.syncs = {
+                "tasks": TableSync(
+                    self.repository, "tasks", TASKS_QUERY, decode=Task.from_rows
+                ),
+                "rewards": TableSync(
+                    self.repository, "rewards", REWARDS_QUERY, decode=Reward.from_rows
+                ),
+            }
         # self.user_manager = user_manager # Removed user_manager storage
 
+        print(
+            f"ToDoList - Using API URL: {supabase_url} (backend: {self.repository.backend.name})"
+        )
         if not self.api_url:
             print("ToDoList Error: API URL is not configured. Check config.json.")
         if not self.rpc_url:
@@ -75,22 +119,20 @@ class ToDoList:
         if refresh_token:
             self.refresh_token = refresh_token
 
-        if not SUPABASE_KEY:  # Check Anon Key from config_loader
+        supabase_key = config_loader.get_config().supabase_anon_key
+        if not supabase_key:  # Check Anon Key from config_loader
             print(
                 "ToDoList Error: Supabase Anon Key not configured. Cannot set auth headers."
             )
             return
 
-        # Update requests session headers (for direct REST calls via _make_request)
-        self.session.headers.update(
-            {
-                "Authorization": f"Bearer {self.access_token}",
-                "apikey": SUPABASE_KEY,  # Use Anon key from config_loader
-                "Content-Type": "application/json",
-                "Prefer": "return=representation",
-            }
-        )
-        print("Access token set in requests session headers.")
+        # Update the data-access layer (HTTP headers, cache scope). check_login
+        # re-validates the same session on every route change; only a new
+        # identity drops the cache and starts delta sync from a full snapshot.
+        if self.repository.set_auth(self.access_token, self.user_id):
+            for sync in self.syncs.values():
+                sync.mark_gap()
+        print("Access token set in repository backend.")
 
         # ALSO set session in the supabase-py client instance
         if self.supabase_client and self.access_token and self.refresh_token:
@@ -104,86 +146,6 @@ class ToDoList:
         elif not self.supabase_client:
             print("Warning: supabase_client not available in set_access_token.")
 
-    def _make_request(self, method, endpoint, base_url=None, **kwargs):
-        """Helper method for making synchronous requests (Data or RPC) via requests library."""
-        if config_loader.CONFIG_ERROR:
-            print(
-                f"Error: Cannot make request due to config error: {config_loader.CONFIG_ERROR}"
-            )
-            return None
-
-        current_base_url = base_url if base_url else self.api_url
-        if not current_base_url:
-            print(f"Error: Base URL ({'RPC' if base_url else 'Data'}) not configured.")
-            return None
-
-        if not self.access_token:
-            print("Error: Access token not set for API call.")
-            return None
-
-        url = f"{current_base_url}/{endpoint}"
-        # Use headers from self.session which are set in set_access_token
-        headers = self.session.headers
-
-        print(f"Making {method} request to: {url}")
-        try:
-            response = requests.request(
-                method, url, headers=headers, timeout=15, **kwargs
-            )  # Use requests.request
-            print(f"Response Status: {response.status_code}")
-
-            response.raise_for_status()  # Check for HTTP errors first
-
-            # Handle success based on status code and method
-            if response.status_code == 204:  # No Content (e.g., DELETE)
-                return True  # Return True for successful DELETE
-            # Check for empty body even on 200/201
-            if not response.content:
-                if method == "GET":
-                    return []  # Empty list for GET
-                # For POST RPC, 200 OK with empty body might be success
-                if method == "POST" and endpoint.startswith(
-                    "increment_user_medal_count"
-                ):  # Check specific RPC endpoint name
-                    # Our RPC should return JSON, so empty body is unexpected here
-                    print(f"Warning: RPC {endpoint} returned 200 OK but empty body.")
-                    return None  # Indicate potential issue
-                # For other POSTs (like history insert), empty body on 201 might be okay
-                if method == "POST" and response.status_code == 201:
-                    print(
-                        f"Warning: POST to {endpoint} returned 201 Created but empty body."
-                    )
-                    # Let's assume success if status is 201, but log it.
-                    # Supabase often returns the created object, so empty is unusual.
-                    return (
-                        {}
-                    )  # Return an empty dict to indicate success but no data returned
-                return True  # Assume success for other POSTs with empty body? Or handle specific cases.
-            # If body is not empty, try parsing JSON
-            return response.json()
-
-        except HTTPError as e:
-            print(
-                f"HTTP Error during {method} {url}: {e.response.status_code} - {e.response.text}"
-            )
-            if e.response.status_code == 401:
-                print("Authorization Error (401): Token might be expired or invalid.")
-            return None
-        except requests.exceptions.Timeout:
-            print(f"Timeout Error during {method} {url}")
-            return None
-        except RequestException as e:
-            print(f"Network Error during {method} {url}: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            print(
-                f"JSON Decode Error during {method} {url}: {e} - Response: {response.text[:200]}"
-            )
-            return None
-        except Exception as e:
-            print(f"Unexpected error during {method} {url}: {e}")
-            return None
-
     # --- Modified get_medal_count (More Robust Error Handling) ---
     def get_medal_count(self):
         """Fetches the current user's medal count from the public.user_profiles table.
@@ -193,13 +155,6 @@ class ToDoList:
             print("Error: Supabase client not available for get_medal_count.")
             return None
 
-        if (
-            not self.supabase_client.supabase_url
-            or not self.supabase_client.supabase_key
-        ):
-            print("Error: Supabase client URL or Key is missing before query.")
-            return None
-
         current_user_id = None
         profile_data = None  # To store fetched profile data
 
@@ -223,41 +178,17 @@ class ToDoList:
 
             # --- Attempt to Fetch Profile ---
             print(f"Querying 'user_profiles' table for id: {current_user_id}")
-            response = None  # Initialize response
-            try:
-                # Build the query first
-                query = (
-                    self.supabase_client.table("user_profiles")
-                    .select("medal_count")
-                    .eq("id", current_user_id)
-                    .maybe_single()
-                )
-                # Execute the query
-                print("Executing profile fetch query...")
-                response = query.execute()
-                print("Profile fetch query executed.")
-
-            except (RequestException, Timeout) as network_err:
-                print(f"Network Error during profile query execution: {network_err}")
-                traceback.print_exc()
-                return None
-            except PostgrestAPIError as pg_err:
-                print(f"PostgREST API Error during profile query: {pg_err}")
-                traceback.print_exc()
-                return None
-            except Exception as exec_err:
-                print(f"Unexpected Error during profile query execution: {exec_err}")
-                traceback.print_exc()
-                return None
-
-            # --- Check Response Object ---
-            if response is None:
-                # This is the persistent strange issue
-                print("Error: Supabase query execution resulted in None object.")
+            profile_params = {"select": "medal_count", "id": f"eq.{current_user_id}"}
+            # The balance can change on another device, so never serve it from cache
+            rows = self.repository.select(
+                "user_profiles", profile_params, use_cache=False
+            )
+            if rows is None:
+                print("Error: Profile query failed.")
                 return None
 
             # --- Process Response Data ---
-            profile_data = response.data  # Store data (can be None if no profile found)
+            profile_data = rows[0] if rows else None
             print(f"Profile query response data: {profile_data}")
 
             if profile_data is not None:
@@ -265,64 +196,34 @@ class ToDoList:
                 count = profile_data.get("medal_count", 0)
                 print(f"Fetched medal count from profile: {count}")
                 try:
-                    return int(count)
+                    return self._set_medal_count(int(count))
                 except (ValueError, TypeError):
                     print(
                         f"Warning: Invalid medal count '{count}' in profile. Returning 0."
                     )
-                    return 0
+                    return self._set_medal_count(0)
             else:
                 # --- Profile Not Found - Attempt to Create ---
                 print(
                     f"No profile found for user ID {current_user_id}. Attempting to create one."
                 )
-                try:
-                    profile_insert_data = {"id": current_user_id, "medal_count": 0}
-                    print(f"Inserting profile data: {profile_insert_data}")
-                    insert_response = (
-                        self.supabase_client.table("user_profiles")
-                        .insert(profile_insert_data)
-                        .execute()
+                profile_insert_data = {"id": current_user_id, "medal_count": 0}
+                print(f"Inserting profile data: {profile_insert_data}")
+                inserted = self.repository.insert("user_profiles", profile_insert_data)
+                if inserted is not None:
+                    print(
+                        f"Successfully inserted default profile for user {current_user_id}."
                     )
-
-                    if insert_response is None:
-                        print(
-                            "Error: Profile insert execution resulted in None object."
-                        )
-                        return None  # Failed to insert
-
-                    print(f"Profile insert response data: {insert_response.data}")
-                    if insert_response.data:
-                        print(
-                            f"Successfully inserted default profile for user {current_user_id}."
-                        )
-                        return 0  # Return 0 as the initial count
-                    else:
-                        # Check for specific errors if data is empty/None
-                        error_info = getattr(insert_response, "error", None)
-                        status_code = getattr(insert_response, "status_code", None)
-                        print(
-                            f"Failed to insert default profile (no data returned). Status: {status_code}, Error: {error_info}"
-                        )
-                        return None
-
-                except PostgrestAPIError as insert_pg_err:
-                    print(f"PostgREST Error inserting default profile: {insert_pg_err}")
-                    if (
-                        'duplicate key value violates unique constraint "user_profiles_pkey"'
-                        in str(insert_pg_err)
-                    ):
-                        print(
-                            "Profile likely created concurrently. Assuming 0 medals for now."
-                        )
-                        return 0
-                    else:
-                        traceback.print_exc()
-                        return None
-                except Exception as insert_e:
-                    print(f"Unexpected Error inserting default profile: {insert_e}")
-                    traceback.print_exc()
-                    return None
+                    return self._set_medal_count(0)  # Return 0 as the initial count
+                # The insert may have lost a race with a concurrent creation
+                rows = self.repository.select(
+                    "user_profiles", profile_params, use_cache=False
+                )
+                if rows:
+                    print("Profile likely created concurrently. Using stored count.")
+                    return self._set_medal_count(int(rows[0].get("medal_count") or 0))
+                print("Failed to insert default profile.")
+                return None
                 # --- End Profile Creation Attempt ---
 
         except Exception as e:
@@ -333,65 +234,146 @@ class ToDoList:
 
     # --- End modification ---
 
-    def _update_medal_count_rpc(self, amount_to_add):
-        """Updates the user's medal count using the RPC function (which now targets user_profiles).
-        Returns the new count on success, None on failure."""
-        print(f"--- _update_medal_count_rpc called with amount: {amount_to_add} ---")
-        if not self.rpc_url:
-            print("Error: Cannot update medal count, RPC URL not set.")
-            return None
-        if not self.access_token:
-            print("Error: Cannot update medal count, access token not set.")
-            return None
-
-        endpoint = "increment_user_medal_count"  # This function name remains the same
-        payload = {"amount_param": amount_to_add}
-        print(f"Calling RPC: {endpoint} with payload: {payload}")
-
-        # Use _make_request which uses the standard REST endpoint for RPC
-        response_data = self._make_request(
-            "POST", endpoint, base_url=self.rpc_url, json=payload
+    def add_medal_listener(self, name, function):
+        """Registers function(new_count), called whenever the cached medal
+        balance changes. A later registration under the same name replaces
+        the earlier one (views are rebuilt)."""
+        self.medal_listeners[name] = function
+
+    def _set_medal_count(self, count):
+        """Caches a balance read from or returned by the server, notifies
+        listeners if it changed, and returns it."""
+        if count != self.medal_count:
+            self.medal_count = count
+            for listener in list(self.medal_listeners.values()):
+                try:
+                    listener(count)
+                except Exception as e:
+                    print(f"Medal listener error: {e}")
+        return count
+
+    def reconcile_medals(self):
+        """Runs the medal ledger reconciliation: records history the ledger
+        missed, reverses entries for deleted history and resets a drifted
+        balance. Returns the summary dict (added, reversed, drift, balance),
+        or None on failure (e.g. the ledger migration is not applied)."""
+        result = self.repository.rpc(
+            "reconcile_medal_ledger", {}, invalidates=("user_profiles",)
         )
-        print(f"RPC Response Data: {response_data}")  # Log the raw response
-
-        # Check for success more carefully
-        if response_data is None:
-            print(
-                "Failed to update medal count via RPC: No response from _make_request."
-            )
-            return None
-        elif isinstance(response_data, dict) and response_data.get("success"):
-            new_count = response_data.get("new_medal_count")
-            # Validate new_count type
-            if isinstance(new_count, int):
-                print(
-                    f"Successfully updated medal count via RPC. New count: {new_count}"
-                )
-                return new_count
-            else:
-                print(
-                    f"RPC success=true, but new_medal_count is not an integer: {new_count}"
-                )
-                return None  # Treat invalid count as failure
-        else:
-            # Handle cases where response_data is not a dict or success is not true
-            error_msg = "Unknown RPC error or invalid response format"
-            if isinstance(response_data, dict):
-                error_msg = response_data.get("error", error_msg)
-            print(f"Failed to update medal count via RPC: {error_msg}")
-            if "permission denied" in str(error_msg).lower():
-                print(
-                    "Hint: Check if EXECUTE permission was granted to the 'authenticated' role for the function, or if RLS prevents the update."
-                )
+        if not isinstance(result, dict):
             return None
+        if result.get("drift") or result.get("added") or result.get("reversed"):
+            print(f"Medal ledger reconciled: {result}")
+        if isinstance(result.get("balance"), int):
+            self._set_medal_count(result["balance"])
+        return result
+
+    def get_medal_history(self, since=None):
+        """Balance after each medal change since `since` (datetime; default
+        30 days ago) from the ledger, oldest first: dicts with entry_id,
+        created_at, delta, reason and balance. Returns None on failure."""
+        payload = {"since": since.isoformat()} if since else {}
+        data = self.repository.rpc("get_medal_history", payload)
+        return data if isinstance(data, list) else None
 
     def get_all_tasks(self):
-        """Fetches all tasks for the user (synchronous)."""
+        """Fetches all tasks for the user (synchronous) as records.Task, in
+        the user's manual order."""
         endpoint = "tasks"
         # RLS on 'tasks' table should filter by user_id automatically
-        params = {"select": "*"}
-        data = self._make_request("GET", endpoint, params=params)
-        return data if isinstance(data, list) else []
+        data = self._synced_rows(endpoint)
+        if data is None:
+            data = self.repository.select(endpoint, TASKS_QUERY, decode=Task.from_rows)
+        if not isinstance(data, list):
+            return []
+        data = self._in_manual_order(endpoint, data)
+        self.due_index.rebuild(data)
+        self._index_kind("task", data)
+        return data
+
+    def _in_manual_order(self, table, items):
+        # Delta-synced rows come back unordered, so sort here too
+        items = ordered(items)
+        if items and items[-1].get("position") is None:
+            self.crowded_tables.add(table)  # rows from before manual order
+        return items
+
+    def save_position(self, table, item_id, position):
+        """Writes the manual-order position of one task or reward (the only
+        row a move changes). Returns the updated rows, or None on failure."""
+        updated = self.repository.update(
+            table, {"id": f"eq.{item_id}"}, {"position": position}
+        )
+        if not updated:
+            print(f"Failed to save the position of {table} row {item_id}.")
+            return None
+        self._sync_local(table, updated)
+        return updated
+
+    def rebalance_positions(self, table):
+        """Spreads the positions of a list evenly again, keeping its order,
+        in one RPC. Returns the number of rows moved, or None on failure."""
+        moved = self.repository.rpc(
+            "rebalance_positions",
+            {"table_name": table},
+            invalidates=(table,),
+            idempotent=True,  # recomputes the same positions when retried
+        )
+        if moved is None:
+            print(f"Failed to rebalance positions of {table}.")
+            return None
+        # Moved rows got new updated_at stamps, so delta sync refetches them
+        self.crowded_tables.discard(table)
+        print(f"Rebalanced {moved} position(s) in {table}.")
+        return moved
+
+    def _index_kind(self, kind, items):
+        field, order_field = SEARCH_FIELDS[kind]
+        self.search_index.replace_kind(kind, items, field, order_field)
+
+    def _index_rows(self, kind, record, response):
+        """Adds the rows an insert echoed back to the search index."""
+        rows = response if isinstance(response, list) else [response]
+        field = SEARCH_FIELDS[kind][0]
+        for item in record.from_rows(r for r in rows if isinstance(r, dict)):
+            self.search_index.add(kind, item.id, item.get(field), item)
+
+    def _synced_rows(self, table):
+        """Rows from the delta-synced copy of table, or None when delta sync is
+        off for it (or could not reach the backend)."""
+        sync = self.syncs.get(table)
+        return sync.refresh() if sync else None
+
+    def _sync_local(self, table, rows=(), deleted_id=None):
+        sync = self.syncs.get(table)
+        if not sync:
+            return
+        sync.apply_local(rows)
+        if deleted_id is not None:
+            sync.discard_local(deleted_id)
+
+    def get_due_task_counts(self, start_date, end_date):
+        """Fetches per-day counts of tasks due between start_date and end_date
+        (inclusive) in one grouped query. Returns {'YYYY-MM-DD': count}."""
+        endpoint = "get_due_task_counts"
+        payload = {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+        }
+        data = self.repository.rpc(endpoint, payload)
+        if not isinstance(data, list):
+            return {}
+        counts = {}
+        for row in data:
+            due_date = row.get("due_date")
+            if due_date:
+                counts[str(due_date)[:10]] = int(row.get("task_count") or 0)
+        # The server counts each recurring task once, at its next occurrence
+        for day, count in self.due_index.repeat_counts_between(
+            start_date, end_date
+        ).items():
+            counts[day] = counts.get(day, 0) + count
+        return counts
 
     def add_new_task(self, task_data):
         """Adds a new task for the user (synchronous). Relies on RLS for user_id."""
@@ -401,6 +383,23 @@ class ToDoList:
             return None
         # Ensure username is part of the data if your table/RLS needs it
         task_data["username"] = self.username
+        if task_data.get("recurrence"):
+            rule = Rule.parse(task_data["recurrence"])
+            if rule is None:
+                print(f"Error: Unsupported recurrence '{task_data['recurrence']}'.")
+                return None
+            # The due date anchors the series; a habit starts today by default,
+            # moved to the first day the rule generates (a weekday habit
+            # created on Saturday starts on Monday)
+            due_date = task_data.get("due_date") or datetime.date.today().isoformat()
+            anchor = rule.first_on_or_after(due_date)
+            if anchor is None:
+                print(f"Error: Recurrence '{rule.to_text()}' has no occurrences.")
+                return None
+            task_data["recurrence"] = rule.to_text()
+            if anchor.isoformat() != str(due_date)[:10]:
+                due_date = anchor.isoformat()
+            task_data["due_date"] = due_date
 
         # --- Remove explicit user_id ---
         # We rely on RLS (auth.uid()) to set the user association implicitly
@@ -409,24 +408,59 @@ class ToDoList:
         # --- End Removal ---
 
         print(f"Sending task data to API (RLS handles user_id): {task_data}")
-        response_data = self._make_request("POST", endpoint, json=task_data)
+        response_data = self.repository.insert(endpoint, task_data)
         if (
             response_data is not None
         ):  # Check if response is not None (success or empty dict/list)
             print("Task added successfully.")
+            # With return=representation PostgREST echoes the created row(s)
+            created_rows = (
+                response_data if isinstance(response_data, list) else [response_data]
+            )
+            for task in Task.from_rows(r for r in created_rows if isinstance(r, dict)):
+                self.due_index.add(task)
+                self.search_index.add("task", task.id, task.task, task)
+            self._sync_local(endpoint, created_rows)
             return response_data  # Return the actual response (might be {} or the created object)
         else:
             print("Failed to add task.")
             return None
 
+    def add_tasks_bulk(self, tasks):
+        """Inserts many tasks in one request (PostgREST bulk insert).
+        Returns the created rows, or None on failure."""
+        if not self.username:
+            print("Error: Username not set. Cannot add tasks.")
+            return None
+        rows = [dict(task, username=self.username) for task in tasks]
+        response_data = self.repository.insert("tasks", rows)
+        if response_data is None:
+            print(f"Failed to add a batch of {len(rows)} tasks.")
+            return None
+        created_rows = response_data if isinstance(response_data, list) else []
+        for task in Task.from_rows(r for r in created_rows if isinstance(r, dict)):
+            self.due_index.add(task)
+            self.search_index.add("task", task.id, task.task, task)
+        self._sync_local("tasks", created_rows)
+        return created_rows
+
     def get_all_rewards(self):
-        """Fetches all rewards for the user (synchronous)."""
+        """Fetches all rewards for the user (synchronous) as records.Reward, in
+        the user's manual order."""
         endpoint = "rewards"
         # RLS on 'rewards' table should filter by user_id automatically
-        params = {"select": "*"}
-        data = self._make_request("GET", endpoint, params=params)
+        data = self._synced_rows(endpoint)
+        if data is None:
+            data = self.repository.select(
+                endpoint, REWARDS_QUERY, decode=Reward.from_rows
+            )
         print(f"Fetched Rewards from API: {data}")
-        return data if isinstance(data, list) else []
+        if not isinstance(data, list):
+            return []
+        data = self._in_manual_order(endpoint, data)
+        self.reward_index.rebuild(data)
+        self._index_kind("reward", data)
+        return data
 
     def add_new_reward(self, reward_data):
         """Adds a new reward for the user (synchronous). Relies on RLS for user_id."""
@@ -444,9 +478,17 @@ class ToDoList:
         # --- End Removal ---
 
         print(f"Sending reward data to API (RLS handles user_id): {reward_data}")
-        response_data = self._make_request("POST", endpoint, json=reward_data)
+        response_data = self.repository.insert(endpoint, reward_data)
         if response_data is not None:  # Check if response is not None
             print("Reward added successfully.")
+            self._index_rows("reward", Reward, response_data)
+            rows = response_data if isinstance(response_data, list) else [response_data]
+            for reward in Reward.from_rows(r for r in rows if isinstance(r, dict)):
+                self.reward_index.add(reward)
+            self._sync_local(
+                endpoint,
+                response_data if isinstance(response_data, list) else [response_data],
+            )
             return response_data  # Return the actual response
         else:
             print("Failed to add reward.")
@@ -456,148 +498,238 @@ class ToDoList:
         """Marks a task as done, adds to history, and increments medals.
         Returns (True, new_medal_count) on success, (False, None) on failure."""
         print(f"--- mark_task_done called for task ID: {task_id} ---")
+        return self.complete_tasks([(task_id, task_name)])
+
+    def complete_tasks(self, completions):
+        """Completes many tasks with one complete_tasks RPC. In a single
+        transaction the server adds the history rows (which award the
+        medals), deletes finished tasks and moves recurring ones to their
+        next occurrence, so medals never move without the tasks going.
+        Tasks an earlier attempt already completed are skipped, so a retry
+        cannot count twice. completions is a list of (task_id, task_name).
+        Returns (True, new_medal_count) on success, (False, None) on failure."""
+        if not completions:
+            return True, self.medal_count
+        print(f"--- complete_tasks called for {len(completions)} task(s) ---")
+
+        items = []
+        for task_id, task_name in completions:
+            item = {"task_id": task_id, "description": task_name}
+            next_day, next_rule, due_day = self._next_occurrence(task_id)
+            if next_day is not None:
+                item.update(
+                    due_date=due_day,
+                    next_due_date=next_day.isoformat(),
+                    next_recurrence=next_rule.to_text(),
+                )
+            items.append(item)
 
-        # 1. Add to task history
-        history_data = {
-            "description": task_name,
-            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-        }
-        history_endpoint = "task_history"
-        if self.username:
-            history_data["username"] = self.username
-        # user_id is likely handled by RLS, but include if needed by table/policy
-        if self.user_id:
-            history_data["user_id"] = self.user_id
-
-        print(f"Step 1: Sending task history data: {history_data}")
-        history_response = self._make_request(
-            "POST", history_endpoint, json=history_data
+        result = self.repository.rpc(
+            "complete_tasks",
+            {"completions": items},
+            invalidates=("tasks", "task_history"),
+            idempotent=True,  # completed tasks are skipped on a retry
         )
-        if history_response is None:
-            print("Error adding task to history. Aborting task completion.")
+        if not isinstance(result, dict) or not result.get("success"):
+            print(f"Error completing tasks: {result}")
             return False, None
 
-        print("Step 1: Task history added successfully.")
-
-        # 2. Delete the task
-        task_endpoint = f"tasks?id=eq.{task_id}"
-        print(f"Step 2: Deleting task: {task_endpoint}")
-        delete_success = self._make_request("DELETE", task_endpoint)
-        if not delete_success:  # Expects True on success (204)
-            print(f"Error deleting task {task_id} after adding to history.")
-            return False, None
-
-        print("Step 2: Task deleted successfully.")
-
-        # 3. Increment medal count (using RPC which now targets user_profiles)
-        print(f"Step 3: Attempting to increment medals by {MEDALS_PER_TASK}")
-        new_medal_count = self._update_medal_count_rpc(MEDALS_PER_TASK)
-        print(f"Step 3 Result: new_medal_count = {new_medal_count}")
+        for task_id in result.get("completed") or []:
+            self.due_index.remove(task_id)
+            self._sync_local("tasks", deleted_id=task_id)
+            self.search_index.remove("task", task_id)
+        rescheduled = result.get("tasks") or []
+        for task in Task.from_rows(r for r in rescheduled if isinstance(r, dict)):
+            self.due_index.add(task)
+            self.search_index.add("task", task.id, task.task, task)
+        self._sync_local("tasks", rescheduled)
+        history = result.get("history") or []
+        self._index_rows("task_history", TaskHistoryEntry, history)
+        if self.stats:
+            for row in history:
+                self.stats.record_completion(
+                    str(row.get("timestamp"))[:10], MEDALS_PER_TASK
+                )
 
+        new_medal_count = result.get("new_medal_count")
         if new_medal_count is None:
-            print(
-                f"Warning: Task {task_id} completed and deleted, but failed to update medal count."
-            )
-            return True, None  # Task done, but medal count update failed
-        else:
-            print(f"Task {task_id} processing finished successfully.")
-            return True, new_medal_count
+            print("Warning: Tasks completed, but no medal count was returned.")
+            return True, None
+        print(f"Completion of {len(history)} task(s) finished successfully.")
+        return True, self._set_medal_count(int(new_medal_count))
+
+    def _next_occurrence(self, task_id):
+        """(next date, rule to store, due day being completed) for a
+        recurring task: its next occurrence after today (missed ones are
+        skipped), so a habit stays a single row. (None, None, None) when
+        the task does not recur or its series has ended, and it should be
+        deleted instead."""
+        task = self.due_index.get(task_id)
+        rule = self.due_index.rule(task_id)
+        if task is None or rule is None:
+            return None, None, None
+        today = datetime.date.today().isoformat()
+        due_day = str(task.due_date)[:10]
+        next_day, next_rule = rule.next_after(due_day, max(due_day, today))
+        if next_day is None:
+            return None, None, None
+        return next_day, next_rule, due_day
 
     # --- Modified claim_reward (Add Logging) ---
     def claim_reward(self, reward_id, reward_name, reward_cost):
-        """Claims a reward, adds to history, and decrements medals.
+        """Claims a reward with one claim_reward RPC: the server checks the
+        balance against the stored cost, adds the history row (which takes
+        the medals) and deletes the reward in a single transaction.
         Returns (True, new_medal_count) on success, (False, error_message) on failure.
         """
-        print(
-            f"--- claim_reward started: {reward_name}, Cost: {reward_cost} ---"
-        )  # Modified log
-        # 0. Check funds
-        current_medals = self.get_medal_count()
-        print(f"claim_reward: Current medals check: {current_medals}")  # Added log
-        if current_medals is None:
-            print("claim_reward: Error fetching current medal count.")
-            return False, "Error fetching medal count."
-        if reward_cost > current_medals:
-            msg = f"claim_reward: Not enough medals ({current_medals}) to claim reward costing {reward_cost}."
-            print(msg)
-            return False, msg
-        print("claim_reward: Medal check passed.")  # Added log
-
-        # 1. Add to reward history
-        history_data = {
-            "description": reward_name,
-            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-            "cost": reward_cost,
-        }
-        history_endpoint = "reward_history"
-        if self.username:
-            history_data["username"] = self.username
-        # user_id is likely handled by RLS, include if needed
-        if self.user_id:
-            history_data["user_id"] = self.user_id
-
-        print(f"claim_reward: Step 1 - Sending reward history data: {history_data}")
-        history_response = self._make_request(
-            "POST", history_endpoint, json=history_data
+        print(f"--- claim_reward started: {reward_name}, Cost: {reward_cost} ---")
+        result = self.repository.rpc(
+            "claim_reward",
+            {"target_reward_id": reward_id},
+            invalidates=("rewards", "reward_history"),
         )
-        # --- Add detailed logging for history response ---
-        print(f"claim_reward: Step 1 - History insert response: {history_response}")
-        # --- End added log ---
-        if history_response is None:  # Check for None explicitly
-            print("claim_reward: Error adding reward to history. Aborting.")
-            return False, "Failed to record reward in history."
-        # If _make_request returns {} on success (201 with empty body), treat as success
-        print("claim_reward: Step 1 - History insert successful.")  # Added log
-
-        # 2. Delete the reward
-        reward_endpoint = f"rewards?id=eq.{reward_id}"
-        print(f"claim_reward: Step 2 - Deleting reward: {reward_endpoint}")
-        delete_success = self._make_request("DELETE", reward_endpoint)
-        # --- Add detailed logging for delete response ---
-        print(
-            f"claim_reward: Step 2 - Reward delete response (True means success): {delete_success}"
-        )
-        # --- End added log ---
-        if not delete_success:  # _make_request returns True on successful DELETE (204)
-            print(f"claim_reward: Error deleting reward {reward_id}. Aborting.")
-            # Consider rolling back history entry
-            return False, "Failed to remove reward after claiming."
-        print(f"claim_reward: Step 2 - Reward delete successful.")  # Added log
-
-        # 3. Decrement medal count (using RPC)
-        print(f"claim_reward: Step 3 - Decrementing medals by {reward_cost}")
-        new_medal_count = self._update_medal_count_rpc(
-            -reward_cost
-        )  # This already logs internally
-        # --- Add detailed logging for RPC result ---
-        print(f"claim_reward: Step 3 - RPC result (new_medal_count): {new_medal_count}")
-        # --- End added log ---
-
+        print(f"claim_reward: RPC result: {result}")
+        if not isinstance(result, dict):
+            print("claim_reward: Error calling claim_reward. Nothing was claimed.")
+            return False, "Failed to claim reward."
+        if not result.get("success"):
+            message = result.get("error") or "Failed to claim reward."
+            print(f"claim_reward: {message}")
+            return False, message
+
+        self._sync_local("rewards", deleted_id=reward_id)
+        self.reward_index.remove(reward_id)
+        self.search_index.remove("reward", reward_id)
+        entry = result.get("history")
+        if entry:
+            self._index_rows("reward_history", RewardHistoryEntry, entry)
+        if self.stats:
+            self.stats.record_claim(int((entry or {}).get("cost") or reward_cost))
+
+        new_medal_count = result.get("new_medal_count")
         if new_medal_count is None:
             print(
-                f"claim_reward: Warning - Reward claimed/deleted, but medal update failed."
+                "claim_reward: Warning - Reward claimed, but no medal count returned."
             )
             return True, None  # Partial success
-        else:
-            print(
-                f"claim_reward: Full success - Reward claimed. New count: {new_medal_count}"
-            )
-            return True, new_medal_count  # Full success
+        print(
+            f"claim_reward: Full success - Reward claimed. New count: {new_medal_count}"
+        )
+        return True, self._set_medal_count(int(new_medal_count))
 
     # --- End Modification ---
 
+    def get_stats(self):
+        """Returns the user's UserStats. Loaded once from the server-side
+        aggregates (backfilling them on first use), then kept current
+        in memory by mark_task_done/claim_reward."""
+        if self.stats is not None:
+            return self.stats
+        data = self.repository.rpc("get_user_stats", {"days": DASHBOARD_DAYS})
+        if not (isinstance(data, dict) and data.get("backfilled")):
+            print("Stats not backfilled yet, running one-time backfill...")
+            self.repository.rpc("backfill_user_stats", {})
+            data = self.repository.rpc("get_user_stats", {"days": DASHBOARD_DAYS})
+        if isinstance(data, dict) and data.get("backfilled"):
+            self.stats = UserStats.from_dict(data)
+        else:
+            # Stats functions not deployed: compute once from history and keep
+            # the result in memory only
+            print("Stats RPCs unavailable, computing stats from history.")
+            try:
+                task_table, reward_table = HISTORY_TABLES
+
+                def history_rows(table):
+                    return (
+                        row for _, row in iter_history(self.repository, tables=[table])
+                    )
+
+                self.stats = UserStats.backfill(
+                    history_rows(task_table),
+                    history_rows(reward_table),
+                    MEDALS_PER_TASK,
+                )
+            except Exception as e:
+                print(f"Error computing stats from history: {e}")
+                return UserStats()
+        return self.stats
+
     def get_task_history(self):
-        """Fetches the task history for the user (synchronous)."""
+        """Fetches the task history for the user (synchronous) as
+        records.TaskHistoryEntry."""
         endpoint = "task_history"
         # RLS on 'task_history' table should filter by user_id automatically
-        params = {"select": "*", "order": "timestamp.desc"}
-        data = self._make_request("GET", endpoint, params=params)
-        return data if isinstance(data, list) else []
+        data = self.repository.select(
+            endpoint, HISTORY_QUERY, decode=TaskHistoryEntry.from_rows
+        )
+        if not isinstance(data, list):
+            return []
+        self._index_kind("task_history", data)
+        return data
 
     def get_reward_history(self):
-        """Fetches the reward history for the user (synchronous)."""
+        """Fetches the reward history for the user (synchronous) as
+        records.RewardHistoryEntry."""
         endpoint = "reward_history"
         # RLS on 'reward_history' table should filter by user_id automatically
-        params = {"select": "*", "order": "timestamp.desc"}
-        data = self._make_request("GET", endpoint, params=params)
-        return data if isinstance(data, list) else []
+        data = self.repository.select(
+            endpoint, HISTORY_QUERY, decode=RewardHistoryEntry.from_rows
+        )
+        if not isinstance(data, list):
+            return []
+        self._index_kind("reward_history", data)
+        return data
+
+    def search(self, query, limit=50):
+        """Searches tasks, rewards and history in memory (no round trip once
+        the index is loaded). Returns search_index.SearchHit objects."""
+        self.load_search_index()
+        return self.search_index.search(query, limit)
+
+    def search_history(self, query, cursor=None, limit=20):
+        """Ranked search over the whole task and reward history, run on the
+        server so histories too large to index on the device stay
+        searchable. Returns (hits, next_cursor): search_index.SearchHit
+        objects holding history records, best first, and the cursor of the
+        next page (None after the last one). Returns None on failure."""
+        payload = {"query": query, "page_size": limit}
+        if cursor:
+            payload.update(
+                after_rank=cursor["rank"],
+                after_kind=cursor["kind"],
+                after_id=cursor["id"],
+            )
+        data = self.repository.rpc("search_history", payload)
+        if not isinstance(data, list):
+            return None
+        records = {
+            "task_history": TaskHistoryEntry,
+            "reward_history": RewardHistoryEntry,
+        }
+        hits = [
+            SearchHit(
+                row["kind"],
+                row["id"],
+                records[row["kind"]].from_rows([row])[0],
+                row["rank"],
+            )
+            for row in data
+            if row.get("kind") in records
+        ]
+        next_cursor = None
+        if len(data) >= limit:
+            last = data[-1]
+            next_cursor = {"rank": last["rank"], "kind": last["kind"], "id": last["id"]}
+        return hits, next_cursor
+
+    def load_search_index(self):
+        """Fetches whatever the search index has not seen yet (first use)."""
+        loaders = {
+            "task": self.get_all_tasks,
+            "reward": self.get_all_rewards,
+            "task_history": self.get_task_history,
+            "reward_history": self.get_reward_history,
+        }
+        for kind, load in loaders.items():
+            if kind not in self.search_index.loaded_kinds:
+                load()
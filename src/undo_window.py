@@ -0,0 +1,92 @@
+import threading
+import time
+
+UNDO_SECONDS = 5  # how long a completion can be taken back
+MAX_DEFER_SECONDS = 15  # longest an action waits, however busy the window
+
+
+class UndoWindow:
+    """Holds actions back for `delay` seconds so they can be undone for free.
+
+    Each add() restarts the window; when it closes without another add,
+    on_commit(items) gets everything still pending, in the order added, as
+    one batch. A burst of actions therefore becomes a single write, and
+    every action stays undoable for at least `delay` seconds. Undo just
+    drops the item: nothing has been sent yet. So that steady activity
+    cannot hold actions back forever, the window also closes once the
+    oldest pending action is `max_age` seconds old; actions younger than
+    `delay` then stay for the next batch."""
+
+    def __init__(self, on_commit, delay=UNDO_SECONDS, max_age=MAX_DEFER_SECONDS):
+        self.on_commit = on_commit
+        self.delay = delay
+        self.max_age = max(max_age, delay)
+        self.lock = threading.Lock()
+        self.timer = None
+        self.pending = {}  # key -> (added_at, item), in insertion order
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.pending
+
+    def __len__(self):
+        with self.lock:
+            return len(self.pending)
+
+    def add(self, key, item):
+        with self.lock:
+            self.pending.pop(key, None)
+            self.pending[key] = (time.monotonic(), item)
+            self._schedule()
+
+    def undo(self, key):
+        """Drops a pending item. Returns False if it was already committed."""
+        with self.lock:
+            if self.pending.pop(key, None) is None:
+                return False
+            self._schedule()
+            return True
+
+    def take(self):
+        """Closes the window now and returns the pending items (without
+        calling on_commit), e.g. to commit them synchronously on logout."""
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            items = [item for _, item in self.pending.values()]
+            self.pending = {}
+            return items
+
+    def _schedule(self):
+        # Caller holds the lock
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        added = [added_at for added_at, _ in self.pending.values()]
+        due = min(max(added) + self.delay, min(added) + self.max_age)
+        self.timer = threading.Timer(max(0.0, due - time.monotonic()), self._close)
+        self.timer.args = (self.timer,)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _close(self, timer):
+        with self.lock:
+            if timer is not self.timer:
+                return  # superseded by a later add() while firing
+            self.timer = None
+            ripe = time.monotonic() - self.delay
+            items = [
+                item for added_at, item in self.pending.values() if added_at <= ripe
+            ]
+            self.pending = {
+                key: entry for key, entry in self.pending.items() if entry[0] > ripe
+            }
+            self._schedule()
+        if items:
+            try:
+                self.on_commit(items)
+            except Exception as e:
+                print(f"Error committing {len(items)} pending action(s): {e}")
@@ -0,0 +1,92 @@
+import threading
+import weakref
+
+FRAME_INTERVAL = 1 / 60  # seconds; pending updates are sent at most once a frame
+
+
+class UpdateScheduler:
+    """Coalesces page.update() calls.
+
+    request() marks the page dirty and sends a single update at the end of
+    the current frame, however often it was called in between. flush() sends
+    any pending update right away, for when the user must see a change before
+    slow work starts (or a route change must render now). defer() queues a
+    control mutation to run just before that update, so background threads
+    do not change controls mid-frame."""
+
+    def __init__(self, page, interval=FRAME_INTERVAL):
+        self.page = page
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.timer = None
+        self.deferred = {}  # key -> mutation, run before the next update
+        self.requested = 0  # update requests received
+        self.flushed = 0  # page.update() calls actually sent
+
+    def request(self):
+        """Marks the page dirty; the update goes out with the next frame."""
+        with self.lock:
+            self.requested += 1
+            self.dirty = True
+            if self.timer is None:
+                self.timer = threading.Timer(self.interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def defer(self, key, mutation):
+        """Runs mutation() right before the next update and requests one. A
+        later mutation under the same key replaces a pending one, so only
+        the latest state is applied."""
+        with self.lock:
+            self.deferred[key] = mutation
+        self.request()
+
+    def flush(self):
+        """Sends the pending update now. Returns True if page.update() ran."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty:
+                return False
+            self.dirty = False
+            self.flushed += 1
+            deferred, self.deferred = list(self.deferred.values()), {}
+        for mutation in deferred:
+            try:
+                mutation()
+            except Exception as e:
+                print(f"Deferred update failed: {e}")
+        try:
+            self.page.update()
+        except Exception as e:  # e.g. the session closed before the frame fired
+            print(f"Page update failed: {e}")
+            return False
+        return True
+
+    @property
+    def merged(self):
+        """How many update requests were folded into another update."""
+        return self.requested - self.flushed
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requested": self.requested,
+                "flushed": self.flushed,
+                "merged": self.requested - self.flushed,
+            }
+
+
+_schedulers = weakref.WeakKeyDictionary()
+_schedulers_lock = threading.Lock()
+
+
+def get_update_scheduler(page):
+    """Returns the page's scheduler, creating it on first use."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(page)
+        if scheduler is None:
+            scheduler = _schedulers[page] = UpdateScheduler(page)
+        return scheduler
@@ -16,6 +16,7 @@ import json
 import requests
 from requests.exceptions import RequestException, HTTPError
 import config_loader
+from resilience import DEFAULT_TIMEOUT, CircuitOpenError, get_resilience
 
 load_dotenv()
 
@@ -27,11 +28,13 @@ class UserManager:
         self.page = page
         self.users_dir = users_dir
         self.user_storage = self.get_user_storage()
-        self.supabase_url = config_loader.get_supabase_url()
-        self.supabase_anon_key = config_loader.get_supabase_anon_key()
-        self.supabase_service_role_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+        config = config_loader.get_config()
+        self.supabase_url = config.supabase_url
+        self.supabase_anon_key = config.supabase_anon_key
+        self.supabase_service_role_key = config.supabase_service_role_key
         self.admin_supabase: Client = None
         self.public_supabase: Client = None
+        self.resilience = get_resilience()  # Shared retry/circuit-breaker state
 
         print(f"UserManager - URL Loaded: {self.supabase_url is not None}")
         print(f"UserManager - Anon Key Loaded: {self.supabase_anon_key is not None}")
@@ -39,9 +42,9 @@ class UserManager:
             f"UserManager - Service Key Loaded: {self.supabase_service_role_key is not None}"
         )
         print(f"UserManager - Running in web environment: {self.page.web}")
-        if config_loader.CONFIG_ERROR:
+        if config.error:
             print(
-                f"UserManager - Warning: Configuration error detected: {config_loader.CONFIG_ERROR}"
+                f"UserManager - Warning: Configuration error detected: {config.error}"
             )
         # --- Initialize admin client on startup if possible ---
         self.get_admin_supabase_client()  # Try to initialize admin client here
@@ -68,11 +71,18 @@ class UserManager:
             "password": password,
             "options": {"data": {"username": username, "user_medal_count": 0}},
         }
-        try:
+        def send_signup():
             response = requests.post(
-                signup_url, headers=headers, json=payload, timeout=15
+                signup_url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT
             )
             response.raise_for_status()
+            return response
+
+        try:
+            # Signup creates a user, so it is only retried if it never got sent
+            response = self.resilience.call(
+                "auth", "auth:signup", send_signup, idempotent=False
+            )
             data = response.json()
             print(f"Register response: {data}")
             user_info = data.get("user", {})
@@ -97,6 +107,9 @@ class UserManager:
                     f"Registration failed (HTTP {e.response.status_code if e.response else 'N/A'})."
                 )
             return None, None, None
+        except CircuitOpenError as e:
+            print(f"Registration skipped: {e}")
+            return None, None, None
         except requests.exceptions.Timeout:
             print(f"Timeout Error during registration: {signup_url}")
             return None, None, None
@@ -121,13 +134,20 @@ class UserManager:
         print(f"Login URL: {token_url}")
         # print(f"Login Headers: {headers}") # Avoid logging keys
         # print(f"Login Payload: {payload}") # Avoid logging passwords
-        try:
+        def send_login():
             response = requests.post(
-                token_url, headers=headers, json=payload, timeout=15
+                token_url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT
             )
             print(f"Login Raw Response Status: {response.status_code}")
             # print(f"Login Raw Response Body: {response.text}") # Avoid logging tokens
             response.raise_for_status()
+            return response
+
+        try:
+            # A password grant has no side effects, so it is safe to retry
+            response = self.resilience.call(
+                "auth", "auth:token", send_login, idempotent=True
+            )
             data = response.json()
             # print(f"Login Parsed Response Data: {data}") # Avoid logging tokens
             access_token = data.get("access_token")
@@ -153,6 +173,9 @@ class UserManager:
                     f"Error during login (HTTP {e.response.status_code}): {e.response.text}"
                 )
             return None, None, None
+        except CircuitOpenError as e:
+            print(f"Login skipped: {e}")
+            return None, None, None
         except requests.exceptions.Timeout:
             print(f"Timeout Error during login: {token_url}")
             return None, None, None
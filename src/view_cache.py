@@ -0,0 +1,93 @@
+import threading
+import time
+
+import flet as ft
+
+DEFAULT_MAX_AGE = 30  # seconds before a cached route revalidates on show
+
+# Which cached routes each mutation makes stale
+MUTATION_ROUTES = {
+    "task_completed": ("/history",),
+    "reward_claimed": ("/rewards", "/history"),
+    "reward_added": ("/rewards",),
+}
+
+
+class CachedRoute:
+    def __init__(self, view: ft.View, refresh):
+        self.view = view
+        self.refresh = refresh
+        self.fetched_at = time.monotonic()
+        self.stale = False
+        self.refreshing = False
+
+
+class RouteCache:
+    """Per-session stale-while-revalidate cache of built route views.
+
+    A cached view is shown immediately. If it is older than max_age, or a
+    mutation invalidated it, its data is refreshed on a background thread.
+    Builders hand over their refresh function via view.data["refresh"]."""
+
+    def __init__(self, page: ft.Page, max_age=DEFAULT_MAX_AGE):
+        self.page = page
+        self.max_age = max_age
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, route, build):
+        """Returns the cached view for route, building it with build() on a miss."""
+        with self.lock:
+            entry = self.entries.get(route)
+        if entry is None:
+            view = build()
+            refresh = view.data.get("refresh") if isinstance(view.data, dict) else None
+            with self.lock:
+                self.entries[route] = CachedRoute(view, refresh)
+            return view
+        if entry.stale or time.monotonic() - entry.fetched_at > self.max_age:
+            self._revalidate(route, entry)
+        return entry.view
+
+    def _revalidate(self, route, entry):
+        if entry.refresh is None:
+            # Nothing to refresh with; rebuild next time
+            with self.lock:
+                self.entries.pop(route, None)
+            return
+        with self.lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+            entry.stale = False
+
+        def run():
+            print(f"Revalidating cached route {route} in background...")
+            try:
+                entry.refresh()
+                entry.fetched_at = time.monotonic()
+            except Exception as e:
+                print(f"Background refresh of {route} failed: {e}")
+                entry.stale = True
+            finally:
+                entry.refreshing = False
+
+        self.page.run_thread(run)
+
+    def invalidate(self, *routes):
+        """Marks routes (or every route) stale so the next show refreshes them."""
+        with self.lock:
+            for route, entry in self.entries.items():
+                if not routes or route in routes:
+                    entry.stale = True
+
+    def notify(self, mutation):
+        """Invalidation hook for mutations such as 'reward_claimed'."""
+        routes = MUTATION_ROUTES.get(mutation)
+        if routes:
+            self.invalidate(*routes)
+
+    def clear(self):
+        """Drops every cached view (e.g. on login/logout)."""
+        with self.lock:
+            self.entries.clear()
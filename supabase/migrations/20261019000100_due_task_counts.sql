@@ -0,0 +1,17 @@
+-- Per-day counts of due tasks for the week calendar overlay.
+-- Runs as the caller so the RLS policies on public.tasks still apply.
+create or replace function public.get_due_task_counts(start_date date, end_date date)
+returns table (due_date date, task_count bigint)
+language sql
+stable
+security invoker
+as $$
+  select t.due_date::date as due_date, count(*) as task_count
+  from public.tasks t
+  where t.due_date is not null
+    and t.due_date::date between start_date and end_date
+  group by t.due_date::date
+  order by 1;
+$$;
+
+grant execute on function public.get_due_task_counts(date, date) to authenticated;
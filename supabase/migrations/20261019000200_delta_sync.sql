@@ -0,0 +1,90 @@
+-- Delta sync: clients fetch only rows changed since their high-water mark.
+-- Inserts/updates are found through updated_at; deletes leave a tombstone.
+
+alter table public.tasks
+  add column if not exists updated_at timestamptz not null default now();
+alter table public.rewards
+  add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists tasks_user_updated_at_idx
+  on public.tasks (user_id, updated_at);
+create index if not exists rewards_user_updated_at_idx
+  on public.rewards (user_id, updated_at);
+
+create or replace function public.touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at := now();
+  return new;
+end;
+$$;
+
+drop trigger if exists tasks_touch_updated_at on public.tasks;
+create trigger tasks_touch_updated_at
+  before update on public.tasks
+  for each row execute function public.touch_updated_at();
+
+drop trigger if exists rewards_touch_updated_at on public.rewards;
+create trigger rewards_touch_updated_at
+  before update on public.rewards
+  for each row execute function public.touch_updated_at();
+
+-- Tombstones for deleted rows. Kept for 30 days (see prune_deleted_rows);
+-- a client whose watermark is older than that does a full resync.
+create table if not exists public.deleted_rows (
+  id bigint generated always as identity primary key,
+  table_name text not null,
+  row_id bigint not null,
+  user_id uuid not null default auth.uid(),
+  deleted_at timestamptz not null default now()
+);
+
+create index if not exists deleted_rows_user_table_deleted_at_idx
+  on public.deleted_rows (user_id, table_name, deleted_at);
+
+alter table public.deleted_rows enable row level security;
+
+drop policy if exists "Users read their own tombstones" on public.deleted_rows;
+create policy "Users read their own tombstones"
+  on public.deleted_rows for select
+  to authenticated
+  using (user_id = auth.uid());
+
+create or replace function public.record_deleted_row()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  insert into public.deleted_rows (table_name, row_id, user_id)
+  values (tg_table_name, old.id, coalesce(old.user_id, auth.uid()));
+  return old;
+end;
+$$;
+
+drop trigger if exists tasks_record_deleted_row on public.tasks;
+create trigger tasks_record_deleted_row
+  after delete on public.tasks
+  for each row execute function public.record_deleted_row();
+
+drop trigger if exists rewards_record_deleted_row on public.rewards;
+create trigger rewards_record_deleted_row
+  after delete on public.rewards
+  for each row execute function public.record_deleted_row();
+
+create or replace function public.prune_deleted_rows(retention interval default '30 days')
+returns bigint
+language sql
+security definer
+set search_path = public
+as $$
+  with pruned as (
+    delete from public.deleted_rows where deleted_at < now() - retention returning 1
+  )
+  select count(*) from pruned;
+$$;
+
+revoke execute on function public.prune_deleted_rows(interval) from public, authenticated;
@@ -0,0 +1,187 @@
+-- Running statistics per user, maintained by triggers on the history tables
+-- so the stats dashboard reads one row instead of scanning history.
+-- Days are UTC calendar days of the history timestamp.
+
+create table if not exists public.user_stats (
+  user_id uuid primary key default auth.uid(),
+  tasks_completed bigint not null default 0,
+  medals_earned bigint not null default 0,
+  medals_spent bigint not null default 0,
+  rewards_claimed bigint not null default 0,
+  current_streak integer not null default 0,
+  longest_streak integer not null default 0,
+  last_completion_date date,
+  backfilled boolean not null default false,  -- history counted in
+  updated_at timestamptz not null default now()
+);
+
+create table if not exists public.user_daily_completions (
+  user_id uuid not null default auth.uid(),
+  day date not null,
+  completions integer not null default 0,
+  primary key (user_id, day)
+);
+
+alter table public.user_stats enable row level security;
+alter table public.user_daily_completions enable row level security;
+
+drop policy if exists "Users read their own stats" on public.user_stats;
+create policy "Users read their own stats"
+  on public.user_stats for select to authenticated
+  using (user_id = auth.uid());
+
+drop policy if exists "Users read their own daily completions" on public.user_daily_completions;
+create policy "Users read their own daily completions"
+  on public.user_daily_completions for select to authenticated
+  using (user_id = auth.uid());
+
+-- Keep in sync with MEDALS_PER_TASK in src/todo_view.py
+create or replace function public.medals_per_task()
+returns integer language sql immutable as $$ select 1 $$;
+
+create or replace function public.stats_on_task_completed()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  uid uuid := coalesce(new.user_id, auth.uid());
+  done_day date := (coalesce(new."timestamp"::timestamptz, now()) at time zone 'utc')::date;
+begin
+  insert into public.user_daily_completions (user_id, day, completions)
+  values (uid, done_day, 1)
+  on conflict (user_id, day)
+  do update set completions = user_daily_completions.completions + 1;
+
+  insert into public.user_stats as s (user_id, tasks_completed, medals_earned,
+                                      current_streak, longest_streak, last_completion_date)
+  values (uid, 1, public.medals_per_task(), 1, 1, done_day)
+  on conflict (user_id) do update set
+    tasks_completed = s.tasks_completed + 1,
+    medals_earned = s.medals_earned + public.medals_per_task(),
+    -- Same day: unchanged. Next day: extends. Later gap: restarts.
+    -- Out-of-order (older) completions leave the streak alone.
+    current_streak = case
+      when s.last_completion_date is null then 1
+      when done_day = s.last_completion_date + 1 then s.current_streak + 1
+      when done_day > s.last_completion_date + 1 then 1
+      else s.current_streak
+    end,
+    longest_streak = greatest(s.longest_streak, case
+      when s.last_completion_date is null then 1
+      when done_day = s.last_completion_date + 1 then s.current_streak + 1
+      else 1
+    end),
+    last_completion_date = greatest(s.last_completion_date, done_day),
+    updated_at = now();
+  return new;
+end;
+$$;
+
+create or replace function public.stats_on_reward_claimed()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  insert into public.user_stats as s (user_id, medals_spent, rewards_claimed)
+  values (coalesce(new.user_id, auth.uid()), coalesce(new.cost, 0), 1)
+  on conflict (user_id) do update set
+    medals_spent = s.medals_spent + coalesce(new.cost, 0),
+    rewards_claimed = s.rewards_claimed + 1,
+    updated_at = now();
+  return new;
+end;
+$$;
+
+drop trigger if exists task_history_stats on public.task_history;
+create trigger task_history_stats
+  after insert on public.task_history
+  for each row execute function public.stats_on_task_completed();
+
+drop trigger if exists reward_history_stats on public.reward_history;
+create trigger reward_history_stats
+  after insert on public.reward_history
+  for each row execute function public.stats_on_reward_claimed();
+
+-- One-time backfill for the calling user from existing history.
+create or replace function public.backfill_user_stats()
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  uid uuid := auth.uid();
+  run_length integer := 0;
+  best integer := 0;
+  previous date;
+  d record;
+begin
+  delete from public.user_daily_completions where user_id = uid;
+  insert into public.user_daily_completions (user_id, day, completions)
+  select uid, ("timestamp"::timestamptz at time zone 'utc')::date, count(*)
+  from public.task_history where user_id = uid
+  group by 1, 2;
+
+  for d in
+    select day from public.user_daily_completions where user_id = uid order by day
+  loop
+    run_length := case when previous = d.day - 1 then run_length + 1 else 1 end;
+    best := greatest(best, run_length);
+    previous := d.day;
+  end loop;
+
+  insert into public.user_stats as s (user_id, tasks_completed, medals_earned,
+    medals_spent, rewards_claimed, current_streak, longest_streak, last_completion_date,
+    backfilled)
+  select uid,
+    (select count(*) from public.task_history where user_id = uid),
+    (select count(*) from public.task_history where user_id = uid) * public.medals_per_task(),
+    (select coalesce(sum(cost), 0) from public.reward_history where user_id = uid),
+    (select count(*) from public.reward_history where user_id = uid),
+    run_length, best, previous, true
+  on conflict (user_id) do update set
+    tasks_completed = excluded.tasks_completed,
+    medals_earned = excluded.medals_earned,
+    medals_spent = excluded.medals_spent,
+    rewards_claimed = excluded.rewards_claimed,
+    current_streak = excluded.current_streak,
+    longest_streak = excluded.longest_streak,
+    last_completion_date = excluded.last_completion_date,
+    backfilled = true,
+    updated_at = now();
+end;
+$$;
+
+-- Stats row plus per-day completions for the last `days` days, as one JSON
+-- object. Null (or backfilled = false) means backfill_user_stats() is due.
+create or replace function public.get_user_stats(days integer default 30)
+returns json
+language sql
+stable
+security invoker
+as $$
+  select json_build_object(
+    'tasks_completed', s.tasks_completed,
+    'medals_earned', s.medals_earned,
+    'medals_spent', s.medals_spent,
+    'rewards_claimed', s.rewards_claimed,
+    'current_streak', s.current_streak,
+    'longest_streak', s.longest_streak,
+    'last_completion_date', s.last_completion_date,
+    'backfilled', s.backfilled,
+    'daily', coalesce((
+      select json_object_agg(c.day, c.completions)
+      from public.user_daily_completions c
+      where c.user_id = s.user_id and c.day > current_date - days
+    ), '{}'::json)
+  )
+  from public.user_stats s
+  where s.user_id = auth.uid();
+$$;
+
+grant execute on function public.get_user_stats(integer) to authenticated;
+grant execute on function public.backfill_user_stats() to authenticated;
@@ -0,0 +1,70 @@
+-- Ranked, keyset-paginated search over task and reward history.
+-- Both match paths are served by GIN indexes (full-text words and trigram
+-- similarity), so a search reads the matching rows, not the whole table.
+
+create extension if not exists pg_trgm with schema extensions;
+
+create index if not exists task_history_description_trgm
+  on public.task_history using gin (description extensions.gin_trgm_ops);
+create index if not exists reward_history_description_trgm
+  on public.reward_history using gin (description extensions.gin_trgm_ops);
+
+create index if not exists task_history_description_fts
+  on public.task_history using gin (to_tsvector('simple', coalesce(description, '')));
+create index if not exists reward_history_description_fts
+  on public.reward_history using gin (to_tsvector('simple', coalesce(description, '')));
+
+-- Results are ordered by (rank desc, kind, id desc). To fetch the next page,
+-- pass the last row's rank, kind and id back as after_rank/after_kind/after_id.
+create or replace function public.search_history(
+  query text,
+  page_size integer default 20,
+  after_rank real default null,
+  after_kind text default null,
+  after_id bigint default null
+)
+returns table (
+  kind text,
+  id bigint,
+  description text,
+  "timestamp" text,
+  cost integer,
+  rank real
+)
+language sql
+stable
+security invoker  -- RLS on the history tables scopes rows to the caller
+set search_path = public, extensions
+as $$
+  with q as (
+    select websearch_to_tsquery('simple', query) as words, lower(trim(query)) as text
+  ),
+  matches as (
+    select 'task_history'::text as kind, h.id, h.description,
+           h."timestamp"::text as "timestamp", null::integer as cost,
+           (ts_rank(to_tsvector('simple', coalesce(h.description, '')), q.words)
+            + word_similarity(q.text, h.description))::real as rank
+    from public.task_history h, q
+    where to_tsvector('simple', coalesce(h.description, '')) @@ q.words
+       or q.text <% h.description
+    union all
+    select 'reward_history'::text, h.id, h.description,
+           h."timestamp"::text, h.cost,
+           (ts_rank(to_tsvector('simple', coalesce(h.description, '')), q.words)
+            + word_similarity(q.text, h.description))::real
+    from public.reward_history h, q
+    where to_tsvector('simple', coalesce(h.description, '')) @@ q.words
+       or q.text <% h.description
+  )
+  select m.kind, m.id, m.description, m."timestamp", m.cost, m.rank
+  from matches m
+  where after_rank is null
+     or m.rank < after_rank
+     or (m.rank = after_rank
+         and (m.kind > after_kind or (m.kind = after_kind and m.id < after_id)))
+  order by m.rank desc, m.kind, m.id desc
+  limit least(greatest(page_size, 1), 100);
+$$;
+
+grant execute on function public.search_history(text, integer, real, text, bigint)
+  to authenticated;
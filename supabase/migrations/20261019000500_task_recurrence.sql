@@ -0,0 +1,13 @@
+-- Recurring tasks. A recurring task stays a single row: due_date holds its
+-- next occurrence and completing it moves due_date forward (see
+-- src/recurrence.py), so storage does not grow with the life of a habit.
+-- recurrence is a subset of RFC 5545 RRULE text, e.g. 'FREQ=DAILY' or
+-- 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH'.
+alter table public.tasks
+  add column if not exists recurrence text;
+
+alter table public.tasks
+  drop constraint if exists tasks_recurrence_check;
+alter table public.tasks
+  add constraint tasks_recurrence_check
+  check (recurrence is null or recurrence ~ '^FREQ=(DAILY|WEEKLY|MONTHLY)(;[A-Z]+=[A-Z0-9,]+)*$');
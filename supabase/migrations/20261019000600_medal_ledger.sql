@@ -0,0 +1,295 @@
+-- Append-only medal ledger. Every change to a balance is a row of
+-- medal_ledger, written by triggers in the same transaction as the history
+-- row that caused it, so history and medals can no longer drift apart when
+-- a client fails halfway. user_profiles.medal_count stays as the O(1)
+-- balance read and is kept equal to the ledger sum by append_medal_entry.
+-- Every SNAPSHOT_EVERY (100) entries a snapshot row records the running
+-- balance, so any balance (now or as of a past date) is the nearest
+-- snapshot plus a short tail of entries.
+
+create table if not exists public.medal_ledger (
+  id bigint generated always as identity primary key,
+  user_id uuid not null default auth.uid(),
+  delta integer not null,
+  reason text not null check (reason in (
+    'task_completed', 'reward_claimed', 'opening_balance', 'reversal'
+  )),
+  source_table text,  -- history row the entry comes from, if any
+  source_id bigint,
+  created_at timestamptz not null default now(),
+  -- One entry per history row and reason; makes re-running the triggers
+  -- or the reconciliation harmless
+  unique (source_table, source_id, reason)
+);
+
+create index if not exists medal_ledger_user_id on public.medal_ledger (user_id, id);
+create index if not exists medal_ledger_user_created_at
+  on public.medal_ledger (user_id, created_at);
+
+create table if not exists public.medal_snapshots (
+  user_id uuid not null,
+  ledger_id bigint not null,  -- last ledger entry the balance includes
+  balance bigint not null,
+  taken_at timestamptz not null default now(),
+  primary key (user_id, ledger_id)
+);
+
+-- Clients may read their own rows; writes only happen through the
+-- security definer functions below, so the ledger stays append-only.
+alter table public.medal_ledger enable row level security;
+alter table public.medal_snapshots enable row level security;
+
+drop policy if exists "Users read their own ledger" on public.medal_ledger;
+create policy "Users read their own ledger"
+  on public.medal_ledger for select to authenticated
+  using (user_id = auth.uid());
+
+drop policy if exists "Users read their own snapshots" on public.medal_snapshots;
+create policy "Users read their own snapshots"
+  on public.medal_snapshots for select to authenticated
+  using (user_id = auth.uid());
+
+-- Ledger balance: latest snapshot plus the entries after it.
+create or replace function public.ledger_balance(uid uuid)
+returns bigint
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  with snap as (
+    select s.ledger_id, s.balance from public.medal_snapshots s
+    where s.user_id = uid order by s.ledger_id desc limit 1
+  )
+  select coalesce((select balance from snap), 0) + coalesce((
+    select sum(l.delta) from public.medal_ledger l
+    where l.user_id = uid and l.id > coalesce((select ledger_id from snap), 0)
+  ), 0);
+$$;
+
+-- Takes a snapshot once SNAPSHOT_EVERY entries follow the previous one.
+create or replace function public.snapshot_medal_ledger(uid uuid)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  last_id bigint;
+  tail integer;
+  newest bigint;
+begin
+  select coalesce(max(ledger_id), 0) into last_id
+  from public.medal_snapshots where user_id = uid;
+  select count(*), max(id) into tail, newest
+  from public.medal_ledger where user_id = uid and id > last_id;
+  if tail >= 100 then
+    insert into public.medal_snapshots (user_id, ledger_id, balance)
+    values (uid, newest, public.ledger_balance(uid))
+    on conflict do nothing;
+  end if;
+end;
+$$;
+
+-- Appends one entry and applies it to the cached balance. Returns the entry
+-- id, or null when that history row was already recorded.
+create or replace function public.append_medal_entry(
+  uid uuid,
+  amount integer,
+  entry_reason text,
+  from_table text default null,
+  from_id bigint default null
+)
+returns bigint
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  entry_id bigint;
+begin
+  insert into public.medal_ledger (user_id, delta, reason, source_table, source_id)
+  values (uid, amount, entry_reason, from_table, from_id)
+  on conflict (source_table, source_id, reason) do nothing
+  returning id into entry_id;
+  if entry_id is null then
+    return null;
+  end if;
+  insert into public.user_profiles as p (id, medal_count)
+  values (uid, amount)
+  on conflict (id) do update set medal_count = p.medal_count + amount;
+  perform public.snapshot_medal_ledger(uid);
+  return entry_id;
+end;
+$$;
+
+create or replace function public.ledger_on_task_completed()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  perform public.append_medal_entry(coalesce(new.user_id, auth.uid()),
+    public.medals_per_task(), 'task_completed', 'task_history', new.id);
+  return new;
+end;
+$$;
+
+create or replace function public.ledger_on_reward_claimed()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  perform public.append_medal_entry(coalesce(new.user_id, auth.uid()),
+    -coalesce(new.cost, 0), 'reward_claimed', 'reward_history', new.id);
+  return new;
+end;
+$$;
+
+drop trigger if exists task_history_ledger on public.task_history;
+create trigger task_history_ledger
+  after insert on public.task_history
+  for each row execute function public.ledger_on_task_completed();
+
+drop trigger if exists reward_history_ledger on public.reward_history;
+create trigger reward_history_ledger
+  after insert on public.reward_history
+  for each row execute function public.ledger_on_reward_claimed();
+
+-- The history triggers now move the balance. Clients still call this after
+-- writing history, so it only reports the balance (amount_param is ignored)
+-- and a completion is never counted twice.
+drop function if exists public.increment_user_medal_count(integer);
+create function public.increment_user_medal_count(amount_param integer)
+returns json
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  select json_build_object(
+    'success', true,
+    'new_medal_count',
+    coalesce((select medal_count from public.user_profiles where id = auth.uid()), 0)
+  );
+$$;
+
+-- Detects and repairs drift for the calling user:
+--   1. history rows without a ledger entry (written before this migration)
+--      get one;
+--   2. entries whose history row was deleted get a reversal entry;
+--   3. on the first run, an opening_balance entry keeps the balance the
+--      user already had; on later runs, medal_count is reset to the ledger
+--      balance if it differs.
+-- Safe to run any number of times.
+create or replace function public.reconcile_medal_ledger()
+returns json
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  uid uuid := auth.uid();
+  added integer;
+  reversed integer;
+  cached bigint;
+  ledger bigint;
+  drift bigint := 0;
+begin
+  with inserted as (
+    insert into public.medal_ledger (user_id, delta, reason, source_table, source_id)
+    select uid, public.medals_per_task(), 'task_completed', 'task_history', h.id
+    from public.task_history h
+    where h.user_id = uid
+    union all
+    select uid, -coalesce(h.cost, 0), 'reward_claimed', 'reward_history', h.id
+    from public.reward_history h
+    where h.user_id = uid
+    on conflict (source_table, source_id, reason) do nothing
+    returning 1
+  )
+  select count(*) into added from inserted;
+
+  with inserted as (
+    insert into public.medal_ledger (user_id, delta, reason, source_table, source_id)
+    select uid, -l.delta, 'reversal', l.source_table, l.source_id
+    from public.medal_ledger l
+    where l.user_id = uid
+      and l.reason in ('task_completed', 'reward_claimed')
+      and not exists (
+        select 1 from public.task_history h
+        where l.source_table = 'task_history' and h.id = l.source_id
+      )
+      and not exists (
+        select 1 from public.reward_history h
+        where l.source_table = 'reward_history' and h.id = l.source_id
+      )
+    on conflict (source_table, source_id, reason) do nothing
+    returning 1
+  )
+  select count(*) into reversed from inserted;
+
+  select medal_count into cached from public.user_profiles where id = uid;
+  ledger := public.ledger_balance(uid);
+  if not exists (
+    select 1 from public.medal_ledger where user_id = uid and reason = 'opening_balance'
+  ) then
+    insert into public.medal_ledger (user_id, delta, reason, source_table, source_id)
+    values (uid, coalesce(cached, 0) - ledger, 'opening_balance', null, null);
+    ledger := coalesce(cached, 0);
+  elsif cached is distinct from ledger then
+    drift := coalesce(cached, 0) - ledger;
+    insert into public.user_profiles as p (id, medal_count)
+    values (uid, ledger)
+    on conflict (id) do update set medal_count = excluded.medal_count;
+  end if;
+  perform public.snapshot_medal_ledger(uid);
+
+  return json_build_object(
+    'added', added, 'reversed', reversed, 'drift', drift, 'balance', ledger
+  );
+end;
+$$;
+
+-- Balance after each entry since `since`, for charts: the balance at the
+-- cut comes from the nearest snapshot plus a short tail.
+create or replace function public.get_medal_history(since timestamptz default now() - interval '30 days')
+returns table (entry_id bigint, created_at timestamptz, delta integer, reason text, balance bigint)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+  with cut as (
+    select coalesce(max(l.id), 0) as last_id from public.medal_ledger l
+    where l.user_id = auth.uid() and l.created_at < since
+  ),
+  snap as (
+    select s.ledger_id, s.balance from public.medal_snapshots s, cut
+    where s.user_id = auth.uid() and s.ledger_id <= cut.last_id
+    order by s.ledger_id desc limit 1
+  ),
+  opening as (
+    select coalesce((select balance from snap), 0) + coalesce((
+      select sum(l.delta) from public.medal_ledger l, cut
+      where l.user_id = auth.uid()
+        and l.id > coalesce((select ledger_id from snap), 0)
+        and l.id <= cut.last_id
+    ), 0) as balance
+  )
+  select l.id, l.created_at, l.delta, l.reason,
+         (opening.balance + sum(l.delta) over (order by l.id))::bigint
+  from public.medal_ledger l, cut, opening
+  where l.user_id = auth.uid() and l.id > cut.last_id
+  order by l.id;
+$$;
+
+revoke execute on function public.append_medal_entry(uuid, integer, text, text, bigint) from public;
+revoke execute on function public.snapshot_medal_ledger(uuid) from public;
+revoke execute on function public.ledger_balance(uuid) from public;
+grant execute on function public.increment_user_medal_count(integer) to authenticated;
+grant execute on function public.reconcile_medal_ledger() to authenticated;
+grant execute on function public.get_medal_history(timestamptz) to authenticated;
@@ -0,0 +1,89 @@
+-- Manual ordering for tasks and rewards. position is a fractional index:
+-- moving an item writes one row, with a position halfway between its new
+-- neighbours (see src/manual_order.py), instead of renumbering the list.
+-- Once neighbours get too close, the client calls rebalance_positions to
+-- spread the list out again.
+
+alter table public.tasks
+  add column if not exists position double precision;
+alter table public.rewards
+  add column if not exists position double precision;
+
+-- Existing rows keep their creation order, 1024 apart
+with ranked as (
+  select id, row_number() over (partition by user_id order by id) * 1024.0 as p
+  from public.tasks where position is null
+)
+update public.tasks t set position = ranked.p from ranked where t.id = ranked.id;
+
+with ranked as (
+  select id, row_number() over (partition by user_id order by id) * 1024.0 as p
+  from public.rewards where position is null
+)
+update public.rewards r set position = ranked.p from ranked where r.id = ranked.id;
+
+-- Serves order=position.asc,id.asc for one user straight from the index
+create index if not exists tasks_user_position_idx
+  on public.tasks (user_id, position, id);
+create index if not exists rewards_user_position_idx
+  on public.rewards (user_id, position, id);
+
+-- Rows inserted without a position (older clients, imports) go to the end.
+-- Earlier rows of a multi-row insert are visible here, so a bulk insert
+-- keeps its order.
+create or replace function public.append_position()
+returns trigger
+language plpgsql
+as $$
+begin
+  if new.position is null then
+    execute format(
+      'select coalesce(max(position), 0) + 1024 from public.%I where user_id = $1',
+      tg_table_name
+    ) into new.position using coalesce(new.user_id, auth.uid());
+  end if;
+  return new;
+end;
+$$;
+
+drop trigger if exists tasks_append_position on public.tasks;
+create trigger tasks_append_position
+  before insert on public.tasks
+  for each row execute function public.append_position();
+
+drop trigger if exists rewards_append_position on public.rewards;
+create trigger rewards_append_position
+  before insert on public.rewards
+  for each row execute function public.append_position();
+
+-- Respaces the caller's rows of 'tasks' or 'rewards' 1024 apart, keeping
+-- their order. Only rows whose position changes are written (and so only
+-- those reach other clients through delta sync). Returns the rows moved.
+create or replace function public.rebalance_positions(table_name text)
+returns integer
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+  moved integer;
+begin
+  if table_name not in ('tasks', 'rewards') then
+    raise exception 'rebalance_positions: unsupported table %', table_name;
+  end if;
+  execute format(
+    'with ranked as (
+       select id, row_number() over (order by position nulls last, id) * 1024.0 as p
+       from public.%I where user_id = auth.uid()
+     )
+     update public.%I t set position = ranked.p
+     from ranked
+     where t.id = ranked.id and t.position is distinct from ranked.p',
+    table_name, table_name
+  );
+  get diagnostics moved = row_count;
+  return moved;
+end;
+$$;
+
+grant execute on function public.rebalance_positions(text) to authenticated;
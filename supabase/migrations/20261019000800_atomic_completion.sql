@@ -0,0 +1,119 @@
+-- Completing tasks and claiming rewards in one transaction. Since the medal
+-- ledger, the history insert itself moves the balance (see
+-- 20261019000600_medal_ledger.sql). When the client inserted history and
+-- then deleted the task or reward in a second request, a failed delete left
+-- the medals moved and the row in place, and a retry counted them twice.
+-- These functions do both steps together and skip rows that are already
+-- gone, so retrying after a lost response is harmless.
+
+-- completions: [{"task_id", "description", and for a recurring task
+-- "due_date" (the occurrence being completed), "next_due_date",
+-- "next_recurrence"}]. Finished tasks are deleted, recurring ones move to
+-- their next occurrence (computed by the client, see src/recurrence.py).
+create or replace function public.complete_tasks(completions jsonb)
+returns json
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+  item jsonb;
+  done_task public.tasks%rowtype;
+  entry public.task_history%rowtype;
+  moved public.tasks%rowtype;
+  history jsonb := '[]'::jsonb;
+  completed jsonb := '[]'::jsonb;
+  rescheduled jsonb := '[]'::jsonb;
+begin
+  for item in select value from jsonb_array_elements(completions) loop
+    select * into done_task from public.tasks
+    where id = (item->>'task_id')::bigint
+    for update;
+    -- Gone, or a recurring task already moved past this occurrence: an
+    -- earlier attempt completed it
+    continue when not found;
+    continue when item->>'next_due_date' is not null
+      and done_task.due_date::date is distinct from (item->>'due_date')::date;
+
+    insert into public.task_history (description, timestamp, username, user_id)
+    values (
+      coalesce(item->>'description', done_task.task), now(),
+      done_task.username, coalesce(done_task.user_id, auth.uid())
+    )
+    returning * into entry;
+    history := history || to_jsonb(entry);
+
+    if item->>'next_due_date' is not null then
+      update public.tasks
+      set due_date = (item->>'next_due_date')::date,
+          recurrence = item->>'next_recurrence'
+      where id = done_task.id
+      returning * into moved;
+      rescheduled := rescheduled || to_jsonb(moved);
+    else
+      delete from public.tasks where id = done_task.id;
+      completed := completed || to_jsonb(done_task.id);
+    end if;
+  end loop;
+
+  return json_build_object(
+    'success', true,
+    'new_medal_count',
+    coalesce((select medal_count from public.user_profiles where id = auth.uid()), 0),
+    'history', history,
+    'completed', completed,
+    'tasks', rescheduled
+  );
+end;
+$$;
+
+-- Checks the balance against the stored cost, records the claim and
+-- deletes the reward, all under a row lock.
+create or replace function public.claim_reward(target_reward_id bigint)
+returns json
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+  claimed public.rewards%rowtype;
+  balance bigint;
+  entry public.reward_history%rowtype;
+begin
+  select * into claimed from public.rewards
+  where id = target_reward_id
+  for update;
+  if not found then
+    return json_build_object('success', false, 'error', 'Reward not found.');
+  end if;
+
+  select medal_count into balance from public.user_profiles
+  where id = auth.uid()
+  for update;
+  if coalesce(balance, 0) < coalesce(claimed.medal_cost, 0) then
+    return json_build_object(
+      'success', false,
+      'error', format('Not enough medals (%s) for a reward costing %s.',
+                      coalesce(balance, 0), claimed.medal_cost)
+    );
+  end if;
+
+  insert into public.reward_history (description, timestamp, cost, username, user_id)
+  values (
+    claimed.reward, now(), coalesce(claimed.medal_cost, 0),
+    claimed.username, coalesce(claimed.user_id, auth.uid())
+  )
+  returning * into entry;
+  delete from public.rewards where id = claimed.id;
+
+  return json_build_object(
+    'success', true,
+    'new_medal_count',
+    coalesce((select medal_count from public.user_profiles where id = auth.uid()), 0),
+    'history', to_jsonb(entry)
+  );
+end;
+$$;
+
+grant execute on function public.complete_tasks(jsonb) to authenticated;
+grant execute on function public.claim_reward(bigint) to authenticated;